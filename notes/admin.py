@@ -1,5 +1,170 @@
+from functools import partial
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
+
+from .db import estimate_count
+from .export import EXPORT_FORMATS, export_stream
+from .models import Job, Note, NoteStats
+from .search import rank_documents
+
+admin.site.register(Job)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор без точного COUNT(*) по большой таблице.
+
+    Для списка без фильтров берётся оценка из статистики базы, а
+    отфильтрованный список считается не дальше NOTES_ADMIN_COUNT_LIMIT.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = settings.NOTES_ADMIN_COUNT_LIMIT
+        if not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
+
+
+def delete_in_chunks(queryset, chunk_size, on_delete=None):
+    """
+    Удаляет заметки пачками по id, каждую в своей транзакции.
+
+    on_delete получает пары (id, title) пачки внутри её транзакции.
+    """
+    deleted = 0
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'title')[:chunk_size]
+        )
+        if not rows:
+            return deleted
+        ids = [pk for pk, _ in rows]
+        with transaction.atomic():
+            deleted += Note.objects.filter(id__in=ids).delete()[1].get(
+                Note._meta.label, 0
+            )
+            if on_delete is not None:
+                on_delete(rows)
+        last_id = ids[-1]
+
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+    list_display = ('title', 'slug', 'author', 'length')
+    list_select_related = ('author',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    autocomplete_fields = ('author',)
+    readonly_fields = ('excerpt', 'length')
+    # Текст хранится сжатым, поэтому icontains по нему бесполезен: поиск
+    # идёт по инвертированному индексу, а search_fields только включают
+    # поле поиска и дают точное совпадение slug.
+    search_fields = ('=slug',)
+    actions = ('delete_selected_in_chunks', 'export_selected')
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Стандартное удаление загружает все выбранные заметки разом.
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        ids = rank_documents(
+            search_term, limit=settings.NOTES_ADMIN_SEARCH_LIMIT
+        )
+        return queryset.filter(Q(id__in=ids) | Q(slug=search_term)), False
+
+    @admin.action(
+        description='Удалить выбранные заметки',
+        permissions=('delete',),
+    )
+    def delete_selected_in_chunks(self, request, queryset):
+        """
+        Удаление с подтверждением, как у delete_selected, но без загрузки
+        всех заметок и связанных объектов: страница показывает только
+        число заметок и первые заголовки.
+        """
+        if request.POST.get('post'):
+            deleted = delete_in_chunks(
+                queryset,
+                settings.NOTES_ADMIN_DELETE_CHUNK_SIZE,
+                partial(self.log_chunk_deletion, request),
+            )
+            self.message_user(request, f'Удалено заметок: {deleted}.')
+            return None
+        count_limit = settings.NOTES_ADMIN_COUNT_LIMIT
+        return TemplateResponse(
+            request,
+            'admin/notes/note/delete_in_chunks_confirmation.html',
+            {
+                **self.admin_site.each_context(request),
+                'title': 'Удалить заметки',
+                'opts': self.model._meta,
+                'media': self.media,
+                'count': queryset.order_by()[:count_limit + 1].count(),
+                'count_limit': count_limit,
+                'preview': queryset.select_related(None).order_by('id').only(
+                    'title'
+                )[:20],
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+                'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+                'select_across': request.POST.get('select_across', '0'),
+            },
+        )
+
+    def log_chunk_deletion(self, request, rows):
+        """Записи истории об удалении одной пачки одним запросом."""
+        content_type = ContentType.objects.get_for_model(self.model)
+        LogEntry.objects.bulk_create(
+            LogEntry(
+                user_id=request.user.pk,
+                content_type_id=content_type.pk,
+                object_id=str(pk),
+                object_repr=title[:200],
+                action_flag=DELETION,
+            )
+            for pk, title in rows
+        )
+
+    @admin.action(description='Выгрузить выбранные заметки в NDJSON')
+    def export_selected(self, request, queryset):
+        _, content_type, extension = EXPORT_FORMATS['ndjson']
+        response = StreamingHttpResponse(
+            export_stream(queryset.select_related(None), 'ndjson'),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{extension}"'
+        )
+        return response
+
 
-from .models import Note
+@admin.register(NoteStats)
+class NoteStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'note_count', 'total_chars', 'last_edited')
+    list_select_related = ('user',)
+    ordering = ('-note_count',)
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'note_count', 'total_chars', 'last_edited')
 
-admin.site.register(Note)
+    def has_add_permission(self, request):
+        return False
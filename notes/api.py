@@ -0,0 +1,383 @@
+"""JSON API заметок с пакетными операциями."""
+import json
+from http import HTTPStatus
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
+from django.views import generic
+
+from .export import EXPORT_FORMATS
+from .forms import WARNING, NoteForm
+from .jobs import enqueue
+from .models import Job
+from .pagination import CursorPaginator
+from .tags import set_note_tags
+from .tasks import USER_TASKS
+from .views import NoteBase
+
+NOT_FOUND = 'Заметка не найдена.'
+IMPORT_FORMATS = ('ndjson', 'csv')
+DUPLICATE_IN_BATCH = 'Такой slug уже встречается в этом запросе.'
+
+
+def note_to_dict(note, with_text=True):
+    data = {'id': note.id, 'slug': note.slug, 'title': note.title}
+    if with_text:
+        data['text'] = note.text
+    else:
+        data['excerpt'] = note.excerpt
+    return data
+
+
+def json_response(data, status=HTTPStatus.OK):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+class BadRequest(Exception):
+    pass
+
+
+def tags_value(tags):
+    """Теги приходят строкой через запятую или списком строк."""
+    if isinstance(tags, list) and all(isinstance(tag, str) for tag in tags):
+        return ', '.join(tags)
+    return tags
+
+
+class NoteApiMixin(NoteBase):
+    """
+    Базовый класс API: JSON на входе и выходе.
+
+    Права те же, что у HTML-страниц: только свои заметки через
+    NoteBase.get_queryset. Неавторизованный запрос получает 403 вместо
+    редиректа на страницу входа.
+    """
+    raise_exception = True
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except BadRequest as error:
+            return json_response(
+                {'error': str(error)}, status=HTTPStatus.BAD_REQUEST
+            )
+
+    def get_payload(self):
+        try:
+            payload = json.loads(self.request.body)
+        except ValueError:
+            raise BadRequest('Тело запроса должно быть корректным JSON.')
+        if not isinstance(payload, dict):
+            raise BadRequest('Ожидается JSON-объект.')
+        return payload
+
+    def get_payload_list(self, key):
+        items = self.get_payload().get(key)
+        if not isinstance(items, list):
+            raise BadRequest(f'Ожидается список в поле "{key}".')
+        if len(items) > settings.NOTES_API_MAX_BATCH:
+            raise BadRequest(
+                f'Не больше {settings.NOTES_API_MAX_BATCH} элементов '
+                'за один запрос.'
+            )
+        return items
+
+    def batch_response(self, key, done, errors, status=HTTPStatus.OK):
+        if errors and not done:
+            status = HTTPStatus.BAD_REQUEST
+        return json_response({key: done, 'errors': errors}, status=status)
+
+
+class NotesApi(NoteApiMixin, generic.View):
+    """Список заметок постранично и пакетное создание."""
+
+    def get(self, request):
+        paginator = CursorPaginator(
+            self.get_queryset().summary(), settings.NOTES_API_PAGE_SIZE
+        )
+        page = paginator.page(request.GET.get('cursor'))
+        return json_response({
+            'results': [
+                note_to_dict(note, with_text=False) for note in page
+            ],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
+
+    def post(self, request):
+        """
+        Создаёт заметки из списка "notes" одним bulk_create.
+
+        Невалидные элементы не мешают остальным и возвращаются в "errors"
+        со своим индексом в запросе.
+        """
+        notes, errors, note_tags = self.build_notes(
+            self.get_payload_list('notes')
+        )
+        explicit_slugs = {
+            note.slug: index for index, note in notes if note.slug
+        }
+        taken = set(
+            self.model.objects.filter(slug__in=explicit_slugs).values_list(
+                'slug', flat=True
+            )
+        )
+        for slug in taken:
+            errors.append({
+                'index': explicit_slugs[slug],
+                'errors': {'slug': [slug + WARNING]},
+            })
+        notes = [
+            (index, note) for index, note in notes if note.slug not in taken
+        ]
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(note for _, note in notes)
+                for index, note in notes:
+                    if note_tags.get(index):
+                        set_note_tags(note, note_tags[index])
+        except IntegrityError:
+            return json_response(
+                {'error': 'Slug заняли параллельно, повторите запрос.'},
+                status=HTTPStatus.CONFLICT,
+            )
+        errors.sort(key=lambda error: error['index'])
+        return self.batch_response(
+            'created',
+            [note_to_dict(note) for _, note in notes],
+            errors,
+            status=HTTPStatus.CREATED,
+        )
+
+    def build_notes(self, items):
+        """Заметки из валидных элементов, ошибки и теги по индексу."""
+        notes, errors, note_tags = [], [], {}
+        explicit_slugs = set()
+        for index, item in enumerate(items):
+            data = dict(item) if isinstance(item, dict) else {}
+            if 'tags' in data:
+                data['tags'] = tags_value(data['tags'])
+            form = NoteForm(data=data)
+            if not form.is_valid():
+                errors.append({'index': index, 'errors': form.errors})
+                continue
+            note = form.save(commit=False)
+            note.author = self.request.user
+            if note.slug in explicit_slugs:
+                errors.append(
+                    {'index': index, 'errors': {'slug': [
+                        DUPLICATE_IN_BATCH
+                    ]}}
+                )
+                continue
+            if note.slug:
+                explicit_slugs.add(note.slug)
+            if 'tags' in data:
+                note_tags[index] = form.cleaned_data['tags']
+            notes.append((index, note))
+        return notes, errors, note_tags
+
+
+class NoteApiDetail(NoteApiMixin, generic.View):
+    """Одна заметка целиком."""
+
+    def get(self, request, slug):
+        note = self.get_queryset().filter(slug=slug).first()
+        if note is None:
+            return json_response(
+                {'error': NOT_FOUND}, status=HTTPStatus.NOT_FOUND
+            )
+        return json_response(note_to_dict(note))
+
+
+class NotesBulkUpdate(NoteApiMixin, generic.View):
+    """
+    Пакетное редактирование заметок по slug.
+
+    Элемент списка "notes" содержит slug и изменяемые поля: title, text
+    и new_slug для переименования.
+    """
+
+    def post(self, request):
+        items = self.get_payload_list('notes')
+        slugs = [item.get('slug') for item in items if isinstance(item, dict)]
+        if not all(isinstance(slug, (str, type(None))) for slug in slugs):
+            raise BadRequest('Поле "slug" должно быть строкой.')
+        existing = self.get_queryset().in_bulk(
+            [slug for slug in slugs if slug is not None], field_name='slug'
+        )
+        updated, errors = [], []
+        with transaction.atomic():
+            for index, item in enumerate(items):
+                note = None
+                if isinstance(item, dict):
+                    note = existing.get(item.get('slug'))
+                if note is None:
+                    errors.append({'index': index, 'errors': NOT_FOUND})
+                    continue
+                data = {
+                    'title': item.get('title', note.title),
+                    'text': item.get('text', note.text),
+                    'slug': item.get('new_slug', note.slug),
+                }
+                if 'tags' in item:
+                    data['tags'] = tags_value(item['tags'])
+                form = NoteForm(data=data, instance=note)
+                if not form.is_valid():
+                    errors.append({'index': index, 'errors': form.errors})
+                    continue
+                try:
+                    with transaction.atomic():
+                        form.save()
+                except IntegrityError:
+                    errors.append({
+                        'index': index,
+                        'errors': {'slug': [note.slug + WARNING]},
+                    })
+                    continue
+                updated.append(note_to_dict(note))
+        return self.batch_response('updated', updated, errors)
+
+
+class NotesBulkDelete(NoteApiMixin, generic.View):
+    """Пакетное удаление заметок по списку "slugs"."""
+
+    def post(self, request):
+        slugs = [
+            slug for slug in self.get_payload_list('slugs')
+            if isinstance(slug, str)
+        ]
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(slug__in=slugs)
+            found = set(queryset.values_list('slug', flat=True))
+            queryset.delete()
+        errors = [
+            {'slug': slug, 'errors': NOT_FOUND}
+            for slug in slugs if slug not in found
+        ]
+        return self.batch_response('deleted', sorted(found), errors)
+
+
+def job_to_dict(job):
+    data = {
+        'id': job.id,
+        'task': job.name,
+        'status': job.status,
+        'attempts': job.attempts,
+        'result': job.result,
+        'error': job.error.strip().splitlines()[-1] if job.error else None,
+        'created': job.created,
+        'finished': job.finished,
+        'url': reverse('notes:api_job', args=(job.id,)),
+    }
+    if job.status == Job.DONE and (job.result or {}).get('file'):
+        data['download'] = reverse('notes:api_job_download', args=(job.id,))
+    return data
+
+
+class JobApiMixin(NoteApiMixin):
+    """Фоновые задачи пользователя: видны только свои."""
+    model = Job
+
+    def get_queryset(self):
+        return self.model.objects.filter(user=self.request.user)
+
+    def get_job(self, pk):
+        job = self.get_queryset().filter(pk=pk).first()
+        if job is None:
+            raise Http404('Задача не найдена.')
+        return job
+
+    def accepted(self, job):
+        response = json_response(job_to_dict(job), status=HTTPStatus.ACCEPTED)
+        response['Location'] = reverse('notes:api_job', args=(job.id,))
+        return response
+
+
+class JobsApi(JobApiMixin, generic.View):
+    """
+    Постановка задачи в очередь и последние задачи пользователя.
+
+    Тело запроса: {"task": имя, "payload": параметры}. Ответ 202 с
+    адресом, по которому можно следить за состоянием задачи.
+    """
+
+    def get(self, request):
+        jobs = self.get_queryset().order_by('-id')[:50]
+        return json_response({'results': [job_to_dict(job) for job in jobs]})
+
+    def post(self, request):
+        data = self.get_payload()
+        name = data.get('task')
+        if name not in USER_TASKS:
+            raise BadRequest(
+                f'Задача должна быть одной из: {", ".join(USER_TASKS)}.'
+            )
+        payload = data.get('payload') or {}
+        if not isinstance(payload, dict):
+            raise BadRequest('Параметры задачи должны быть JSON-объектом.')
+        getattr(self, f'clean_{name}')(payload)
+        return self.accepted(enqueue(name, payload, user=request.user))
+
+    def clean_export_notes(self, payload):
+        if payload.setdefault('format', 'ndjson') not in EXPORT_FORMATS:
+            raise BadRequest('Неизвестный формат выгрузки.')
+
+    def clean_delete_notes(self, payload):
+        slugs = payload.get('slugs')
+        if not isinstance(slugs, list) or not all(
+            isinstance(slug, str) for slug in slugs
+        ):
+            raise BadRequest('Ожидается список строк в поле "slugs".')
+
+
+class JobImportApi(JobApiMixin, generic.View):
+    """
+    Загрузка заметок в фоне.
+
+    Тело запроса — сам файл NDJSON или CSV; формат передаётся параметром
+    format. Файл потоково сохраняется в хранилище, а разбирает его
+    воркер.
+    """
+
+    def post(self, request):
+        import_format = request.GET.get('format', 'ndjson')
+        if import_format not in IMPORT_FORMATS:
+            raise BadRequest('Неизвестный формат загрузки.')
+        name = default_storage.save(
+            f'imports/{request.user.pk}.{import_format}', File(request)
+        )
+        job = enqueue(
+            'import_notes',
+            {'file': name, 'format': import_format},
+            user=request.user,
+        )
+        return self.accepted(job)
+
+
+class JobApiDetail(JobApiMixin, generic.View):
+    """Состояние задачи."""
+
+    def get(self, request, pk):
+        return json_response(job_to_dict(self.get_job(pk)))
+
+
+class JobDownload(JobApiMixin, generic.View):
+    """Файл, подготовленный задачей выгрузки."""
+
+    def get(self, request, pk):
+        job = self.get_job(pk)
+        name = (job.result or {}).get('file')
+        if job.status != Job.DONE or not name:
+            raise Http404('Файл ещё не готов.')
+        return FileResponse(
+            default_storage.open(name, 'rb'),
+            as_attachment=True,
+            filename=f'notes.{name.rsplit(".", 1)[-1]}',
+        )
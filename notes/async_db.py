@@ -0,0 +1,102 @@
+"""
+Асинхронный доступ к данным заметок.
+
+ORM в Django синхронный, поэтому запросы выполняются в отдельном пуле
+потоков ограниченного размера (NOTES_ASYNC_DB_THREADS). Цикл событий при
+этом свободен и может обслуживать медленных клиентов, пока пул занят.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from threading import Lock
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.shortcuts import render as render_sync
+
+from . import tags
+from .models import Note
+from .pagination import CursorPaginator
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.NOTES_ASYNC_DB_THREADS,
+                thread_name_prefix='notes-db',
+            )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    # Соединения живут в потоках пула: закрываем протухшие, как это
+    # делает Django на границах обычного запроса.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func, *args, **kwargs):
+    """Выполняет синхронную функцию с запросами к базе в пуле потоков."""
+    loop = asyncio.get_running_loop()
+    # Контекст копируется, чтобы в потоке действовало, например,
+    # закрепление запроса за основной базой.
+    return await loop.run_in_executor(
+        get_executor(), copy_context().run, partial(_call, func, args, kwargs)
+    )
+
+
+def _resolve_user(request):
+    user = request.user
+    # Ленивый объект пользователя загружается из сессии при обращении.
+    user.is_authenticated
+    return user
+
+
+async def get_user(request):
+    return await run_db(_resolve_user, request)
+
+
+def _get_page(author, cursor, per_page, tag_names):
+    queryset = tags.filter_by_tags(
+        Note.objects.summary().filter(author=author), author, tag_names
+    )
+    page = CursorPaginator(queryset, per_page).page(cursor)
+    page.object_list = list(page.object_list)
+    return page
+
+
+async def get_page(author, cursor, per_page, tag_names=()):
+    return await run_db(_get_page, author, cursor, per_page, tag_names)
+
+
+def _get_tag_counts(author):
+    return list(tags.get_tag_counts(author))
+
+
+async def get_tag_counts(author):
+    return await run_db(_get_tag_counts, author)
+
+
+def _get_note(author, slug):
+    # Теги загружаются заранее: шаблон отрисовывается отдельным вызовом.
+    return Note.objects.filter(author=author, slug=slug).prefetch_related(
+        'tags'
+    ).first()
+
+
+async def get_note(author, slug):
+    return await run_db(_get_note, author, slug)
+
+
+async def render(request, template_name, context):
+    """Отрисовка в пуле: шаблоны читают фрагменты и версии из кэша."""
+    return await run_db(render_sync, request, template_name, context)
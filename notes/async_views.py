@@ -0,0 +1,107 @@
+"""Асинхронные версии страниц чтения для запуска под ASGI."""
+import asyncio
+from functools import update_wrapper
+
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.views import generic
+
+from . import async_db
+from .api import json_response, note_to_dict
+from .tags import parse_tags
+from .views import NotesList
+
+
+class AsyncView(generic.View):
+    """
+    CBV с async-обработчиками.
+
+    Django 3.2 считает view асинхронным, только если это корутинная
+    функция, поэтому as_view оборачивает обычный view в корутину.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+
+        update_wrapper(async_view, view)
+        return async_view
+
+
+class AsyncLoginRequiredMixin:
+    """Аналог LoginRequiredMixin: пользователь загружается в пуле потоков."""
+    raise_exception = False
+
+    async def get_user(self, request):
+        user = await async_db.get_user(request)
+        if user.is_authenticated:
+            return user
+        if self.raise_exception:
+            raise PermissionDenied
+        return None
+
+    def handle_no_permission(self):
+        return redirect_to_login(self.request.get_full_path())
+
+
+class AsyncNotesList(AsyncLoginRequiredMixin, AsyncView):
+    """Список заметок пользователя."""
+
+    async def get(self, request):
+        user = await self.get_user(request)
+        if user is None:
+            return self.handle_no_permission()
+        tag_filter = parse_tags(','.join(request.GET.getlist('tag')))
+        page = await async_db.get_page(
+            user, request.GET.get('cursor'), NotesList.paginate_by,
+            tag_filter,
+        )
+        return await async_db.render(request, 'notes/list.html', {
+            'object_list': page.object_list,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'tag_filter': tag_filter,
+            'tag_counts': await async_db.get_tag_counts(user),
+        })
+
+
+class AsyncNoteDetail(AsyncLoginRequiredMixin, AsyncView):
+    """Заметка подробно."""
+
+    async def get(self, request, slug):
+        user = await self.get_user(request)
+        if user is None:
+            return self.handle_no_permission()
+        note = await async_db.get_note(user, slug)
+        if note is None:
+            raise Http404('Заметка не найдена.')
+        return await async_db.render(request, 'notes/detail.html', {
+            'note': note,
+            'object': note,
+        })
+
+
+class AsyncNotesApi(AsyncLoginRequiredMixin, AsyncView):
+    """Чтение списка заметок через API."""
+    raise_exception = True
+
+    async def get(self, request):
+        user = await self.get_user(request)
+        page = await async_db.get_page(
+            user, request.GET.get('cursor'), settings.NOTES_API_PAGE_SIZE
+        )
+        return json_response({
+            'results': [
+                note_to_dict(note, with_text=False) for note in page
+            ],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
@@ -0,0 +1,86 @@
+"""Кэширование пользователя, чтобы не ходить в auth_user на каждый запрос."""
+from types import MethodType
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import router
+
+USER_PREFIX = 'notes:user'
+
+# Поля, которые нужны запросу; хеш пароля в общий кэш не попадает.
+USER_FIELDS = (
+    'id', 'username', 'first_name', 'last_name', 'email',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+
+def get_cache():
+    return caches[settings.NOTES_CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f'{USER_PREFIX}:{user_id}'
+
+
+def invalidate_user(user_id):
+    get_cache().delete(user_cache_key(user_id))
+
+
+def pack_user(user):
+    data = {name: getattr(user, name) for name in USER_FIELDS}
+    data['session_auth_hash'] = user.get_session_auth_hash()
+    return data
+
+
+def cached_session_auth_hash(user):
+    """Хеш сессии из кэша, пока пароль не загружен из базы."""
+    if 'password' in user.get_deferred_fields():
+        return user.cached_session_auth_hash
+    return type(user).get_session_auth_hash(user)
+
+
+def unpack_user(data):
+    """
+    Пользователь из кэша: остальные поля отложены, как после only().
+
+    save() такого объекта пишет только загруженные поля, а обращение к
+    паролю (например, при его смене) дочитывает его из базы.
+    """
+    user_model = get_user_model()
+    fields = [
+        field.attname for field in user_model._meta.concrete_fields
+        if field.attname in data
+    ]
+    user = user_model.from_db(
+        router.db_for_read(user_model),
+        fields,
+        [data[name] for name in fields],
+    )
+    user.cached_session_auth_hash = data['session_auth_hash']
+    user.get_session_auth_hash = MethodType(cached_session_auth_hash, user)
+    return user
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который недолго хранит данные пользователя в кэше.
+
+    В кэш кладутся только поля из USER_FIELDS и хеш сессии, но не хеш
+    пароля. Запись сбрасывается при сохранении или удалении пользователя
+    (в том числе при смене пароля и отключении) и при выходе, поэтому
+    проверка хеша сессии в django.contrib.auth видит актуальный пароль.
+    """
+
+    def get_user(self, user_id):
+        cache = get_cache()
+        key = user_cache_key(user_id)
+        data = cache.get(key)
+        if data is not None:
+            user = unpack_user(data)
+            return user if self.user_can_authenticate(user) else None
+        user = super().get_user(user_id)
+        if user is not None:
+            cache.set(key, pack_user(user), settings.NOTES_USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,151 @@
+"""
+Бенчмарки путей запросов к заметкам.
+
+Запуск: ``pytest notes/benchmarks``. Размер данных и число замеров
+задаются переменными окружения BENCH_USERS, BENCH_NOTES, BENCH_ROUNDS,
+результаты пишутся в JSON-файл BENCH_OUTPUT.
+"""
+import json
+import os
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pytest
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+from notes.models import Note
+from notes.pytest_tests.conftest import clear_cache  # noqa: F401
+
+USERS = int(os.getenv('BENCH_USERS', 5))
+NOTES_PER_USER = int(os.getenv('BENCH_NOTES', 200))
+ROUNDS = int(os.getenv('BENCH_ROUNDS', 30))
+OUTPUT = os.getenv('BENCH_OUTPUT', 'bench_results.json')
+SEED_BATCH_SIZE = 1000
+
+
+def make_notes(author, count):
+    """Генератор заметок: заголовки повторяются, как у живых людей."""
+    for index in range(count):
+        yield Note(
+            title=f'Заметка {index % 50}',
+            text=f'Текст заметки номер {index}. ' * (1 + index % 20),
+            author=author,
+        )
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    """Один раз на сессию заполняет базу USERS x NOTES_PER_USER заметок."""
+    with django_db_blocker.unblock():
+        User = get_user_model()
+        for user_index in range(USERS):
+            author = User.objects.create(username=f'bench-{user_index}')
+            Note.objects.bulk_create(
+                make_notes(author, NOTES_PER_USER),
+                batch_size=SEED_BATCH_SIZE,
+            )
+
+
+@pytest.fixture(scope='session')
+def bench_session_cookie(django_db_setup, django_db_blocker):
+    """
+    Закоммиченная сессия bench-0 для запросов из других потоков.
+
+    Сессия из force_login внутри теста живёт в незакоммиченной
+    транзакции и не видна соединениям пулов ASGI/WSGI.
+    """
+    with django_db_blocker.unblock():
+        client = Client()
+        client.force_login(
+            get_user_model().objects.get(username='bench-0')
+        )
+    cookie = client.cookies[settings.SESSION_COOKIE_NAME]
+    return f'{cookie.key}={cookie.value}'
+
+
+@pytest.fixture
+def bench_author(db):
+    return get_user_model().objects.get(username='bench-0')
+
+
+@pytest.fixture
+def bench_client(client, bench_author):
+    client.force_login(bench_author)
+    return client
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', 'HEAD'),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@pytest.fixture(scope='session')
+def bench_results():
+    results = {}
+    yield results
+    with open(OUTPUT, 'w', encoding='utf-8') as file:
+        json.dump(
+            {
+                'revision': git_revision(),
+                'created': datetime.now(timezone.utc).isoformat(),
+                'users': USERS,
+                'notes_per_user': NOTES_PER_USER,
+                'rounds': ROUNDS,
+                'results': results,
+            },
+            file,
+            ensure_ascii=False,
+            indent=2,
+        )
+
+
+class Benchmark:
+    """Замеряет задержки, число SQL-запросов и пик памяти одного вызова."""
+
+    def __init__(self, results):
+        self.results = results
+
+    def __call__(self, name, func, rounds=ROUNDS, setup=None):
+        timings = []
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        if setup is not None:
+            setup()
+        with CaptureQueriesContext(connection) as queries:
+            tracemalloc.start()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        percentiles = statistics.quantiles(timings, n=100)
+        result = {
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(percentiles[94], 3),
+            'p99_ms': round(percentiles[98], 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries': len(queries.captured_queries),
+            'peak_memory_kib': round(peak / 1024, 1),
+        }
+        self.results[name] = result
+        return result
+
+
+@pytest.fixture
+def benchmark(bench_results):
+    return Benchmark(bench_results)
@@ -0,0 +1,125 @@
+"""
+Сравнение пропускной способности ASGI и WSGI при медленных клиентах.
+
+Медленный клиент моделируется задержкой CLIENT_DELAY при отправке
+ответа: WSGI-сервер с WSGI_THREADS потоками держит поток на всё время
+отправки, а ASGI-воркер в это время обслуживает другие запросы.
+Синхронная HTML-страница списка отдаётся из кэша страниц, поэтому честно
+сравнивать между собой прежде всего пути API.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from io import BytesIO
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import reverse
+
+CONCURRENCY = int(os.getenv('BENCH_CONCURRENCY', 50))
+CLIENT_DELAY = float(os.getenv('BENCH_CLIENT_DELAY', 0.05))
+WSGI_THREADS = int(os.getenv('BENCH_WSGI_THREADS', 8))
+
+
+def wsgi_request(application, path, cookie):
+    status = []
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'HTTP_COOKIE': cookie,
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': BytesIO(),
+    }
+    body = application(environ, lambda code, headers: status.append(code))
+    try:
+        for _ in body:
+            time.sleep(CLIENT_DELAY)
+    finally:
+        body.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_request(application, path, cookie):
+    status = []
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'cookie', cookie.encode())],
+        'server': ('testserver', 80),
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif not message.get('more_body'):
+            await asyncio.sleep(CLIENT_DELAY)
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+def run_wsgi(path, cookie):
+    application = WSGIHandler()
+    with ThreadPoolExecutor(max_workers=WSGI_THREADS) as pool:
+        return list(pool.map(
+            lambda _: wsgi_request(application, path, cookie),
+            range(CONCURRENCY),
+        ))
+
+
+def run_asgi(path, cookie):
+    application = ASGIHandler()
+
+    async def main():
+        return await asyncio.gather(*(
+            asgi_request(application, path, cookie)
+            for _ in range(CONCURRENCY)
+        ))
+
+    return asyncio.run(main())
+
+
+def measure(run, path, cookie):
+    started = time.perf_counter()
+    statuses = run(path, cookie)
+    elapsed = time.perf_counter() - started
+    assert set(statuses) == {HTTPStatus.OK}
+    return {
+        'requests': len(statuses),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(statuses) / elapsed, 1),
+    }
+
+
+def test_slow_clients_asgi_vs_wsgi(db, bench_results, bench_session_cookie):
+    bench_results['slow_clients'] = {
+        'concurrency': CONCURRENCY,
+        'client_delay_s': CLIENT_DELAY,
+        'wsgi_threads': WSGI_THREADS,
+        'wsgi_sync_list': measure(
+            run_wsgi, reverse('notes:list'), bench_session_cookie
+        ),
+        'wsgi_sync_api': measure(
+            run_wsgi, reverse('notes:api_list'), bench_session_cookie
+        ),
+        'asgi_async_list': measure(
+            run_asgi, reverse('notes:async_list'), bench_session_cookie
+        ),
+        'asgi_async_api': measure(
+            run_asgi, reverse('notes:api_async_list'), bench_session_cookie
+        ),
+    }
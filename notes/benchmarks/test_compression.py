@@ -0,0 +1,88 @@
+"""
+Цена сжатия ответов: процессорное время против сэкономленных байтов.
+
+Для типичных ответов (список, большая заметка, JSON API, потоковая
+выгрузка) сравниваются уровни gzip и brotli, если он установлен.
+"""
+import statistics
+import time
+
+from django.urls import reverse
+
+from notes.middleware import (BrotliEncoder, CompressionMiddleware,
+                              GzipEncoder, brotli)
+from notes.models import Note
+
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 11)
+
+
+def measure(encode, body, size, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.process_time()
+        compressed = encode(body)
+        timings.append((time.process_time() - started) * 1000)
+    cpu_ms = statistics.median(timings)
+    saved = size - len(compressed)
+    return {
+        'bytes': size,
+        'compressed_bytes': len(compressed),
+        'ratio': round(len(compressed) / size, 3),
+        'cpu_ms': round(cpu_ms, 3),
+        'saved_kib_per_cpu_ms': (
+            round(saved / 1024 / cpu_ms, 1) if cpu_ms else None
+        ),
+    }
+
+
+def encode_whole(encoder_class):
+    def encode(body):
+        encoder = encoder_class()
+        return encoder.compress(body) + encoder.finish()
+    return encode
+
+
+def encode_stream(encoder_class):
+    def encode(chunks):
+        return b''.join(CompressionMiddleware(None).compress_stream(
+            encoder_class(), chunks
+        ))
+    return encode
+
+
+def test_compression_cost(benchmark, bench_client, bench_author, settings):
+    long_note = Note.objects.filter(author=bench_author).order_by(
+        '-id'
+    ).only('slug').first()
+    bodies = {
+        'list': bench_client.get(reverse('notes:list')).content,
+        'detail': bench_client.get(
+            reverse('notes:detail', args=(long_note.slug,))
+        ).content,
+        'api_list': bench_client.get(reverse('notes:api_list')).content,
+    }
+    export = list(bench_client.get(
+        reverse('notes:export', args=('ndjson',))
+    ).streaming_content)
+    variants = [
+        (f'gzip-{level}', GzipEncoder, 'NOTES_COMPRESS_GZIP_LEVEL', level)
+        for level in GZIP_LEVELS
+    ]
+    if brotli is not None:
+        variants += [
+            (f'br-{quality}', BrotliEncoder,
+             'NOTES_COMPRESS_BROTLI_QUALITY', quality)
+            for quality in BROTLI_QUALITIES
+        ]
+    results = {}
+    for name, encoder_class, setting, value in variants:
+        setattr(settings, setting, value)
+        for body_name, body in bodies.items():
+            results[f'{body_name}:{name}'] = measure(
+                encode_whole(encoder_class), body, len(body), 20
+            )
+        results[f'export_ndjson:{name}'] = measure(
+            encode_stream(encoder_class), export, sum(map(len, export)), 3
+        )
+    benchmark.results['compression'] = results
@@ -0,0 +1,76 @@
+"""
+Пропускная способность конкурентной записи в SQLite.
+
+Несколько потоков со своими подключениями пишут в один файл базы
+короткими транзакциями, как параллельные NoteCreate/NoteUpdate.
+Сравниваются настройки по умолчанию и профиль sqlite-tuned.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+from notes.db import apply_pragmas
+
+WRITERS = int(os.getenv('BENCH_WRITERS', 8))
+WRITES_PER_WRITER = int(os.getenv('BENCH_WRITES', 200))
+
+
+def run_writers(path, pragmas):
+    with sqlite3.connect(path) as setup:
+        apply_pragmas(setup, pragmas)
+        setup.execute(
+            'CREATE TABLE note (id INTEGER PRIMARY KEY, title TEXT, text TEXT)'
+        )
+    errors = []
+
+    def write(number):
+        # Без прагм подключение ведёт себя как Django по умолчанию:
+        # журнал DELETE и ожидание блокировки 5 секунд.
+        db = sqlite3.connect(path, timeout=5, isolation_level=None)
+        apply_pragmas(db, pragmas)
+        for index in range(WRITES_PER_WRITER):
+            try:
+                db.execute('BEGIN IMMEDIATE')
+                db.execute(
+                    'INSERT INTO note (title, text) VALUES (?, ?)',
+                    (f'Заметка {number}-{index}', 'Текст заметки ' * 20),
+                )
+                db.execute('COMMIT')
+            except sqlite3.OperationalError:
+                errors.append(number)
+                if db.in_transaction:
+                    db.execute('ROLLBACK')
+        db.close()
+
+    threads = [
+        threading.Thread(target=write, args=(number,))
+        for number in range(WRITERS)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    writes = WRITERS * WRITES_PER_WRITER - len(errors)
+    return {
+        'writes': writes,
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'writes_per_second': round(writes / elapsed, 1),
+    }
+
+
+def test_sqlite_write_throughput(tmp_path, bench_results):
+    bench_results['sqlite_writes'] = {
+        'writers': WRITERS,
+        'writes_per_writer': WRITES_PER_WRITER,
+        'default': run_writers(str(tmp_path / 'default.sqlite3'), {}),
+        'sqlite_tuned': run_writers(
+            str(tmp_path / 'tuned.sqlite3'),
+            settings.NOTES_SQLITE_TUNED_PRAGMAS,
+        ),
+    }
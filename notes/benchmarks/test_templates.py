@@ -0,0 +1,63 @@
+"""
+Отрисовка notes/list.html со списком из BENCH_TEMPLATE_NOTES заметок.
+
+before — загрузчики без кэша, как при DEBUG, и без кэша фрагментов;
+cached_loader — профиль cached, фрагменты не кэшируются;
+after — профиль cached и тёплый кэш шапки и панели тегов.
+"""
+import os
+from copy import deepcopy
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.urls import reverse
+
+from notes.models import Note
+
+TEMPLATE_NOTES = int(os.getenv('BENCH_TEMPLATE_NOTES', 10000))
+TEMPLATE_ROUNDS = min(int(os.getenv('BENCH_ROUNDS', 30)), 10)
+
+
+def make_engine(loaders):
+    config = deepcopy(settings.TEMPLATES[0])
+    config.pop('BACKEND')
+    config.update({'NAME': 'bench', 'APP_DIRS': False})
+    config['OPTIONS']['loaders'] = loaders
+    return DjangoTemplates(config)
+
+
+def test_list_template_render(benchmark, bench_author, settings):
+    notes = [
+        Note(
+            id=index,
+            slug=f'note-{index}',
+            title=f'Заметка {index % 50}',
+            excerpt=f'Текст заметки номер {index}.',
+        )
+        for index in range(1, TEMPLATE_NOTES + 1)
+    ]
+    request = RequestFactory().get(reverse('notes:list'))
+    request.user = bench_author
+    context = {'object_list': notes}
+    engines = {
+        'before': make_engine(settings.TEMPLATE_LOADERS),
+        'cached_loader': make_engine([
+            ('django.template.loaders.cached.Loader',
+             settings.TEMPLATE_LOADERS),
+        ]),
+    }
+    engines['after'] = engines['cached_loader']
+    for name, engine in engines.items():
+        settings.NOTES_FRAGMENT_CACHE_TIMEOUT = (
+            60 if name == 'after' else 0
+        )
+
+        def render():
+            engine.get_template('notes/list.html').render(context, request)
+
+        # Первая отрисовка заполняет кэш загрузчика и фрагментов.
+        render()
+        benchmark(
+            f'list_template:{name}', render, rounds=TEMPLATE_ROUNDS
+        )
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.urls import reverse
+import pytest
+
+from notes.forms import NoteForm
+from notes.models import Note
+from notes.pagination import NEXT, encode_cursor
+from notes.views import NotesList
+
+
+def test_notes_list(benchmark, bench_client):
+    url = reverse('notes:list')
+    benchmark(
+        'notes_list:cold', lambda: bench_client.get(url), setup=cache.clear
+    )
+    benchmark('notes_list:warm', lambda: bench_client.get(url))
+
+
+def test_notes_list_deep_page(benchmark, bench_client, bench_author):
+    notes = Note.objects.filter(author=bench_author).order_by('-id')
+    count = notes.count()
+    per_page = NotesList.paginate_by
+    if count <= per_page:
+        pytest.skip(
+            f'Все {count} заметок автора помещаются на одну страницу '
+            f'из {per_page}: увеличьте BENCH_NOTES.'
+        )
+    # Курсор последней страницы — заметка сразу перед ней.
+    last_page_start = notes.values_list('id', flat=True)[
+        (count - 1) // per_page * per_page - 1
+    ]
+    url = reverse('notes:list')
+    params = {'cursor': encode_cursor(NEXT, last_page_start)}
+    benchmark(
+        'notes_list:deep_page',
+        lambda: bench_client.get(url, params),
+        setup=cache.clear,
+    )
+
+
+def test_note_detail(benchmark, bench_client, bench_author):
+    note = Note.objects.filter(author=bench_author).last()
+    url = reverse('notes:detail', args=(note.slug,))
+    benchmark(
+        'note_detail:cold', lambda: bench_client.get(url), setup=cache.clear
+    )
+    benchmark('note_detail:warm', lambda: bench_client.get(url))
+
+
+def test_note_create(benchmark, bench_client):
+    url = reverse('notes:add')
+    data = {'title': 'Заметка 1', 'text': 'Новая заметка'}
+    benchmark('note_create', lambda: bench_client.post(url, data))
+
+
+def test_note_form_validation(db, benchmark):
+    data = {'title': 'Заметка 1', 'text': 'Текст', 'slug': 'zametka-1'}
+    benchmark('note_form:is_valid', lambda: NoteForm(data=data).is_valid())
@@ -0,0 +1,94 @@
+"""
+Кэш отрисованных страниц заметок.
+
+У каждого автора есть счётчик версии для списка заметок и по счётчику на
+каждый slug. Сохранение или удаление заметки увеличивает счётчики, и
+закэшированные страницы старой версии больше никогда не читаются.
+"""
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+VERSION_PREFIX = 'notes:version'
+PAGE_PREFIX = 'notes:page'
+
+
+def get_cache():
+    return caches[settings.NOTES_CACHE_ALIAS]
+
+
+def version_key(author_id, slug=None):
+    if slug is None:
+        return f'{VERSION_PREFIX}:{author_id}'
+    return f'{VERSION_PREFIX}:{author_id}:{slug}'
+
+
+def get_version(author_id, slug=None):
+    """Возвращает пару (версия, время последнего изменения)."""
+    cache = get_cache()
+    key = version_key(author_id, slug)
+    values = cache.get_many((key, f'{key}:modified'))
+    if key in values and f'{key}:modified' in values:
+        return values[key], values[f'{key}:modified']
+    # Счётчик мог быть вытеснен из кэша: новое значение не должно
+    # совпасть ни с одной из прежних версий, поэтому берём время в нс.
+    version, modified = time.time_ns(), int(time.time())
+    cache.add(key, version, timeout=None)
+    cache.add(f'{key}:modified', modified, timeout=None)
+    return cache.get(key, version), cache.get(f'{key}:modified', modified)
+
+
+def bump_version(author_id, slug=None):
+    cache = get_cache()
+    key = version_key(author_id, slug)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+    cache.set(f'{key}:modified', int(time.time()), timeout=None)
+
+
+def invalidate(author_id, *slugs):
+    """
+    Сбрасывает страницы списка автора и страницы заметок с данными slug.
+
+    Внутри транзакции сброс повторяется после коммита, чтобы страница,
+    отрисованная по ещё не закоммиченным данным, тоже устарела.
+    """
+    def bump():
+        bump_version(author_id)
+        for slug in set(slugs):
+            if slug:
+                bump_version(author_id, slug)
+
+    bump()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def page_key(user_id, path, version):
+    digest = md5(path.encode()).hexdigest()
+    return f'{PAGE_PREFIX}:{user_id}:{digest}:{version}'
+
+
+def make_etag(user_id, path, version):
+    digest = md5(f'{user_id}:{path}:{version}'.encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def get_page(key):
+    return get_cache().get(key)
+
+
+def set_page(key, response):
+    get_cache().set(
+        key,
+        {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+        },
+        timeout=settings.NOTES_PAGE_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,25 @@
+"""Проверки конфигурации приложения для manage.py check."""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches)
+def shared_cache_check(app_configs, **kwargs):
+    """
+    Кэш страниц и их версий должен быть общим для всех процессов.
+
+    Иначе процесс, который не видел записи, продолжает отдавать старую
+    страницу и 304 на её ETag.
+    """
+    if settings.NOTES_WEB_PROCESSES <= 1:
+        return []
+    if not isinstance(caches[settings.NOTES_CACHE_ALIAS], LocMemCache):
+        return []
+    return [Error(
+        f'Кэш {settings.NOTES_CACHE_ALIAS!r} хранится в памяти процесса, '
+        f'а запросы обслуживают {settings.NOTES_WEB_PROCESSES} процесса.',
+        hint='Задайте YANOTE_CACHE_PROFILE=memcached или file.',
+        id='notes.E001',
+    )]
@@ -0,0 +1,99 @@
+"""Пакетное сжатие уже сохранённых текстов заметок и их версий."""
+from django.db import transaction
+from django.db.models import TextField, Value
+
+from .fields import CompressedValue, compress_text, decompress_text
+
+BATCH_SIZE = 500
+
+
+class StorageReport:
+    def __init__(self):
+        self.rows = 0
+        self.revisions = 0
+        self.rewritten = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    @property
+    def saved(self):
+        return self.bytes_before - self.bytes_after
+
+    def __str__(self):
+        percent = (
+            100 * self.saved / self.bytes_before if self.bytes_before else 0
+        )
+        return (
+            f'Проверено заметок: {self.rows}, версий: {self.revisions}, '
+            f'переписано: {self.rewritten}. '
+            f'Объём текстов: {self.bytes_before} -> {self.bytes_after} байт, '
+            f'сэкономлено {self.saved} байт ({percent:.1f}%).'
+        )
+
+
+def iter_raw_texts(model, batch_size, field='text'):
+    """Пачки (id, значение в базе) по возрастанию id."""
+    last_id = 0
+    while True:
+        batch = list(
+            model.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', field)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+def raw_value(value):
+    return value.raw if isinstance(value, CompressedValue) else value
+
+
+def compress_existing(model, batch_size=BATCH_SIZE, revision_model=None):
+    """
+    Сжимает тексты, которые по текущему порогу должны храниться сжатыми.
+
+    С revision_model сжимаются и данные версий: снимки хранят текст
+    заметки целиком. Каждая пачка переписывается в своей транзакции, так
+    что прерванный запуск можно просто повторить.
+    """
+    report = StorageReport()
+    report.rows = compress_rows(model, 'text', report, batch_size)
+    if revision_model is not None:
+        report.revisions = compress_rows(
+            revision_model, 'data', report, batch_size
+        )
+    return report
+
+
+def compress_rows(model, field, report, batch_size):
+    """Сжимает поле field у всех строк model; возвращает число строк."""
+    rows = 0
+    for batch in iter_raw_texts(model, batch_size, field):
+        with transaction.atomic():
+            for row_id, value in batch:
+                rows += 1
+                before = raw_value(value)
+                after = before
+                if not isinstance(value, CompressedValue):
+                    after = compress_text(value)
+                    if after != before:
+                        model.objects.filter(id=row_id).update(**{
+                            field: Value(after, output_field=TextField())
+                        })
+                        report.rewritten += 1
+                report.bytes_before += len(before.encode())
+                report.bytes_after += len(after.encode())
+    return rows
+
+
+def decompress_existing(model, batch_size=BATCH_SIZE, field='text'):
+    """Обратная операция для отката миграции."""
+    for batch in iter_raw_texts(model, batch_size, field):
+        with transaction.atomic():
+            for row_id, value in batch:
+                if isinstance(value, CompressedValue):
+                    model.objects.filter(id=row_id).update(**{field: Value(
+                        decompress_text(value.raw), output_field=TextField()
+                    )})
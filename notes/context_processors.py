@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.utils.functional import cached_property
+
+from . import cache
+
+
+class FragmentCache:
+    """
+    Параметры тега {% cache %} для фрагментов страниц пользователя.
+
+    Версия списка заметок читается из кэша только тогда, когда шаблон
+    действительно использует её в ключе фрагмента.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @property
+    def alias(self):
+        return settings.NOTES_CACHE_ALIAS
+
+    @property
+    def timeout(self):
+        return settings.NOTES_FRAGMENT_CACHE_TIMEOUT
+
+    @cached_property
+    def version(self):
+        if not self.user.is_authenticated:
+            return None
+        return cache.get_version(self.user.pk)[0]
+
+
+def fragment_cache(request):
+    return {'notes_cache': FragmentCache(request.user)}
@@ -0,0 +1,109 @@
+"""
+Автосохранение черновиков заметок.
+
+Частые сохранения из формы копятся в кэше: каждое новое просто заменяет
+предыдущее. Черновик живёт в кэше окнами по NOTES_DRAFT_FLUSH_INTERVAL
+секунд и пишется в таблицу NoteDraft один раз за окно, когда оно уже
+закончилось: при следующем сохранении или чтении черновика. Явная
+просьба клиента записывает его сразу. Сохранение самой заметки удаляет
+черновик.
+
+Черновик помнит номер версии заметки, с которой начата правка. Если
+заметку с тех пор сохранили, черновик устарел и не восстанавливается.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import NoteDraft
+from .revisions import last_revision_number
+
+DRAFT_PREFIX = 'notes:draft'
+
+
+def get_cache():
+    return caches[settings.NOTES_CACHE_ALIAS]
+
+
+def draft_key(note_id):
+    return f'{DRAFT_PREFIX}:{note_id}'
+
+
+def flush_key(note_id):
+    return f'{DRAFT_PREFIX}:{note_id}:flushed'
+
+
+def save_draft(note, title, text, revision, flush=False):
+    """
+    Запоминает черновик; возвращает True, если он записан в базу.
+
+    Метка flush_key живёт NOTES_DRAFT_FLUSH_INTERVAL секунд и отмечает
+    открытое окно. Если метки уже нет, а в кэше лежит незаписанный
+    черновик прошлого окна, он записывается вместе с новой правкой.
+    """
+    cache = get_cache()
+    previous = cache.get(draft_key(note.pk))
+    draft = {
+        'title': title,
+        'text': text,
+        'revision': revision,
+        'updated': time.time(),
+        'stored': False,
+    }
+    cache.set(
+        draft_key(note.pk), draft, timeout=settings.NOTES_DRAFT_CACHE_TIMEOUT
+    )
+    opened = cache.add(
+        flush_key(note.pk), True, timeout=settings.NOTES_DRAFT_FLUSH_INTERVAL
+    )
+    pending = previous is not None and not previous['stored']
+    if not flush and not (opened and pending):
+        return False
+    store_draft(note.pk, draft)
+    return True
+
+
+def store_draft(note_id, draft):
+    NoteDraft.objects.update_or_create(note_id=note_id, defaults={
+        'title': draft['title'],
+        'text': draft['text'],
+        'revision': draft['revision'],
+    })
+    draft['stored'] = True
+    get_cache().set(
+        draft_key(note_id), draft, timeout=settings.NOTES_DRAFT_CACHE_TIMEOUT
+    )
+
+
+def get_draft(note):
+    """
+    Последний черновик заметки из кэша или из базы, если он не устарел.
+
+    Незаписанный черновик закончившегося окна записывается здесь.
+    """
+    cache = get_cache()
+    draft = cache.get(draft_key(note.pk))
+    if draft is not None and not draft['stored'] and cache.add(
+        flush_key(note.pk), True, timeout=settings.NOTES_DRAFT_FLUSH_INTERVAL
+    ):
+        store_draft(note.pk, draft)
+    if draft is None:
+        stored = NoteDraft.objects.filter(note=note).first()
+        if stored is None:
+            return None
+        draft = {
+            'title': stored.title,
+            'text': stored.text,
+            'revision': stored.revision,
+            'updated': stored.updated.timestamp(),
+            'stored': True,
+        }
+    if draft['revision'] < last_revision_number(note):
+        return None
+    return draft
+
+
+def discard_draft(note):
+    get_cache().delete_many((draft_key(note.pk), flush_key(note.pk)))
+    NoteDraft.objects.filter(note=note).delete()
@@ -0,0 +1,112 @@
+"""
+Текстовое поле со сжатием больших значений.
+
+Значения длиннее NOTES_TEXT_COMPRESS_THRESHOLD хранятся в той же
+текстовой колонке как MARKER + base85(zlib(текст)). Из базы такое
+значение приходит обёрнутым в CompressedValue и распаковывается только
+при первом обращении к атрибуту модели. values()/values_list() отдают
+CompressedValue как есть.
+"""
+import zlib
+from base64 import b85decode, b85encode
+
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+MARKER = '\x01zlib\x01'
+
+
+class CompressedValue:
+    """Сжатое значение в том виде, в каком оно лежит в базе."""
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def decompress(self):
+        return decompress_text(self.raw)
+
+    def __eq__(self, other):
+        return isinstance(other, CompressedValue) and other.raw == self.raw
+
+    def __repr__(self):
+        return f'<CompressedValue: {len(self.raw)} chars>'
+
+
+def compress_text(text):
+    """
+    Сжимает текст, если он длиннее порога и сжатие действительно помогает.
+
+    Текст, который сам начинается с MARKER, сжимается всегда, чтобы
+    прочтение значения из базы оставалось однозначным.
+    """
+    forced = text.startswith(MARKER)
+    if len(text) < settings.NOTES_TEXT_COMPRESS_THRESHOLD and not forced:
+        return text
+    packed = zlib.compress(text.encode(), settings.NOTES_TEXT_COMPRESS_LEVEL)
+    compressed = MARKER + b85encode(packed).decode('ascii')
+    if len(compressed) >= len(text) and not forced:
+        return text
+    return compressed
+
+
+def decompress_text(raw):
+    return zlib.decompress(b85decode(raw[len(MARKER):])).decode()
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """
+    Распаковывает значение при первом чтении и запоминает результат.
+
+    В отличие от DeferredAttribute это data-дескриптор: иначе значение из
+    instance.__dict__ возвращалось бы в обход __get__.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedValue):
+            value = value.decompress()
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    descriptor_class = CompressedTextDescriptor
+
+    def from_db_value(self, value, expression, connection):
+        if value is not None and value.startswith(MARKER):
+            return CompressedValue(value)
+        return value
+
+    def to_python(self, value):
+        if isinstance(value, CompressedValue):
+            return value.decompress()
+        return super().to_python(value)
+
+    def pre_save(self, model_instance, add):
+        # Нетронутое сжатое значение уходит в базу как есть, без
+        # распаковки и повторного сжатия.
+        value = model_instance.__dict__.get(self.attname)
+        if isinstance(value, CompressedValue):
+            return value
+        return super().pre_save(model_instance, add)
+
+    def get_prep_value(self, value):
+        if isinstance(value, CompressedValue):
+            return value.raw
+        return super().get_prep_value(value)
+
+    def get_db_prep_save(self, value, connection):
+        # Сжимаем только записываемые значения, а не аргументы фильтров.
+        if isinstance(value, CompressedValue):
+            return value.raw
+        value = super().get_db_prep_save(value, connection)
+        if value is None:
+            return None
+        return compress_text(value)
@@ -1,29 +1,54 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
 from .models import Note
+from .tags import parse_tags, set_note_tags
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
+MAX_TAGS = 20
 
 
 class NoteForm(forms.ModelForm):
     """Форма для создания или обновления заметки."""
+    tags = forms.CharField(
+        label='Теги',
+        required=False,
+        help_text='Перечислите теги через запятую',
+    )
 
     class Meta:
         model = Note
         fields = ('title', 'text', 'slug')
 
-    def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
-        return slug
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.is_bound and self.instance.pk:
+            self.initial['tags'] = ', '.join(
+                self.instance.tags.values_list('name', flat=True)
+            )
+
+    def clean_tags(self):
+        tags = parse_tags(self.cleaned_data['tags'])
+        if len(tags) > MAX_TAGS:
+            raise ValidationError(f'Не больше {MAX_TAGS} тегов у заметки.')
+        return tags
+
+    def _save_m2m(self):
+        """Теги меняются, только если поле пришло в данных формы."""
+        super()._save_m2m()
+        if 'tags' in self.data:
+            set_note_tags(self.instance, self.cleaned_data['tags'])
+
+    def validate_unique(self):
+        """
+        Уникальность slug проверяется ограничением в базе при сохранении.
+
+        Пустой slug подбирает Note.save, а занятый явно заданный slug
+        превращается в ошибку формы во view.
+        """
+        exclude = self._get_validation_exclusions()
+        exclude.append('slug')
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self._update_errors(error)
@@ -0,0 +1,76 @@
+"""
+ASGI-обработчик, который собирает потоковые ответы вне цикла событий.
+
+Django 3.2 перебирает StreamingHttpResponse прямо в цикле событий, и
+генератор, читающий заметки через iterator(), падает с
+SynchronousOnlyOperation уже после отправки заголовков: клиент получает
+обрезанный ответ со статусом 200. Здесь каждая порция ответа
+собирается в потоке через sync_to_async.
+"""
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+
+# Сколько байт ответа собирать в потоке за один переход.
+PART_SIZE = 64 * 1024
+
+
+def next_parts(iterator, size=PART_SIZE):
+    """Следующие части ответа общим размером от size байт или остаток."""
+    parts = []
+    total = 0
+    for part in iterator:
+        parts.append(part)
+        total += len(part)
+        if total >= size:
+            break
+    return parts
+
+
+class NotesASGIHandler(ASGIHandler):
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': self.response_headers(response),
+        })
+        iterator = iter(response)
+        while True:
+            parts = await sync_to_async(
+                next_parts, thread_sensitive=True
+            )(iterator)
+            if not parts:
+                break
+            for part in parts:
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+    def response_headers(self, response):
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            headers.append((
+                b'Set-Cookie',
+                cookie.output(header='').encode('ascii').strip(),
+            ))
+        return headers
+
+
+def get_asgi_application():
+    """Аналог django.core.asgi.get_asgi_application с NotesASGIHandler."""
+    django.setup(set_prefix=False)
+    return NotesASGIHandler()
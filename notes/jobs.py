@@ -0,0 +1,152 @@
+"""
+Очередь фоновых задач без внешнего брокера.
+
+Задачи хранятся в модели Job. Воркер забирает готовую задачу условным
+UPDATE: выигрывает только один из конкурентов, поэтому очередь работает
+и на SQLite, и на PostgreSQL, где кандидаты дополнительно выбираются с
+SKIP LOCKED. Взятая задача невидима NOTES_JOB_VISIBILITY_TIMEOUT секунд;
+упавшая повторяется с растущей задержкой, пока не кончатся попытки.
+Завершённые задачи хранятся NOTES_JOB_RETENTION секунд.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('notes.jobs')
+
+TASKS = {}
+
+TIMED_OUT = 'Задача не завершилась за отведённое время.'
+
+
+def task(name):
+    """Регистрирует функцию как задачу; функция получает объект Job."""
+    def register(function):
+        TASKS[name] = function
+        return function
+    return register
+
+
+def enqueue(name, payload=None, user=None, delay=0, max_attempts=None):
+    if name not in TASKS:
+        raise ValueError(f'Неизвестная задача: {name}.')
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        user=user,
+        available_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.NOTES_JOB_MAX_ATTEMPTS,
+    )
+
+
+def retry_delay(attempts):
+    return settings.NOTES_JOB_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def expire_stale(now):
+    """Задачи, у которых истекло время и не осталось попыток, — ошибка."""
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        available_at__lte=now,
+        attempts__gte=F('max_attempts'),
+    ).update(status=Job.FAILED, error=TIMED_OUT, finished=now)
+
+
+def purge_finished(now=None):
+    """Удаляет задачи, завершённые раньше NOTES_JOB_RETENTION секунд назад."""
+    now = now or timezone.now()
+    old = Job.objects.filter(
+        status__in=(Job.DONE, Job.FAILED),
+        finished__lt=now - timedelta(seconds=settings.NOTES_JOB_RETENTION),
+    )
+    # Вместе с задачей удаляется и её файл, например выгрузка.
+    for result in old.values_list('result', flat=True).iterator():
+        if isinstance(result, dict) and result.get('file'):
+            default_storage.delete(result['file'])
+    return old.delete()[0]
+
+
+def claim(worker):
+    """Забирает одну готовую задачу или возвращает None."""
+    now = timezone.now()
+    expire_stale(now)
+    ready = Job.objects.filter(
+        Q(status=Job.QUEUED) | Q(status=Job.RUNNING),
+        available_at__lte=now,
+        attempts__lt=F('max_attempts'),
+    )
+    with transaction.atomic():
+        candidates = ready.order_by('available_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        for job_id in candidates.values_list('id', flat=True)[:5]:
+            claimed = ready.filter(id=job_id).update(
+                status=Job.RUNNING,
+                attempts=F('attempts') + 1,
+                worker=worker,
+                available_at=now + timedelta(
+                    seconds=settings.NOTES_JOB_VISIBILITY_TIMEOUT
+                ),
+            )
+            if claimed:
+                return Job.objects.get(id=job_id)
+    return None
+
+
+def finish(job, **fields):
+    """
+    Записывает итог, только если задача всё ещё за этим воркером.
+
+    Задачу, которую после истечения таймаута забрал другой воркер,
+    опоздавший результат не перезаписывает.
+    """
+    return Job.objects.filter(
+        id=job.id, worker=job.worker, attempts=job.attempts,
+        status=Job.RUNNING,
+    ).update(**fields)
+
+
+def run(job):
+    function = TASKS.get(job.name)
+    try:
+        if function is None:
+            raise LookupError(f'Неизвестная задача: {job.name}.')
+        result = function(job)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s упала:\n%s', job, error)
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            finish(
+                job,
+                status=Job.QUEUED,
+                error=error,
+                available_at=now + timedelta(
+                    seconds=retry_delay(job.attempts)
+                ),
+            )
+        else:
+            finish(job, status=Job.FAILED, error=error, finished=now)
+        return False
+    finish(job, status=Job.DONE, result=result, finished=timezone.now())
+    return True
+
+
+def run_pending(worker='inline', limit=None):
+    """Выполняет готовые задачи по очереди; возвращает их число."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        run(job)
+        done += 1
+    return done
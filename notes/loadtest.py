@@ -0,0 +1,332 @@
+"""
+Нагрузочное тестирование приложения на одной машине.
+
+Сервер запускается отдельным процессом из yanote/wsgi.py (многопоточный
+wsgiref) или yanote/asgi.py (uvicorn, если установлен) с переменными
+окружения профиля. Клиенты — процессы, каждый из которых регистрирует
+своего пользователя через users:signup, входит через users:login и
+ходит по маршрутам notes: в заданной пропорции.
+"""
+import bisect
+import http.client
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import quote, urlencode, urlsplit
+
+from django.conf import settings
+from django.urls import reverse
+
+PASSWORD = 'loadtest-password-2024'
+USER_PREFIX = 'loadtest'
+SEED_NOTES = 3
+# Границы корзин гистограммы задержек, мс.
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+DEFAULT_MIX = 'list=40,detail=25,home=5,search=10,api_list=10,add=5,edit=5'
+
+
+class HttpSession:
+    """Минимальный HTTP-клиент с cookie, без перехода по редиректам."""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.cookies = {}
+        self.connection = None
+
+    def headers(self, method, data):
+        headers = {}
+        body = None
+        if self.cookies:
+            headers['Cookie'] = '; '.join(
+                f'{key}={value}' for key, value in self.cookies.items()
+            )
+        if method == 'POST':
+            data = dict(data or {})
+            data['csrfmiddlewaretoken'] = self.cookies.get(
+                settings.CSRF_COOKIE_NAME, ''
+            )
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        return headers, body
+
+    def send(self, method, path, body, headers):
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=self.timeout
+                )
+            try:
+                self.connection.request(method, path, body, headers)
+                response = self.connection.getresponse()
+                response.read()
+                return response
+            except (http.client.HTTPException, ConnectionError):
+                # Сервер закрыл соединение между запросами: пробуем снова
+                # на новом.
+                self.close()
+                if attempt:
+                    raise
+
+    def request(self, method, path, data=None):
+        """Возвращает статус ответа; тело читается целиком и отбрасывается."""
+        headers, body = self.headers(method, data)
+        response = self.send(method, path, body, headers)
+        for header in response.headers.get_all('Set-Cookie') or ():
+            for key, morsel in SimpleCookie(header).items():
+                self.cookies[key] = morsel.value
+        if response.will_close:
+            self.close()
+        return response.status
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def signup_and_login(session, username):
+    signup = reverse('users:signup')
+    session.request('GET', signup)
+    status = session.request('POST', signup, {
+        'username': username,
+        'password1': PASSWORD,
+        'password2': PASSWORD,
+    })
+    if status != 302:
+        raise RuntimeError(f'Регистрация {username}: ответ {status}.')
+    login = reverse('users:login')
+    session.request('GET', login)
+    status = session.request('POST', login, {
+        'username': username, 'password': PASSWORD,
+    })
+    if status != 302:
+        raise RuntimeError(f'Вход {username}: ответ {status}.')
+
+
+class VirtualUser:
+    """Пользователь с сессией и своими заметками."""
+
+    def __init__(self, session, name):
+        self.session = session
+        self.name = name
+        self.slugs = []
+        self.counter = 0
+
+    def add_note(self):
+        self.counter += 1
+        slug = f'{self.name}-{self.counter}'
+        status = self.session.request('POST', reverse('notes:add'), {
+            'title': f'Заметка {self.counter}',
+            'text': f'Текст заметки {self.counter} пользователя {self.name}',
+            'slug': slug,
+        })
+        if status == 302:
+            self.slugs.append(slug)
+        return status
+
+    def get(self, name, *args, query=''):
+        return self.session.request('GET', reverse(name, args=args) + query)
+
+    def route_home(self):
+        return self.get('notes:home')
+
+    def route_list(self):
+        return self.get('notes:list')
+
+    def route_async_list(self):
+        return self.get('notes:async_list')
+
+    def route_detail(self):
+        return self.get('notes:detail', random.choice(self.slugs))
+
+    def route_search(self):
+        return self.get('notes:search', query='?q=' + quote('текст'))
+
+    def route_api_list(self):
+        return self.get('notes:api_list')
+
+    def route_login_page(self):
+        return self.get('users:login')
+
+    def route_add(self):
+        return self.add_note()
+
+    def route_edit(self):
+        slug = random.choice(self.slugs)
+        return self.session.request(
+            'POST', reverse('notes:edit', args=(slug,)), {
+                'title': f'Правка {time.time_ns()}',
+                'text': f'Новый текст заметки {slug}',
+                'slug': slug,
+            }
+        )
+
+
+ROUTES = tuple(
+    name[len('route_'):] for name in vars(VirtualUser)
+    if name.startswith('route_')
+)
+
+
+def parse_mix(value):
+    """'list=40,detail=20' -> {'list': 40, 'detail': 20}."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ROUTES:
+            raise ValueError(
+                f'Неизвестный маршрут {name}; доступны: {", ".join(ROUTES)}.'
+            )
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError('Нужен хотя бы один маршрут с ненулевым весом.')
+    return mix
+
+
+def run_worker(base_url, name, mix, duration):
+    """
+    Один клиентский процесс: вход и запросы в течение duration секунд.
+
+    Возвращает {маршрут: {'latencies': [...], 'errors': N}}.
+    """
+    random.seed(name)
+    session = HttpSession(base_url)
+    signup_and_login(session, name)
+    user = VirtualUser(session, name)
+    statuses = [user.add_note() for _ in range(SEED_NOTES)]
+    if not user.slugs:
+        session.close()
+        raise RuntimeError(
+            f'{name}: не создано ни одной заметки, ответы {statuses}.'
+        )
+    routes, weights = zip(*mix.items())
+    results = {route: {'latencies': [], 'errors': 0} for route in routes}
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        route = random.choices(routes, weights)[0]
+        started = time.perf_counter()
+        try:
+            status = getattr(user, f'route_{route}')()
+        except (OSError, http.client.HTTPException):
+            status = None
+        elapsed = (time.perf_counter() - started) * 1000
+        results[route]['latencies'].append(elapsed)
+        if status is None or status >= 400:
+            results[route]['errors'] += 1
+    session.close()
+    return results
+
+
+def histogram(latencies):
+    counts = [0] * (len(BUCKETS) + 1)
+    for latency in latencies:
+        counts[bisect.bisect_left(BUCKETS, latency)] += 1
+    labels = [f'<={bucket}' for bucket in BUCKETS] + [f'>{BUCKETS[-1]}']
+    return dict(zip(labels, counts))
+
+
+def summarize(worker_results, elapsed):
+    routes = {}
+    for result in worker_results:
+        for route, data in result.items():
+            merged = routes.setdefault(route, {'latencies': [], 'errors': 0})
+            merged['latencies'].extend(data['latencies'])
+            merged['errors'] += data['errors']
+    report = {'seconds': round(elapsed, 3), 'routes': {}}
+    every = []
+    errors = 0
+    for route, data in sorted(routes.items()):
+        latencies = data['latencies']
+        every.extend(latencies)
+        errors += data['errors']
+        report['routes'][route] = describe(latencies, data['errors'], elapsed)
+    report['total'] = describe(every, errors, elapsed)
+    return report
+
+
+def describe(latencies, errors, elapsed):
+    if not latencies:
+        return {'requests': 0, 'errors': errors}
+    ordered = sorted(latencies)
+    percentiles = (
+        statistics.quantiles(ordered, n=100, method='inclusive')
+        if len(ordered) > 1 else ordered * 99
+    )
+    return {
+        'requests': len(ordered),
+        'rps': round(len(ordered) / elapsed, 1),
+        'errors': errors,
+        'error_rate': round(errors / len(ordered), 4),
+        'p50_ms': round(percentiles[49], 2),
+        'p90_ms': round(percentiles[89], 2),
+        'p99_ms': round(percentiles[98], 2),
+        'max_ms': round(ordered[-1], 2),
+        'histogram': histogram(ordered),
+    }
+
+
+def free_port(host):
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def start_server(server, host, port, environ):
+    """Запускает сервер отдельным процессом с заданным окружением."""
+    env = {**os.environ, **environ}
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'django', 'loadtest', '--serve-only',
+            '--server', server, '--host', host, '--port', str(port),
+        ],
+        env=env,
+        cwd=settings.BASE_DIR,
+    )
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Сервер завершился при запуске.')
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('Сервер не начал принимать соединения.')
+
+
+def serve(server, host, port):
+    if server == 'asgi':
+        import uvicorn
+        uvicorn.run(
+            'yanote.asgi:application', host=host, port=port,
+            log_level='warning', lifespan='off',
+        )
+        return
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import (WSGIRequestHandler, WSGIServer,
+                                       make_server)
+
+    from yanote.wsgi import application
+
+    class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    with make_server(
+        host, port, application,
+        server_class=ThreadingWSGIServer, handler_class=QuietHandler,
+    ) as httpd:
+        httpd.serve_forever()
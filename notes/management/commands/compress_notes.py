@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from notes.compression import BATCH_SIZE, compress_existing
+from notes.models import Note, NoteRevision
+
+
+class Command(BaseCommand):
+    help = (
+        'Сжимает тексты заметок и данные их версий длиннее '
+        'NOTES_TEXT_COMPRESS_THRESHOLD и выводит отчёт о сэкономленном месте.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, batch_size=BATCH_SIZE, **options):
+        report = compress_existing(Note, batch_size, NoteRevision)
+        self.stdout.write(self.style.SUCCESS(str(report)))
@@ -0,0 +1,48 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.export import EXPORT_FORMATS, export_stream
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает заметки пользователя в NDJSON, CSV или ZIP.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Имя пользователя; без него выгружаются все заметки.',
+        )
+        parser.add_argument(
+            '--format',
+            dest='export_format',
+            choices=tuple(EXPORT_FORMATS),
+            default='ndjson',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки; по умолчанию stdout.',
+        )
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, user=None, export_format='ndjson', output=None,
+               chunk_size=None, **options):
+        queryset = Note.objects.all()
+        if user is not None:
+            try:
+                author = get_user_model().objects.get(username=user)
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'Пользователь {user} не найден.')
+            queryset = queryset.filter(author=author)
+        stream = export_stream(queryset, export_format, chunk_size)
+        if output is None:
+            self.write_stream(stream, sys.stdout.buffer)
+            return
+        with open(output, 'wb') as file:
+            self.write_stream(stream, file)
+
+    def write_stream(self, stream, file):
+        for chunk in stream:
+            file.write(chunk)
@@ -0,0 +1,181 @@
+import csv
+import io
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_slug
+from django.db import transaction
+
+from notes.models import Note
+from notes.slugs import assign_slugs, base_slug
+
+FORMATS = ('ndjson', 'csv')
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает заметки из NDJSON или CSV пачками через '
+        'bulk_create. Каждая пачка коммитится отдельно, а номер последней '
+        'загруженной строки пишется в файл контрольной точки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с заметками или "-" для stdin.')
+        parser.add_argument('--user', required=True, help='Автор заметок.')
+        parser.add_argument(
+            '--format',
+            dest='import_format',
+            choices=FORMATS,
+            help='Формат файла; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки для продолжения прерванной загрузки.',
+        )
+
+    def handle(self, *args, path, user, import_format=None, batch_size=1000,
+               checkpoint=None, **options):
+        try:
+            self.author = get_user_model().objects.get(username=user)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'Пользователь {user} не найден.')
+        import_format = import_format or self.guess_format(path)
+        self.max_title_length = Note._meta.get_field('title').max_length
+        self.max_slug_length = Note._meta.get_field('slug').max_length
+        self.taken = set()
+        done = self.read_checkpoint(checkpoint)
+        imported = skipped = 0
+        started = time.monotonic()
+        with self.open(path) as file:
+            rows = islice(self.read_rows(file, import_format), done, None)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                notes = self.build_notes(batch, done + 1)
+                with transaction.atomic():
+                    self.allocate_slugs(notes)
+                    Note.objects.bulk_create(notes)
+                done += len(batch)
+                imported += len(notes)
+                skipped += len(batch) - len(notes)
+                self.write_checkpoint(checkpoint, done)
+                self.report(imported, started)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено заметок: {imported}, пропущено строк: {skipped}.'
+        ))
+
+    def guess_format(self, path):
+        extension = os.path.splitext(path)[1].lstrip('.').lower()
+        if extension in ('json', 'jsonl'):
+            return 'ndjson'
+        if extension not in FORMATS:
+            raise CommandError('Укажите формат файла через --format.')
+        return extension
+
+    def open(self, path):
+        if path == '-':
+            return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        return open(path, encoding='utf-8', newline='')
+
+    def read_rows(self, file, import_format):
+        if import_format == 'csv':
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row if isinstance(row, dict) else None
+
+    def build_notes(self, batch, first_number):
+        """Заметки из строк пачки; ошибки пишутся с номером строки."""
+        notes = []
+        for number, row in enumerate(batch, first_number):
+            try:
+                notes.append(self.build_note(row))
+            except ValidationError as error:
+                self.stderr.write(f'Строка {number}: {" ".join(error)}')
+        return notes
+
+    def validate_row(self, row):
+        if row is None:
+            raise ValidationError('ожидается JSON-объект.')
+        for field in ('title', 'text', 'slug'):
+            if not isinstance(row.get(field) or '', str):
+                raise ValidationError(f'поле {field} должно быть строкой.')
+        if not row.get('text'):
+            raise ValidationError('нет текста заметки.')
+        slug = row.get('slug')
+        if slug:
+            if len(slug) > self.max_slug_length:
+                raise ValidationError(
+                    f'slug длиннее {self.max_slug_length} символов.'
+                )
+            validate_slug(slug)
+
+    def build_note(self, row):
+        self.validate_row(row)
+        text = row['text']
+        return Note(
+            title=(row.get('title') or '')[:self.max_title_length]
+            or Note._meta.get_field('title').default,
+            text=text,
+            slug=row.get('slug') or '',
+            author=self.author,
+        )
+
+    def allocate_slugs(self, notes):
+        """
+        Подбирает slug всей пачке за один запрос к базе.
+
+        Уже выданные в этой загрузке slug помнятся в self.taken, а из
+        базы читаются только совпадения с кандидатами текущей пачки.
+        Явно заданный, но занятый slug заменяется сгенерированным.
+        """
+        candidates = {
+            note.slug or base_slug(note.title, self.max_slug_length)
+            for note in notes
+        }
+        self.taken.update(
+            Note.objects.filter(slug__in=candidates - self.taken)
+            .values_list('slug', flat=True)
+        )
+        auto_slug = []
+        for note in notes:
+            if note.slug and note.slug not in self.taken:
+                self.taken.add(note.slug)
+            else:
+                auto_slug.append(note)
+        assign_slugs(auto_slug, self.taken, self.max_slug_length)
+
+    def read_checkpoint(self, checkpoint):
+        if checkpoint is None or not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint, encoding='utf-8') as file:
+            return json.load(file)['rows']
+
+    def write_checkpoint(self, checkpoint, rows):
+        if checkpoint is None:
+            return
+        temporary = f'{checkpoint}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump({'rows': rows}, file)
+        os.replace(temporary, checkpoint)
+
+    def report(self, imported, started):
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(
+            f'Загружено {imported} заметок ({rate:.0f} строк/с).'
+        )
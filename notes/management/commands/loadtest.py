@@ -0,0 +1,152 @@
+import json
+import time
+from importlib.util import find_spec
+from multiprocessing import Pool
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from notes import loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест: поднимает сервер из yanote/wsgi.py или '
+        'yanote/asgi.py и гоняет по нему --workers клиентских процессов, '
+        'затем печатает пропускную способность, задержки и долю ошибок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--server', choices=('wsgi', 'asgi'), default='wsgi',
+            help='asgi требует установленного uvicorn.',
+        )
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=0)
+        parser.add_argument(
+            '--url', help='Адрес уже запущенного сервера вместо своего.',
+        )
+        parser.add_argument(
+            '--env', action='append', default=[], metavar='KEY=VALUE',
+            help='Переменная окружения сервера, например профиль настроек.',
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--duration', type=float, default=10, help='Секунд на клиента.',
+        )
+        parser.add_argument(
+            '--mix', default=loadtest.DEFAULT_MIX,
+            help=f'Веса маршрутов: {", ".join(loadtest.ROUTES)}.',
+        )
+        parser.add_argument('--json', dest='json_path')
+        parser.add_argument(
+            '--cleanup', action='store_true',
+            help='Удалить созданных тестом пользователей и их заметки.',
+        )
+        parser.add_argument(
+            '--serve-only', action='store_true', help='Только сервер.',
+        )
+
+    def handle(self, *args, **options):
+        if options['serve_only']:
+            self.serve(options)
+            return
+        try:
+            mix = loadtest.parse_mix(options['mix'])
+        except ValueError as error:
+            raise CommandError(error)
+        environ = dict(self.parse_env(item) for item in options['env'])
+        server = None
+        base_url = options['url']
+        if base_url is None:
+            server, base_url = self.start_server(options, environ)
+        run = f'{loadtest.USER_PREFIX}-{int(time.time())}'
+        try:
+            report = self.attack(base_url, run, mix, options)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+        report.update(
+            server=options['server'], url=base_url, env=environ,
+            workers=options['workers'], mix=mix,
+        )
+        self.print_report(report)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['cleanup']:
+            deleted, _ = get_user_model().objects.filter(
+                username__startswith=f'{run}-'
+            ).delete()
+            self.stdout.write(f'Удалено объектов: {deleted}')
+
+    def start_server(self, options, environ):
+        if options['server'] == 'asgi' and find_spec('uvicorn') is None:
+            raise CommandError('Для --server asgi нужен пакет uvicorn.')
+        port = options['port'] or loadtest.free_port(options['host'])
+        try:
+            server = loadtest.start_server(
+                options['server'], options['host'], port, environ
+            )
+        except RuntimeError as error:
+            raise CommandError(error)
+        return server, f'http://{options["host"]}:{port}'
+
+    def serve(self, options):
+        try:
+            loadtest.serve(options['server'], options['host'], options['port'])
+        except ImportError:
+            raise CommandError('Для --server asgi нужен пакет uvicorn.')
+        except KeyboardInterrupt:
+            pass
+
+    def parse_env(self, item):
+        key, separator, value = item.partition('=')
+        if not separator:
+            raise CommandError(f'Ожидается KEY=VALUE, получено: {item}')
+        return key, value
+
+    def attack(self, base_url, run, mix, options):
+        # Подключения к базе не должны достаться дочерним процессам.
+        connections.close_all()
+        arguments = [
+            (base_url, f'{run}-{number}', mix, options['duration'])
+            for number in range(options['workers'])
+        ]
+        started = time.perf_counter()
+        with Pool(options['workers']) as pool:
+            try:
+                results = pool.starmap(loadtest.run_worker, arguments)
+            except RuntimeError as error:
+                raise CommandError(error)
+        return loadtest.summarize(results, time.perf_counter() - started)
+
+    def print_report(self, report):
+        total = report['total']
+        self.stdout.write(
+            f'{report["server"]} {report["url"]}: {report["workers"]} '
+            f'клиентов, {report["seconds"]} с'
+        )
+        self.stdout.write(
+            f'{"маршрут":<12}{"запросов":>10}{"rps":>9}{"ошибки":>9}'
+            f'{"p50":>9}{"p90":>9}{"p99":>9}{"max":>9}'
+        )
+        for route, stats in [*report['routes'].items(), ('всего', total)]:
+            if not stats['requests']:
+                continue
+            self.stdout.write(
+                f'{route:<12}{stats["requests"]:>10}{stats["rps"]:>9}'
+                f'{stats["error_rate"]:>9.2%}{stats["p50_ms"]:>9}'
+                f'{stats["p90_ms"]:>9}{stats["p99_ms"]:>9}'
+                f'{stats["max_ms"]:>9}'
+            )
+        if not total['requests']:
+            return
+        self.stdout.write('Задержки, мс:')
+        histogram = total['histogram']
+        widest = max(histogram.values())
+        for label, count in histogram.items():
+            bar = '#' * round(40 * count / widest) if widest else ''
+            self.stdout.write(f'{label:>7} {count:>8} {bar}')
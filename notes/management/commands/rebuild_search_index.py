@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from notes.models import Note, SearchDocument
+from notes.search import get_checksum, index_note
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет поисковый индекс заметок. По умолчанию переиндексируются '
+        'только изменившиеся и ещё не проиндексированные заметки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Удалить индекс и построить его заново.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько заметок читать из базы за один запрос.',
+        )
+
+    def handle(self, *args, full=False, batch_size=500, **options):
+        if full:
+            SearchDocument.objects.all().delete()
+        total = updated = 0
+        batch = []
+        notes = Note.objects.only('id', 'author_id', 'title', 'text')
+        for note in notes.order_by('id').iterator(chunk_size=batch_size):
+            batch.append(note)
+            if len(batch) == batch_size:
+                updated += self.index_batch(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            updated += self.index_batch(batch)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено заметок: {total}, переиндексировано: {updated}.'
+        ))
+
+    def index_batch(self, notes):
+        documents = SearchDocument.objects.in_bulk(
+            [note.id for note in notes]
+        )
+        updated = 0
+        for note in notes:
+            document = documents.get(note.id)
+            checksum = get_checksum(note)
+            if index_note(note, checksum=checksum, document=document):
+                updated += 1
+        return updated
@@ -0,0 +1,41 @@
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from notes.stats import recompute_chunk, user_id_ranges
+
+
+def recompute(bounds):
+    try:
+        return recompute_chunk(*bounds)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает статистику заметок пользователей и исправляет '
+        'расхождения. Пользователи делятся на пачки по --chunk-size, '
+        'пачки обрабатываются в --processes процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.NOTES_STATS_CHUNK_SIZE
+        )
+
+    def handle(self, *args, processes=1, chunk_size=None, **options):
+        chunks = list(user_id_ranges(chunk_size))
+        if processes == 1:
+            fixed = sum(recompute_chunk(*bounds) for bounds in chunks)
+        else:
+            # Подключения к базе не должны достаться дочерним процессам.
+            connections.close_all()
+            with Pool(processes) as pool:
+                fixed = sum(pool.imap_unordered(recompute, chunks))
+        self.stdout.write(
+            f'Проверено пачек: {len(chunks)}, исправлено строк: {fixed}.'
+        )
@@ -0,0 +1,100 @@
+import os
+import signal
+import socket
+import threading
+import time
+from multiprocessing import Process
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connections
+
+from notes.jobs import claim, purge_finished, run
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает воркеры очереди фоновых задач: --processes процессов '
+        'по --threads потоков в каждом.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--threads', type=int, default=1)
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Завершиться, когда в очереди не останется готовых задач.',
+        )
+
+    def handle(self, *args, processes=1, threads=1, burst=False, **options):
+        if processes == 1:
+            self.work(threads, burst)
+            return
+        # Подключения к базе не должны достаться дочерним процессам.
+        connections.close_all()
+        children = [
+            Process(target=self.work, args=(threads, burst))
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
+                child.join()
+
+    def work(self, threads, burst):
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        workers = [
+            threading.Thread(
+                target=self.loop, args=(f'{prefix}:{number}', stop, burst)
+            )
+            for number in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+    def loop(self, name, stop, burst):
+        next_purge = 0
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                try:
+                    if time.monotonic() >= next_purge:
+                        purge_finished()
+                        next_purge = (
+                            time.monotonic()
+                            + settings.NOTES_JOB_PURGE_INTERVAL
+                        )
+                    job = claim(name)
+                    if job is not None:
+                        self.stdout.write(f'{name}: {job}')
+                        ok = run(job)
+                        self.stdout.write(
+                            f'{name}: {job} {"ok" if ok else "ошибка"}'
+                        )
+                except DatabaseError as error:
+                    # Например, SQLite занят другим писателем. Задача, итог
+                    # которой не записался, вернётся в очередь по таймауту.
+                    self.stderr.write(f'{name}: {error}')
+                    stop.wait(settings.NOTES_JOB_POLL_INTERVAL)
+                    continue
+                if job is None:
+                    if burst:
+                        break
+                    stop.wait(settings.NOTES_JOB_POLL_INTERVAL)
+        finally:
+            connections.close_all()
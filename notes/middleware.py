@@ -0,0 +1,297 @@
+import asyncio
+import heapq
+import json
+import logging
+import zlib
+from contextvars import ContextVar
+from itertools import count
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.cache import patch_vary_headers
+
+from .static_server import parse_accept_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('notes.timing')
+
+
+class RequestStats:
+    """Метрики одного запроса: SQL, шаблоны и общее время."""
+
+    def __init__(self, slowest_limit):
+        self.query_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.slowest_limit = slowest_limit
+        self.slowest = []
+        self.order = count()
+        self.rendering = False
+
+    def record_query(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (perf_counter() - started) * 1000
+            self.query_count += 1
+            self.sql_ms += duration
+            item = (duration, next(self.order), sql)
+            if len(self.slowest) < self.slowest_limit:
+                heapq.heappush(self.slowest, item)
+            else:
+                heapq.heappushpop(self.slowest, item)
+
+    def slowest_queries(self):
+        return [
+            {'ms': round(duration, 3), 'sql': sql}
+            for duration, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+
+class AsyncCapableMiddleware:
+    """
+    Основа middleware, которое работает и в синхронной, и в асинхронной
+    цепочке.
+
+    Синхронное middleware под ASGI Django оборачивает в
+    sync_to_async(thread_sensitive=True), и все запросы выстраиваются в
+    очередь к одному потоку. Подклассы определяют handle и ahandle; выбор
+    между ними сделан так же, как в MiddlewareMixin Django 3.2.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Пометка, по которой Django считает экземпляр корутиной.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.ahandle(request)
+        return self.handle(request)
+
+
+current_stats = ContextVar('current_stats', default=None)
+
+
+def record_current_query(execute, sql, params, many, context):
+    """Обёртка подключений: пишет запрос в метрики текущего запроса."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats.record_query(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_current_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_current_query)
+
+
+class RequestTimingMiddleware(AsyncCapableMiddleware):
+    """
+    Показывает, на что уходит время запроса.
+
+    Считает SQL-запросы по всем подключениям, время отрисовки шаблонов
+    (его записывает бэкенд notes.template_backends) и размер ответа,
+    добавляет их в заголовок Server-Timing и пишет строкой JSON в лог
+    notes.timing. Медленные запросы логируются с WARNING и
+    самыми долгими SQL-выражениями. Включается NOTES_REQUEST_TIMING.
+
+    Метрики запроса лежат в контекстной переменной, поэтому запросы к
+    базе из потоков sync_to_async и пула async_db тоже учитываются.
+    """
+
+    def __init__(self, get_response):
+        if not settings.NOTES_REQUEST_TIMING:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        connection_created.connect(install_query_recorder)
+
+    def start(self, request):
+        for connection in connections.all():
+            install_query_recorder(connection)
+        stats = RequestStats(settings.NOTES_TIMING_SLOWEST_QUERIES)
+        request.timing_stats = stats
+        return stats, current_stats.set(stats), perf_counter()
+
+    def finish(self, request, response, stats, started):
+        total_ms = (perf_counter() - started) * 1000
+        response['Server-Timing'] = ', '.join((
+            f'db;desc="SQL x{stats.query_count}";dur={stats.sql_ms:.2f}',
+            f'tpl;desc="Templates";dur={stats.template_ms:.2f}',
+            f'total;dur={total_ms:.2f}',
+        ))
+        self.log(request, response, stats, total_ms)
+        return response
+
+    def handle(self, request):
+        stats, token, started = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    async def ahandle(self, request):
+        stats, token, started = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    def log(self, request, response, stats, total_ms):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 3),
+            'sql_ms': round(stats.sql_ms, 3),
+            'queries': stats.query_count,
+            'template_ms': round(stats.template_ms, 3),
+            'response_bytes': (
+                None if response.streaming else len(response.content)
+            ),
+        }
+        if total_ms < settings.NOTES_TIMING_SLOW_MS:
+            logger.info(json.dumps(record), extra={'timing': record})
+            return
+        record['slowest_queries'] = stats.slowest_queries()
+        logger.warning(
+            json.dumps(record, ensure_ascii=False), extra={'timing': record}
+        )
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self):
+        # wbits=31: заголовок и контрольная сумма формата gzip.
+        self.compressor = zlib.compressobj(
+            settings.NOTES_COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31
+        )
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(
+            quality=settings.NOTES_COMPRESS_BROTLI_QUALITY
+        )
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def get_encoders():
+    encoders = [GzipEncoder]
+    if brotli is not None:
+        encoders.insert(0, BrotliEncoder)
+    return encoders
+
+
+class CompressionMiddleware(AsyncCapableMiddleware):
+    """
+    Сжимает ответы gzip или brotli, если клиент их принимает.
+
+    Обычные ответы короче NOTES_COMPRESS_MIN_SIZE отдаются как есть.
+    Потоковые сжимаются по частям: вывод компрессора отдаётся клиенту
+    по мере появления, а не реже чем раз в NOTES_COMPRESS_STREAM_FLUSH
+    байт входных данных буфер сбрасывается принудительно. Время сжатия и
+    сэкономленные байты попадают в заголовок Server-Timing.
+    """
+
+    def handle(self, request):
+        return self.compress(request, self.get_response(request))
+
+    async def ahandle(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        encoder_class = self.choose_encoder(request, response)
+        if encoder_class is None:
+            return response
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                encoder_class(), response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            started = perf_counter()
+            encoder = encoder_class()
+            content = encoder.compress(response.content) + encoder.finish()
+            duration = (perf_counter() - started) * 1000
+            if len(content) >= len(response.content):
+                return response
+            saved = len(response.content) - len(content)
+            response.content = content
+            response['Content-Length'] = str(len(content))
+            self.add_timing(response, encoder.name, duration, saved)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoder_class.name
+        return response
+
+    def choose_encoder(self, request, response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.has_header('Content-Encoding'):
+            return None
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type not in settings.NOTES_COMPRESS_CONTENT_TYPES:
+            return None
+        if not response.streaming and (
+            len(response.content) < settings.NOTES_COMPRESS_MIN_SIZE
+        ):
+            return None
+        accepted = parse_accept_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        for encoder_class in get_encoders():
+            if encoder_class.name in accepted:
+                return encoder_class
+        return None
+
+    def compress_stream(self, encoder, chunks):
+        pending = 0
+        for chunk in chunks:
+            data = encoder.compress(chunk)
+            pending += len(chunk)
+            if pending >= settings.NOTES_COMPRESS_STREAM_FLUSH:
+                data += encoder.flush()
+                pending = 0
+            if data:
+                yield data
+        yield encoder.finish()
+
+    def add_timing(self, response, encoding, duration, saved):
+        timing = f'compress;desc="{encoding} -{saved}B";dur={duration:.2f}'
+        if response.has_header('Server-Timing'):
+            timing = f'{response["Server-Timing"]}, {timing}'
+        response['Server-Timing'] = timing
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 200
+BATCH_SIZE = 500
+
+
+def fill_excerpts(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    batch = []
+    for note in Note.objects.only('id', 'text').iterator(BATCH_SIZE):
+        note.excerpt = Truncator(' '.join(note.text.split())).chars(
+            EXCERPT_LENGTH
+        )
+        batch.append(note)
+        if len(batch) == BATCH_SIZE:
+            Note.objects.bulk_update(batch, ('excerpt',))
+            batch = []
+    Note.objects.bulk_update(batch, ('excerpt',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=200, verbose_name='Начало текста'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+
+def create_initial_snapshots(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    NoteRevision = apps.get_model('notes', 'NoteRevision')
+    batch = []
+    for note in Note.objects.only('id', 'title', 'text').iterator(BATCH_SIZE):
+        batch.append(NoteRevision(
+            note_id=note.id,
+            number=1,
+            title=note.title,
+            is_snapshot=True,
+            data=note.text,
+        ))
+        if len(batch) == BATCH_SIZE:
+            NoteRevision.objects.bulk_create(batch)
+            batch = []
+    NoteRevision.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер версии')),
+                ('title', models.CharField(max_length=100, verbose_name='Заголовок')),
+                ('is_snapshot', models.BooleanField(default=False)),
+                ('data', models.TextField()),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата изменения')),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='notes.note')),
+            ],
+            options={
+                'ordering': ('-number',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='noterevision',
+            constraint=models.UniqueConstraint(fields=('note', 'number'), name='unique_note_revision'),
+        ),
+        migrations.RunPython(
+            create_initial_snapshots, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:45
+
+import logging
+
+from django.db import migrations
+import notes.fields
+
+logger = logging.getLogger('notes.migrations')
+
+
+def compress_texts(apps, schema_editor):
+    from notes.compression import compress_existing
+    report = compress_existing(apps.get_model('notes', 'Note'))
+    if report.rows:
+        logger.info('%s', report)
+
+
+def decompress_texts(apps, schema_editor):
+    from notes.compression import decompress_existing
+    decompress_existing(apps.get_model('notes', 'Note'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_revisions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='note',
+            name='text',
+            field=notes.fields.CompressedTextField(help_text='Добавьте подробностей', verbose_name='Текст'),
+        ),
+        migrations.RunPython(compress_texts, decompress_texts),
+    ]
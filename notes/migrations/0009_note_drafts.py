@@ -0,0 +1,24 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+import notes.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0008_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteDraft',
+            fields=[
+                ('note', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='draft', serialize=False, to='notes.note')),
+                ('title', models.CharField(max_length=100, verbose_name='Заголовок')),
+                ('text', notes.fields.CompressedTextField(blank=True, verbose_name='Текст')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Сохранён')),
+            ],
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:07
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+
+def fill_stats(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    NoteStats = apps.get_model('notes', 'NoteStats')
+    NoteRevision = apps.get_model('notes', 'NoteRevision')
+    batch = []
+    for note in Note.objects.only('id', 'text').iterator(BATCH_SIZE):
+        note.length = len(note.text)
+        batch.append(note)
+        if len(batch) == BATCH_SIZE:
+            Note.objects.bulk_update(batch, ('length',))
+            batch = []
+    Note.objects.bulk_update(batch, ('length',))
+    rows = Note.objects.values('author_id').annotate(
+        note_count=Count('id'),
+        total_chars=Sum('length'),
+    ).order_by()
+    last_edited = dict(
+        NoteRevision.objects.values('note__author_id').annotate(
+            last=Max('created')
+        ).order_by().values_list('note__author_id', 'last')
+    )
+    NoteStats.objects.bulk_create(
+        [
+            NoteStats(
+                user_id=row['author_id'],
+                note_count=row['note_count'],
+                total_chars=row['total_chars'] or 0,
+                last_edited=last_edited.get(row['author_id']),
+            )
+            for row in rows
+        ],
+        BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0009_note_drafts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='note_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('note_count', models.IntegerField(default=0, verbose_name='Заметок')),
+                ('total_chars', models.BigIntegerField(default=0, verbose_name='Символов')),
+                ('last_edited', models.DateTimeField(blank=True, null=True, verbose_name='Последнее изменение')),
+            ],
+            options={
+                'verbose_name': 'статистика заметок',
+                'verbose_name_plural': 'статистика заметок',
+            },
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='length',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Длина текста'),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0010_note_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term'], name='search_term_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:30
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_revision(apps, schema_editor):
+    # Прежние черновики считаем начатыми с последней версии заметки.
+    NoteDraft = apps.get_model('notes', 'NoteDraft')
+    NoteRevision = apps.get_model('notes', 'NoteRevision')
+    NoteDraft.objects.update(revision=Coalesce(Subquery(
+        NoteRevision.objects.filter(note_id=OuterRef('note_id'))
+        .values('note_id').annotate(last=Max('number')).values('last')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0011_search_term_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notedraft',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, help_text='Номер версии, с которой начата правка.', verbose_name='Версия заметки'),
+        ),
+        migrations.RunPython(fill_revision, migrations.RunPython.noop),
+    ]
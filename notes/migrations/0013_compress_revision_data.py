@@ -0,0 +1,40 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:43
+
+import logging
+
+from django.db import migrations
+import notes.fields
+
+logger = logging.getLogger('notes.migrations')
+
+
+def compress_revisions(apps, schema_editor):
+    # Заметки уже сжаты в 0006; отчёт показывает общий объём с версиями.
+    from notes.compression import compress_existing
+    report = compress_existing(
+        apps.get_model('notes', 'Note'),
+        revision_model=apps.get_model('notes', 'NoteRevision'),
+    )
+    if report.revisions:
+        logger.info('%s', report)
+
+
+def decompress_revisions(apps, schema_editor):
+    from notes.compression import decompress_existing
+    decompress_existing(apps.get_model('notes', 'NoteRevision'), field='data')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0012_note_draft_revision'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='noterevision',
+            name='data',
+            field=notes.fields.CompressedTextField(),
+        ),
+        migrations.RunPython(compress_revisions, decompress_revisions),
+    ]
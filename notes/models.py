@@ -1,7 +1,178 @@
+from collections import defaultdict
+
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import Count, F, Sum
+from django.dispatch import Signal
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from .fields import CompressedTextField
+from .slugs import MAX_ATTEMPTS, assign_slugs, base_slug, candidate_slugs
+
+EXCERPT_LENGTH = 200
+
+# Отправляется после NoteQuerySet.bulk_create с аргументом instances:
+# обычные post_save при массовой вставке не срабатывают.
+post_bulk_create = Signal()
+
+
+def make_excerpt(text):
+    """Короткое превью текста заметки для списков."""
+    return Truncator(' '.join(text.split())).chars(EXCERPT_LENGTH)
+
+
+def decrement_tag_counts(note_tags):
+    """Уменьшает счётчики тегов на число удаляемых связей note_tags."""
+    groups = defaultdict(list)
+    rows = note_tags.values('author_id', 'tag_id').annotate(
+        removed=Count('id')
+    ).order_by()
+    for row in rows:
+        groups[row['author_id'], row['removed']].append(row['tag_id'])
+    for (author_id, removed), tag_ids in groups.items():
+        TagCount.objects.filter(
+            author_id=author_id, tag_id__in=tag_ids
+        ).update(count=F('count') - removed)
+
+
+def increment_tag_counts(author_id, tag_ids):
+    TagCount.objects.bulk_create(
+        [TagCount(author_id=author_id, tag_id=tag_id) for tag_id in tag_ids],
+        ignore_conflicts=True,
+    )
+    TagCount.objects.filter(author_id=author_id, tag_id__in=tag_ids).update(
+        count=F('count') + 1
+    )
+
+
+def move_note_tags(note):
+    """Переносит связи заметки с тегами и их счётчики к её новому автору."""
+    note_tags = NoteTag.objects.filter(note=note)
+    tag_ids = list(note_tags.values_list('tag_id', flat=True))
+    if tag_ids:
+        decrement_tag_counts(note_tags)
+        note_tags.update(author_id=note.author_id)
+        increment_tag_counts(note.author_id, tag_ids)
+
 
-from pytils.translit import slugify
+def change_note_stats(author_id, notes=0, chars=0, edited=None):
+    """
+    Сдвигает счётчики пользователя на notes заметок и chars символов.
+
+    Вызывается в той же транзакции, что и изменение заметок. Строка
+    статистики создаётся при первом изменении.
+    """
+    values = {
+        'note_count': F('note_count') + notes,
+        'total_chars': F('total_chars') + chars,
+    }
+    if edited is not None:
+        values['last_edited'] = edited
+    if NoteStats.objects.filter(user_id=author_id).update(**values):
+        return
+    NoteStats.objects.get_or_create(user_id=author_id)
+    NoteStats.objects.filter(user_id=author_id).update(**values)
+
+
+def subtract_note_stats(notes):
+    """Уменьшает счётчики авторов на удаляемые заметки notes."""
+    rows = notes.values('author_id').annotate(
+        removed=Count('id'), chars=Sum('length')
+    ).order_by()
+    for row in rows:
+        change_note_stats(
+            row['author_id'], -row['removed'], -(row['chars'] or 0)
+        )
+
+
+class NoteQuerySet(models.QuerySet):
+
+    def summary(self):
+        """Только лёгкие поля, нужные спискам заметок, без полного текста."""
+        return self.only('id', 'slug', 'title', 'excerpt')
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
+        """
+        Массовая вставка с заполнением тех же полей, что и в Note.save.
+
+        Недостающие slug подбираются для всей пачки по одному запросу к
+        базе; если параллельная вставка заняла какой-то из них, пачка
+        повторяется с новыми slug. После вставки у объектов гарантированно
+        есть pk и отправляется сигнал post_bulk_create.
+        """
+        objs = list(objs)
+        auto_slug = [obj for obj in objs if not obj.slug]
+        for obj in objs:
+            obj.excerpt = make_excerpt(obj.text)
+            obj.length = len(obj.text)
+        max_slug_length = self.model._meta.get_field('slug').max_length
+        for attempt in range(MAX_ATTEMPTS):
+            taken = set(
+                self.model.objects.filter(slug__in={
+                    base_slug(obj.title, max_slug_length)
+                    for obj in auto_slug
+                }).values_list('slug', flat=True)
+            )
+            taken.update(obj.slug for obj in objs if obj.slug)
+            assign_slugs(auto_slug, taken, max_slug_length)
+            try:
+                with transaction.atomic(using=self._write_db()):
+                    super().bulk_create(objs, batch_size, ignore_conflicts)
+                    # С ignore_conflicts пропущенные строки тоже попадут
+                    # в счётчики; такое расхождение исправляет команда
+                    # recompute_note_stats.
+                    self._add_stats(objs)
+                break
+            except IntegrityError:
+                if not auto_slug or attempt == MAX_ATTEMPTS - 1:
+                    raise
+                if not self.model.objects.using(self._write_db()).filter(
+                    slug__in=[obj.slug for obj in auto_slug]
+                ).exists():
+                    raise
+                for obj in auto_slug:
+                    obj.slug = ''
+        self._fill_pks(objs)
+        post_bulk_create.send(sender=self.model, instances=objs)
+        return objs
+
+    def delete(self):
+        """Удаление заметок вместе с уменьшением счётчиков их и их тегов."""
+        with transaction.atomic(using=self._write_db()):
+            decrement_tag_counts(
+                NoteTag.objects.filter(note__in=self.values('id'))
+            )
+            subtract_note_stats(self)
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def _write_db(self):
+        # self.db до начала записи — база для чтения, то есть реплика.
+        return self._db or router.db_for_write(self.model)
+
+    def _add_stats(self, objs):
+        totals = defaultdict(lambda: [0, 0])
+        for obj in objs:
+            totals[obj.author_id][0] += 1
+            totals[obj.author_id][1] += obj.length
+        edited = timezone.now()
+        for author_id, (notes, chars) in totals.items():
+            change_note_stats(author_id, notes, chars, edited)
+
+    def _fill_pks(self, objs):
+        """Не все базы возвращают id вставленных строк; достаём их по slug."""
+        missing = {obj.slug: obj for obj in objs if obj.pk is None}
+        if not missing:
+            return
+        pks = self.model.objects.filter(slug__in=missing).values_list(
+            'slug', 'pk'
+        )
+        for slug, pk in pks:
+            missing[slug].pk = pk
+            missing[slug]._state.adding = False
 
 
 class Note(models.Model):
@@ -11,7 +182,7 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
@@ -27,12 +198,345 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    excerpt = models.CharField(
+        'Начало текста',
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        editable=False,
+    )
+    length = models.PositiveIntegerField(
+        'Длина текста',
+        default=0,
+        editable=False,
+    )
+    tags = models.ManyToManyField(
+        'Tag',
+        through='NoteTag',
+        related_name='notes',
+        blank=True,
+    )
+
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'id'), name='note_author_id_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Прежние slug и автор нужны, чтобы сбросить кэш старого адреса
+        # заметки и страницы прежнего владельца.
+        instance._loaded_slug = instance.__dict__.get('slug')
+        instance._loaded_author_id = instance.__dict__.get('author_id')
+        return instance
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = make_excerpt(self.text)
+            self.length = len(self.text)
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'excerpt', 'length'
+                }
+        with transaction.atomic():
+            previous = None if self._state.adding else self._previous_stats()
+            self._save_with_slug(*args, **kwargs)
+            self._update_stats(previous)
+            if previous is not None and previous[0] != self.author_id:
+                move_note_tags(self)
+
+    def _save_with_slug(self, *args, **kwargs):
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        for slug in candidate_slugs(self.title, max_slug_length):
+            self.slug = slug
+            try:
+                # Савепоинт позволяет пережить конфликт и попробовать снова
+                # даже внутри внешней транзакции.
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError as error:
+                if not self.slug_is_taken():
+                    raise
+                conflict = error
+        self.slug = ''
+        raise conflict
+
+    def slug_is_taken(self):
+        """
+        Занят ли slug заметки другой заметкой.
+
+        Отличает конфликт slug от прочих IntegrityError; читает основную
+        базу, где конфликт и произошёл.
+        """
+        return type(self).objects.using(
+            router.db_for_write(type(self))
+        ).filter(slug=self.slug).exclude(pk=self.pk).exists()
+
+    def _previous_stats(self):
+        """
+        Автор и длина текста заметки в базе до сохранения.
+
+        Значения загруженного объекта могут устареть, если заметку успели
+        сохранить в другом месте, поэтому строка читается заново и
+        блокируется до конца транзакции.
+        """
+        return type(self).objects.select_for_update().filter(
+            pk=self.pk
+        ).values_list('author_id', 'length').first()
+
+    def _update_stats(self, previous):
+        edited = timezone.now()
+        if previous is None:
+            change_note_stats(self.author_id, 1, self.length, edited)
+        elif previous[0] != self.author_id:
+            change_note_stats(previous[0], -1, -previous[1])
+            change_note_stats(self.author_id, 1, self.length, edited)
+        else:
+            change_note_stats(
+                self.author_id, 0, self.length - previous[1], edited
+            )
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = self._previous_stats()
+            decrement_tag_counts(NoteTag.objects.filter(note=self))
+            if previous is not None:
+                change_note_stats(previous[0], -1, -previous[1])
+            return super().delete(*args, **kwargs)
+
+
+class NoteDraft(models.Model):
+    """Несохранённые изменения заметки из автосохранения формы."""
+    note = models.OneToOneField(
+        Note,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='draft',
+    )
+    title = models.CharField('Заголовок', max_length=100)
+    text = CompressedTextField('Текст', blank=True)
+    revision = models.PositiveIntegerField(
+        'Версия заметки',
+        default=0,
+        help_text='Номер версии, с которой начата правка.',
+    )
+    updated = models.DateTimeField('Сохранён', auto_now=True)
+
+    def __str__(self):
+        return f'Черновик {self.note_id}'
+
+
+class Tag(models.Model):
+    """Тег. Имя хранится нормализованным и общее для всех пользователей."""
+    name = models.CharField('Тег', max_length=50, unique=True)
+
+    class Meta:
+        ordering = ('name',)
+
+    def __str__(self):
+        return self.name
+
+
+class NoteTag(models.Model):
+    """
+    Связь заметки с тегом.
+
+    Автор заметки продублирован, чтобы фильтр по тегу шёл по индексу
+    (author, tag) без соединения с таблицей заметок.
+    """
+    note = models.ForeignKey(
+        Note, on_delete=models.CASCADE, related_name='note_tags'
+    )
+    tag = models.ForeignKey(
+        Tag, on_delete=models.CASCADE, related_name='note_tags'
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'tag'), name='unique_note_tag'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('author', 'tag'), name='notetag_author_tag_idx'
+            ),
+        )
+
+
+class TagCount(models.Model):
+    """Число заметок пользователя с тегом; меняется вместе со связями."""
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tag_counts',
+    )
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField('Заметок', default=0)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('author', 'tag'), name='unique_author_tag_count'
+            ),
+        )
+
+
+class NoteStats(models.Model):
+    """
+    Сводка по заметкам пользователя.
+
+    Счётчики меняются в одной транзакции с заметками, так что домашней
+    странице и админке не нужны агрегаты по всей таблице Note.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='note_stats',
+    )
+    note_count = models.IntegerField('Заметок', default=0)
+    total_chars = models.BigIntegerField('Символов', default=0)
+    last_edited = models.DateTimeField(
+        'Последнее изменение', null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = 'статистика заметок'
+        verbose_name_plural = 'статистика заметок'
+
+    def __str__(self):
+        return f'Статистика {self.user_id}'
+
+
+class SearchDocument(models.Model):
+    """Состояние заметки в поисковом индексе."""
+    note = models.OneToOneField(
+        Note,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+    )
+    checksum = models.CharField(max_length=40)
+
+
+class SearchTerm(models.Model):
+    """Запись инвертированного индекса: слово и его вес в заметке."""
+    document = models.ForeignKey(
+        SearchDocument,
+        on_delete=models.CASCADE,
+        related_name='terms',
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'term'), name='search_author_term_idx'
+            ),
+            # Поиск по заметкам всех пользователей в админке.
+            models.Index(fields=('term',), name='search_term_idx'),
+        )
+
+
+class NoteRevision(models.Model):
+    """
+    Версия заметки.
+
+    Текст хранится либо целиком (снимок), либо дельтой к предыдущей
+    версии; снимок пишется раз в NOTES_REVISION_SNAPSHOT_EVERY версий.
+    Большие снимки и дельты сжимаются так же, как текст заметки.
+    """
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField('Номер версии')
+    title = models.CharField('Заголовок', max_length=100)
+    is_snapshot = models.BooleanField(default=False)
+    data = CompressedTextField()
+    created = models.DateTimeField('Дата изменения', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-number',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'number'), name='unique_note_revision'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.note_id} v{self.number}'
+
+
+class Job(models.Model):
+    """
+    Фоновая задача в очереди на базе данных.
+
+    Взятая воркером задача скрыта от других воркеров до available_at;
+    если воркер не отчитался к этому времени, задачу берёт следующий.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=100)
+    payload = models.JSONField('Параметры', default=dict, blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='jobs',
+    )
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    available_at = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=100, blank=True)
+    result = models.JSONField('Результат', null=True, blank=True)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('status', 'available_at'),
+                name='job_status_available_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
@@ -0,0 +1,94 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.http import Http404
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, pk):
+    """Упаковывает направление и id граничной записи в непрозрачную строку."""
+    raw = f'{direction}:{pk}'.encode()
+    return urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Обратная операция к encode_cursor; для мусора возвращает 404."""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        direction, pk = urlsafe_b64decode(cursor + padding).decode().split(':')
+        pk = int(pk)
+    except (BinasciiError, UnicodeDecodeError, ValueError):
+        raise Http404('Некорректный курсор.')
+    if direction not in (NEXT, PREVIOUS) or pk < 0:
+        raise Http404('Некорректный курсор.')
+    return direction, pk
+
+
+class CursorPage:
+    """Страница выдачи с курсорами на соседние страницы."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset-пагинация по первичному ключу.
+
+    Вместо OFFSET каждая страница выбирается условием id > X (или id < X),
+    поэтому стоимость запроса не зависит от глубины страницы при наличии
+    индекса, начинающегося с полей фильтра и заканчивающегося id.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        direction, pk = decode_cursor(cursor) if cursor else (NEXT, None)
+        if direction == NEXT:
+            queryset = self.queryset.order_by('id')
+            if pk is not None:
+                queryset = queryset.filter(id__gt=pk)
+        else:
+            queryset = self.queryset.order_by('-id').filter(id__lt=pk)
+        # Лишняя запись показывает, есть ли что-то за границей страницы.
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+        if not rows:
+            return CursorPage(rows)
+        if direction == NEXT:
+            has_next, has_previous = has_more, pk is not None
+        else:
+            has_next, has_previous = True, has_more
+        return CursorPage(
+            rows,
+            next_cursor=(
+                encode_cursor(NEXT, rows[-1].id) if has_next else None
+            ),
+            previous_cursor=(
+                encode_cursor(PREVIOUS, rows[0].id) if has_previous else None
+            ),
+        )
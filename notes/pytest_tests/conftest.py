@@ -1,10 +1,16 @@
 import pytest
 
+from django.core.cache import cache
 from django.test.client import Client
 
 from notes.models import Note
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
 @pytest.fixture
 def author(django_user_model):
     return django_user_model.objects.create(username='Автор')
@@ -0,0 +1,115 @@
+import json
+
+from django.contrib.admin import helpers
+from django.contrib.admin.models import DELETION, LogEntry
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from notes.admin import EstimatedCountPaginator
+from notes.models import Note, NoteStats
+
+CHANGELIST = reverse('admin:notes_note_changelist')
+
+
+@pytest.fixture
+def notes(author, not_author):
+    return Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text=f'Текст номер{index}',
+             slug=f'note-{index}', author=(author, not_author)[index % 2])
+        for index in range(6)
+    )
+
+
+@pytest.mark.django_db
+def test_changelist_without_full_count_and_author_queries(admin_client,
+                                                          notes):
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(CHANGELIST)
+    assert response.status_code == 200
+    assert response.context['cl'].result_count == len(notes)
+    sql = [query['sql'] for query in queries.captured_queries]
+    # Авторы приходят в том же запросе, что и заметки; отдельно
+    # загружается только пользователь запроса.
+    assert sum('FROM "auth_user" WHERE' in query for query in sql) == 1
+    assert sum('COUNT(' in query for query in sql) == 1
+
+
+@pytest.mark.django_db
+def test_paginator_uses_estimate(settings, notes):
+    settings.NOTES_ADMIN_COUNT_LIMIT = 3
+    queryset = Note.objects.order_by('id')
+    assert EstimatedCountPaginator(queryset, 2).count == 3
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    assert EstimatedCountPaginator(queryset, 2).count == len(notes)
+    filtered = queryset.filter(slug__startswith='note')
+    assert EstimatedCountPaginator(filtered, 2).count == 3
+
+
+@pytest.mark.django_db
+def test_search_uses_index(admin_client, notes):
+    response = admin_client.get(CHANGELIST, {'q': 'номер3'})
+    assert [note.slug for note in response.context['cl'].result_list] == [
+        'note-3'
+    ]
+    response = admin_client.get(CHANGELIST, {'q': 'note-4'})
+    assert [note.slug for note in response.context['cl'].result_list] == [
+        'note-4'
+    ]
+
+
+@pytest.mark.django_db
+def test_chunked_delete_action(admin_client, settings, author, notes):
+    settings.NOTES_ADMIN_DELETE_CHUNK_SIZE = 2
+    data = {
+        'action': 'delete_selected_in_chunks',
+        'index': 0,
+        helpers.ACTION_CHECKBOX_NAME: [note.pk for note in notes[:5]],
+    }
+    response = admin_client.post(CHANGELIST, data)
+    assert response.status_code == 200
+    assert response.context['count'] == 5
+    assert Note.objects.count() == len(notes)
+    response = admin_client.post(CHANGELIST, {**data, 'post': 'yes'})
+    assert response.status_code == 302
+    assert list(Note.objects.values_list('slug', flat=True)) == ['note-5']
+    assert NoteStats.objects.get(user=author).note_count == 0
+    entries = LogEntry.objects.filter(action_flag=DELETION)
+    assert sorted(entries.values_list('object_repr', flat=True)) == [
+        note.title for note in notes[:5]
+    ]
+
+
+@pytest.mark.django_db
+def test_chunked_delete_confirms_select_across(admin_client, notes):
+    data = {
+        'action': 'delete_selected_in_chunks',
+        'index': 0,
+        'select_across': 1,
+        helpers.ACTION_CHECKBOX_NAME: [notes[0].pk],
+    }
+    response = admin_client.post(CHANGELIST + '?q=note-4', data)
+    assert response.context['count'] == 1
+    # Форма подтверждения повторяет выбор и фильтры списка.
+    content = response.content.decode()
+    assert 'name="select_across" value="1"' in content
+    admin_client.post(CHANGELIST + '?q=note-4', {**data, 'post': 'yes'})
+    assert not Note.objects.filter(slug='note-4').exists()
+    assert Note.objects.count() == len(notes) - 1
+
+
+@pytest.mark.django_db
+def test_export_action_streams(admin_client, notes):
+    response = admin_client.post(CHANGELIST, {
+        'action': 'export_selected',
+        'select_across': 1,
+        helpers.ACTION_CHECKBOX_NAME: [notes[0].pk],
+    })
+    assert response.streaming
+    rows = [
+        json.loads(line)
+        for line in b''.join(response.streaming_content).splitlines()
+    ]
+    assert [row['slug'] for row in rows] == [note.slug for note in notes]
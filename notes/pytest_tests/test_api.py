@@ -0,0 +1,106 @@
+from http import HTTPStatus
+import json
+
+from django.urls import reverse
+import pytest
+
+from notes.models import Note
+from notes.search import search
+
+
+def post_json(client, name, payload):
+    return client.post(
+        reverse(name),
+        data=json.dumps(payload),
+        content_type='application/json',
+    )
+
+
+def test_bulk_create(author_client, author, note):
+    response = post_json(author_client, 'notes:api_list', {'notes': [
+        {'title': note.title, 'text': 'Первая'},
+        {'title': note.title, 'text': 'Вторая'},
+        {'title': 'Явный', 'text': 'Третья', 'slug': note.slug},
+        {'title': 'Без текста'},
+    ]})
+    assert response.status_code == HTTPStatus.CREATED
+    data = response.json()
+    assert [error['index'] for error in data['errors']] == [2, 3]
+    slugs = [item['slug'] for item in data['created']]
+    assert len(set(slugs + [note.slug])) == 3
+    assert Note.objects.filter(author=author).count() == 3
+    assert {found.slug for found in search(author, 'вторая')} == {slugs[1]}
+
+
+def test_bulk_update(author_client, note, form_data):
+    response = post_json(author_client, 'notes:api_update', {'notes': [
+        {'slug': note.slug, 'text': form_data['text']},
+        {'slug': 'missing'},
+    ]})
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert data['updated'][0]['text'] == form_data['text']
+    assert data['errors'][0]['index'] == 1
+    note.refresh_from_db()
+    assert note.text == form_data['text']
+
+
+def test_bulk_delete_respects_ownership(
+        author_client, not_author_client, note
+):
+    payload = {'slugs': [note.slug]}
+    response = post_json(not_author_client, 'notes:api_delete', payload)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert Note.objects.count() == 1
+    response = post_json(author_client, 'notes:api_delete', payload)
+    assert response.json()['deleted'] == [note.slug]
+    assert Note.objects.count() == 0
+
+
+def test_api_list_and_detail(author_client, not_author_client, note):
+    data = author_client.get(reverse('notes:api_list')).json()
+    assert [item['slug'] for item in data['results']] == [note.slug]
+    url = reverse('notes:api_detail', args=(note.slug,))
+    assert author_client.get(url).json()['text'] == note.text
+    response = not_author_client.get(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_api_requires_login(client):
+    response = client.get(reverse('notes:api_list'))
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_api_rejects_malformed_body(author_client):
+    response = author_client.post(
+        reverse('notes:api_list'), data='{', content_type='application/json'
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_bulk_update_rejects_non_string_slug(author_client, note):
+    for slug in (['a'], {'a': 1}):
+        response = post_json(author_client, 'notes:api_update', {
+            'notes': [{'slug': slug, 'text': 'Новый'}],
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'error' in response.json()
+
+
+def test_api_create_and_update_apply_tags(author_client, author):
+    response = post_json(author_client, 'notes:api_list', {'notes': [
+        {'title': 'С тегами', 'text': 'Текст', 'slug': 'tagged',
+         'tags': ['Работа', 'идеи']},
+        {'title': 'Строкой', 'text': 'Текст', 'tags': 'дом'},
+    ]})
+    assert response.status_code == HTTPStatus.CREATED
+    note = Note.objects.get(slug='tagged')
+    assert set(note.tags.values_list('name', flat=True)) == {
+        'работа', 'идеи'
+    }
+    assert Note.objects.filter(author=author, tags__name='дом').exists()
+    post_json(author_client, 'notes:api_update', {'notes': [
+        {'slug': 'tagged', 'tags': 'идеи'},
+    ]})
+    assert list(note.tags.values_list('name', flat=True)) == ['идеи']
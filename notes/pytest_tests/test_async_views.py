@@ -0,0 +1,62 @@
+from http import HTTPStatus
+import threading
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.urls import reverse
+import pytest
+from pytest_django.asserts import assertRedirects
+
+# Запросы к базе выполняются в потоках пула, поэтому данные теста должны
+# быть закоммичены.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def test_async_list(author_client, note):
+    response = author_client.get(reverse('notes:async_list'))
+    assert list(response.context['object_list']) == [note]
+
+
+@pytest.mark.parametrize('name', ('notes:async_list', 'notes:async_detail'))
+def test_async_render_in_db_pool(author_client, note, monkeypatch, name):
+    threads = []
+    get = LocMemCache.get
+
+    def recording_get(self, key, *args, **kwargs):
+        if key.startswith('template.cache.'):
+            threads.append(threading.current_thread().name)
+        return get(self, key, *args, **kwargs)
+
+    monkeypatch.setattr(LocMemCache, 'get', recording_get)
+    args = (note.slug,) if name == 'notes:async_detail' else None
+    author_client.get(reverse(name, args=args))
+    # Фрагменты читаются из кэша в пуле потоков, а не в цикле событий.
+    assert threads
+    assert all(thread.startswith('notes-db') for thread in threads)
+
+
+@pytest.mark.parametrize(
+    'parametrized_client, expected_status',
+    (
+        (pytest.lazy_fixture('not_author_client'), HTTPStatus.NOT_FOUND),
+        (pytest.lazy_fixture('author_client'), HTTPStatus.OK)
+    ),
+)
+def test_async_detail(parametrized_client, expected_status, note):
+    url = reverse('notes:async_detail', args=(note.slug,))
+    assert parametrized_client.get(url).status_code == expected_status
+
+
+def test_async_redirects_anonymous(client):
+    url = reverse('notes:async_list')
+    response = client.get(url)
+    assertRedirects(response, f'{reverse("users:login")}?next={url}')
+
+
+def test_async_api_requires_login(client):
+    response = client.get(reverse('notes:api_async_list'))
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_async_api(author_client, note):
+    data = author_client.get(reverse('notes:api_async_list')).json()
+    assert [item['slug'] for item in data['results']] == [note.slug]
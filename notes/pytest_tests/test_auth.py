@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.urls import reverse
+import pytest
+from pytest_django.asserts import assertRedirects
+
+from notes.auth import CachedModelBackend, user_cache_key
+from yanote import settings as project_settings
+
+
+@pytest.fixture(autouse=True)
+def shared_cache_auth(settings):
+    """Настройки профиля с общим кэшем: сессии и пользователи в кэше."""
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    settings.AUTHENTICATION_BACKENDS = ['notes.auth.CachedModelBackend']
+
+
+def test_process_local_cache_keeps_sessions_in_db():
+    assert project_settings.CACHE_PROFILE == 'locmem'
+    assert project_settings.SESSION_ENGINE == (
+        'django.contrib.sessions.backends.db'
+    )
+
+
+def test_cached_page_costs_no_queries(
+        author_client, note, django_assert_num_queries
+):
+    url = reverse('notes:detail', args=(note.slug,))
+    author_client.get(url)
+    with django_assert_num_queries(0):
+        response = author_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_password_change_invalidates_cached_user(author_client, author):
+    url = reverse('notes:list')
+    author_client.get(url)
+    author.set_password('new-password-123')
+    author.save()
+    response = author_client.get(url)
+    assertRedirects(response, f'{reverse("users:login")}?next={url}')
+
+
+def test_logout_invalidates_cached_user(author_client):
+    url = reverse('notes:list')
+    author_client.get(url)
+    author_client.get(reverse('users:logout'))
+    response = author_client.get(url)
+    assertRedirects(response, f'{reverse("users:login")}?next={url}')
+
+
+def test_cached_user_has_no_password_hash(author_client, author):
+    author_client.get(reverse('notes:list'))
+    data = cache.get(user_cache_key(author.pk))
+    assert data['username'] == author.username
+    assert 'password' not in data
+
+
+def test_deactivation_invalidates_cached_user(author_client, author):
+    url = reverse('notes:list')
+    author_client.get(url)
+    author.is_active = False
+    author.save(update_fields=('is_active',))
+    response = author_client.get(url)
+    assertRedirects(response, f'{reverse("users:login")}?next={url}')
+
+
+def test_saving_cached_user_keeps_password(author):
+    author.set_password('password-123')
+    author.save()
+    backend = CachedModelBackend()
+    backend.get_user(author.pk)
+    user = backend.get_user(author.pk)
+    assert user.get_session_auth_hash() == author.get_session_auth_hash()
+    user.first_name = 'Имя'
+    user.save()
+    author.refresh_from_db()
+    assert author.first_name == 'Имя'
+    assert author.check_password('password-123')
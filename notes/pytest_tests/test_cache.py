@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.urls import reverse
+import pytest
+
+from notes.checks import shared_cache_check
+from notes.models import Note, Tag, TagCount
+
+
+@pytest.fixture
+def detail_url(note):
+    return reverse('notes:detail', args=(note.slug,))
+
+
+def test_repeat_view_served_from_cache(
+        author_client, detail_url, django_assert_max_num_queries
+):
+    first = author_client.get(detail_url)
+    with django_assert_max_num_queries(2):
+        second = author_client.get(detail_url)
+    assert second.content == first.content
+
+
+def test_etag_gives_not_modified(author_client, detail_url):
+    response = author_client.get(detail_url)
+    assert response.has_header('Last-Modified')
+    response = author_client.get(
+        detail_url, HTTP_IF_NONE_MATCH=response['ETag']
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.parametrize('name', ('notes:list', 'notes:detail'))
+def test_edit_invalidates_pages(author_client, note, form_data, name):
+    form_data['slug'] = note.slug
+    url = reverse(name, args=(note.slug,) if name == 'notes:detail' else None)
+    etag = author_client.get(url)['ETag']
+    author_client.post(reverse('notes:edit', args=(note.slug,)), form_data)
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert form_data['title'] in response.content.decode()
+
+
+@pytest.mark.parametrize('name', ('notes:list', 'notes:detail'))
+def test_author_change_invalidates_previous_owner(author_client, note,
+                                                  not_author, name):
+    url = reverse(name, args=(note.slug,) if name == 'notes:detail' else None)
+    etag = author_client.get(url)['ETag']
+    note = Note.objects.get(pk=note.pk)
+    note.author = not_author
+    note.save()
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code != HTTPStatus.NOT_MODIFIED
+    assert note.title not in response.content.decode()
+
+
+def test_other_notes_keep_their_pages(author, author_client, detail_url):
+    etag = author_client.get(detail_url)['ETag']
+    Note.objects.create(title='Другая', text='Текст', author=author)
+    response = author_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_file_based_cache(settings, tmp_path, author_client, detail_url):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }
+    }
+    etag = author_client.get(detail_url)['ETag']
+    response = author_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def render_list(user, notes, tag_counts=()):
+    request = RequestFactory().get(reverse('notes:list'))
+    request.user = user
+    return render_to_string(
+        'notes/list.html',
+        {'object_list': notes, 'tag_counts': tag_counts},
+        request=request,
+    )
+
+
+def test_tag_sidebar_follows_note_version(author, not_author, note):
+    tag_counts = [TagCount(tag=Tag(name='работа'), count=1)]
+    assert 'работа' in render_list(author, [note], tag_counts)
+    # Список заметок не кэшируется, панель тегов берётся из кэша.
+    page = render_list(author, [])
+    assert 'работа' in page
+    assert note.title not in page
+    assert 'работа' not in render_list(not_author, [])
+    note.title = 'Новый заголовок'
+    note.save()
+    assert 'работа' not in render_list(author, [note])
+
+
+def test_header_fragment_is_per_user(author, not_author):
+    assert author.username in render_list(author, [])
+    assert not_author.username in render_list(not_author, [])
+
+
+def test_process_local_cache_fails_check_with_many_processes(settings):
+    assert shared_cache_check(None) == []
+    settings.NOTES_WEB_PROCESSES = 4
+    assert [error.id for error in shared_cache_check(None)] == ['notes.E001']
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }}
+    assert shared_cache_check(None) == []
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import TextField, Value
+import pytest
+
+from notes.fields import MARKER, CompressedValue
+from notes.models import Note, NoteRevision
+
+LONG_TEXT = 'длинная строка текста\n' * 200
+
+
+@pytest.fixture(autouse=True)
+def small_threshold(settings):
+    settings.NOTES_TEXT_COMPRESS_THRESHOLD = 100
+
+
+def stored_text(note):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT text FROM notes_note WHERE id = %s', [note.id]
+        )
+        return cursor.fetchone()[0]
+
+
+def stored_revision(note):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT data FROM notes_noterevision WHERE note_id = %s',
+            [note.id],
+        )
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture
+def long_note(author):
+    return Note.objects.create(title='Длинная', text=LONG_TEXT, author=author)
+
+
+def test_long_text_stored_compressed(long_note):
+    raw = stored_text(long_note)
+    assert raw.startswith(MARKER)
+    assert len(raw) < len(LONG_TEXT)
+    assert Note.objects.get(id=long_note.id).text == LONG_TEXT
+
+
+def test_short_text_stored_as_is(note):
+    assert stored_text(note) == note.text
+
+
+def test_text_decompressed_lazily(long_note):
+    loaded = Note.objects.get(id=long_note.id)
+    assert isinstance(loaded.__dict__['text'], CompressedValue)
+    assert loaded.text == LONG_TEXT
+    assert loaded.__dict__['text'] == LONG_TEXT
+
+
+def test_untouched_text_is_not_recompressed(long_note, monkeypatch):
+    loaded = Note.objects.get(id=long_note.id)
+
+    def compress_text(text):
+        # Версия с новым заголовком сохраняет только короткую дельту.
+        if text == LONG_TEXT:
+            pytest.fail('Текст сжат повторно.')
+        return text
+
+    monkeypatch.setattr('notes.fields.compress_text', compress_text)
+    loaded.title = 'Новый заголовок'
+    loaded.save(update_fields=['title'])
+    assert stored_text(loaded) == stored_text(long_note)
+
+
+def test_text_with_marker_roundtrips(author):
+    text = MARKER + 'не сжатые данные'
+    note = Note.objects.create(title='Маркер', text=text, author=author)
+    assert stored_text(note) != text
+    assert Note.objects.get(id=note.id).text == text
+
+
+def test_filters_use_plain_text(note):
+    assert Note.objects.filter(text=note.text).get() == note
+
+
+def test_revision_snapshot_stored_compressed(long_note):
+    assert stored_revision(long_note).startswith(MARKER)
+    assert NoteRevision.objects.get(note=long_note).data == LONG_TEXT
+
+
+def test_compress_notes_command(long_note):
+    Note.objects.filter(id=long_note.id).update(
+        text=Value(LONG_TEXT, output_field=TextField())
+    )
+    NoteRevision.objects.filter(note=long_note).update(
+        data=Value(LONG_TEXT, output_field=TextField())
+    )
+    out = StringIO()
+    call_command('compress_notes', stdout=out)
+    assert 'заметок: 1, версий: 1, переписано: 2' in out.getvalue()
+    assert stored_text(long_note).startswith(MARKER)
+    assert stored_revision(long_note).startswith(MARKER)
+    assert Note.objects.get(id=long_note.id).text == LONG_TEXT
+    assert NoteRevision.objects.get(note=long_note).data == LONG_TEXT
@@ -1,8 +1,12 @@
+from http import HTTPStatus
+
 import pytest
 
 from django.urls import reverse
 
 from notes.forms import NoteForm
+from notes.models import Note
+from notes.views import NotesList
 
 
 @pytest.mark.parametrize(
@@ -33,3 +37,35 @@ def test_pages_contains_form(author_client, name, args):
     response = author_client.get(url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], NoteForm)
+
+
+def test_notes_list_cursor_pagination(author, author_client, monkeypatch):
+    monkeypatch.setattr(NotesList, 'paginate_by', 2)
+    notes = [
+        Note.objects.create(title=f'Заметка {i}', text='Текст', author=author)
+        for i in range(5)
+    ]
+    url = reverse('notes:list')
+    pages = []
+    response = author_client.get(url)
+    while True:
+        page = response.context['page_obj']
+        pages.append(list(page))
+        if not page.has_next():
+            break
+        response = author_client.get(url, {'cursor': page.next_cursor})
+    assert pages == [notes[0:2], notes[2:4], notes[4:]]
+    response = author_client.get(url, {'cursor': page.previous_cursor})
+    assert list(response.context['page_obj']) == notes[2:4]
+
+
+def test_notes_list_bad_cursor(author_client):
+    response = author_client.get(reverse('notes:list'), {'cursor': '!!'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_notes_list_defers_text(author_client, note):
+    response = author_client.get(reverse('notes:list'))
+    listed_note, = response.context['object_list']
+    assert 'text' in listed_note.get_deferred_fields()
+    assert listed_note.excerpt == note.text
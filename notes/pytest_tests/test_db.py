@@ -0,0 +1,102 @@
+import asyncio
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, models
+from django.http import HttpResponse
+import pytest
+
+from notes.db import configure_connection
+from notes.models import Note, NoteStats
+from notes.routers import PrimaryReplicaRouter, ReplicaPinningMiddleware
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_applied(settings):
+    settings.NOTES_SQLITE_PRAGMAS = {'cache_size': -1234}
+    configure_connection(connection)
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size')
+        assert cursor.fetchone() == (-1234,)
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.NOTES_DATABASE_REPLICAS = ['replica']
+    return PrimaryReplicaRouter()
+
+
+def test_notes_read_from_replica(replicas):
+    assert replicas.db_for_read(Note) == 'replica'
+    assert replicas.db_for_read(get_user_model()) is None
+    assert replicas.db_for_write(Note) == 'default'
+
+
+def test_no_replicas_configured():
+    assert PrimaryReplicaRouter().db_for_read(Note) is None
+
+
+def test_write_outside_request_does_not_pin(replicas):
+    # Воркер очереди или команда живут дольше запроса.
+    replicas.db_for_write(Note)
+    assert replicas.db_for_read(Note) == 'replica'
+
+
+def test_writer_pinned_to_primary(replicas, rf, settings):
+    reads = []
+
+    def view(request):
+        reads.append(replicas.db_for_read(Note))
+        if request.method == 'POST':
+            replicas.db_for_write(Note)
+        return HttpResponse()
+
+    middleware = ReplicaPinningMiddleware(view)
+    cookies = {settings.SESSION_COOKIE_NAME: 'session-key'}
+    for request in (rf.get('/'), rf.post('/'), rf.get('/')):
+        request.COOKIES.update(cookies)
+        middleware(request)
+    other = rf.get('/')
+    other.COOKIES[settings.SESSION_COOKIE_NAME] = 'other-session'
+    middleware(other)
+    assert reads == ['replica', 'replica', 'default', 'replica']
+
+
+def test_async_writer_pinned_to_primary(replicas, rf, settings):
+    reads = []
+
+    async def view(request):
+        reads.append(replicas.db_for_read(Note))
+        if request.method == 'POST':
+            replicas.db_for_write(Note)
+        return HttpResponse()
+
+    middleware = ReplicaPinningMiddleware(view)
+    assert asyncio.iscoroutinefunction(middleware)
+    for request in (rf.get('/'), rf.post('/'), rf.get('/')):
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = 'async-session'
+        asyncio.run(middleware(request))
+    assert reads == ['replica', 'replica', 'default']
+
+
+@pytest.fixture
+def replica_alias(replicas):
+    # Второй псевдоним на ту же тестовую базу, как реплика с TEST MIRROR.
+    connections.settings['replica'] = dict(connections.settings['default'])
+    yield
+    connections['replica'].close()
+    del connections['replica']
+    del connections.settings['replica']
+
+
+# Внутри транзакции теста роутер и так читает из default.
+@pytest.mark.django_db(transaction=True)
+def test_bulk_delete_atomic_on_primary(replica_alias, monkeypatch, author,
+                                       note):
+    def failing_delete(queryset):
+        raise RuntimeError
+
+    monkeypatch.setattr(models.QuerySet, 'delete', failing_delete)
+    with pytest.raises(RuntimeError):
+        Note.objects.filter(author=author).delete()
+    # Счётчики уменьшаются в той же транзакции, что и удаление.
+    assert NoteStats.objects.get(user=author).note_count == 1
@@ -0,0 +1,145 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from notes.drafts import flush_key
+from notes.models import NoteDraft
+
+
+@pytest.fixture
+def draft_url(note):
+    return reverse('notes:draft', args=(note.slug,))
+
+
+def draft_writes(captured):
+    return [
+        query for query in captured.captured_queries
+        if ('notes_notedraft' in query['sql'] or 'notes_job' in query['sql'])
+        and not query['sql'].startswith('SELECT')
+    ]
+
+
+def post_drafts(client, url, note, count):
+    return [
+        client.post(
+            url, {'title': note.title, 'text': 'Текст' + '!' * n}
+        ).json()['status']
+        for n in range(count)
+    ]
+
+
+def test_keystrokes_coalesced(author_client, draft_url, note):
+    with CaptureQueriesContext(connection) as captured:
+        statuses = []
+        for _ in range(3):
+            statuses += post_drafts(author_client, draft_url, note, 10)
+            # Окно закончилось.
+            cache.delete(flush_key(note.pk))
+    # Одна запись за окно, в его конце: при первой правке следующего.
+    assert statuses == (
+        ['buffered'] * 10 + (['flushed'] + ['buffered'] * 9) * 2
+    )
+    assert len(draft_writes(captured)) == 2
+    assert NoteDraft.objects.get().text == 'Текст'
+
+
+def test_flush_after_interval(author_client, draft_url, note):
+    author_client.post(draft_url, {'title': note.title, 'text': 'Первый'})
+    author_client.post(draft_url, {'title': note.title, 'text': 'Второй'})
+    assert not NoteDraft.objects.exists()
+    cache.delete(flush_key(note.pk))
+    author_client.post(draft_url, {'title': note.title, 'text': 'Третий'})
+    assert NoteDraft.objects.get().text == 'Третий'
+
+
+def test_buffered_draft_stored_on_read(author_client, draft_url, note):
+    author_client.post(draft_url, {'title': note.title, 'text': 'Первый'})
+    author_client.post(draft_url, {'title': note.title, 'text': 'Второй'})
+    edit_url = reverse('notes:edit', args=(note.slug,))
+    # Пока окно открыто, чтение не пишет в базу.
+    author_client.get(edit_url)
+    assert not NoteDraft.objects.exists()
+    cache.delete(flush_key(note.pk))
+    author_client.get(edit_url)
+    assert NoteDraft.objects.get().text == 'Второй'
+    cache.clear()
+    response = author_client.get(edit_url)
+    assert response.context['form'].initial['text'] == 'Второй'
+
+
+def test_explicit_flush(author_client, draft_url, note):
+    author_client.post(draft_url, {'title': note.title, 'text': 'Первый'})
+    response = author_client.post(
+        draft_url, {'title': note.title, 'text': 'Второй', 'flush': '1'}
+    )
+    assert response.json()['status'] == 'flushed'
+    assert NoteDraft.objects.get().text == 'Второй'
+
+
+def test_edit_form_restores_buffered_draft(author_client, draft_url, note):
+    author_client.post(draft_url, {'title': 'Черновик', 'text': 'Первый'})
+    author_client.post(draft_url, {'title': 'Черновик', 'text': 'Второй'})
+    response = author_client.get(reverse('notes:edit', args=(note.slug,)))
+    form = response.context['form']
+    assert form.initial['text'] == 'Второй'
+    assert form.initial['title'] == 'Черновик'
+
+
+def test_draft_survives_cache_loss(author_client, draft_url, note):
+    author_client.post(
+        draft_url, {'title': 'Черновик', 'text': 'Первый', 'flush': '1'}
+    )
+    cache.clear()
+    response = author_client.get(reverse('notes:edit', args=(note.slug,)))
+    assert response.context['form'].initial['text'] == 'Первый'
+
+
+def test_save_merges_and_discards_draft(
+        author_client, draft_url, note, form_data
+):
+    author_client.post(draft_url, {'title': 'Черновик', 'text': 'Первый'})
+    form_data['slug'] = note.slug
+    author_client.post(reverse('notes:edit', args=(note.slug,)), form_data)
+    note.refresh_from_db()
+    assert note.text == form_data['text']
+    assert not NoteDraft.objects.exists()
+    response = author_client.get(reverse('notes:edit', args=(note.slug,)))
+    assert response.context['draft'] is None
+
+
+def test_stale_draft_ignored(author_client, draft_url, note):
+    author_client.post(draft_url, {'title': 'Черновик', 'text': 'Первый'})
+    note.text = 'Сохранено в другой вкладке'
+    note.save()
+    for _ in range(2):
+        response = author_client.get(
+            reverse('notes:edit', args=(note.slug,))
+        )
+        assert response.context['draft'] is None
+        assert response.context['form'].initial['text'] == note.text
+        # Черновик из базы устарел так же, как из кэша.
+        cache.clear()
+
+
+def test_draft_keeps_form_revision(author_client, draft_url, note):
+    response = author_client.get(reverse('notes:edit', args=(note.slug,)))
+    revision = response.context['draft_revision']
+    note.text = 'Сохранено в другой вкладке'
+    note.save()
+    author_client.post(draft_url, {
+        'title': note.title, 'text': 'Правка', 'revision': revision,
+        'flush': '1',
+    })
+    assert NoteDraft.objects.get().revision == revision
+    response = author_client.get(reverse('notes:edit', args=(note.slug,)))
+    assert response.context['draft'] is None
+
+
+def test_other_user_cannot_save_draft(not_author_client, draft_url, note):
+    response = not_author_client.post(draft_url, {'text': 'Чужой'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert not NoteDraft.objects.exists()
@@ -0,0 +1,116 @@
+import asyncio
+import csv
+from http import HTTPStatus
+import io
+import json
+from urllib.parse import urlencode
+import zipfile
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.core.management import call_command
+from django.urls import reverse
+import pytest
+
+from notes.handlers import NotesASGIHandler
+from notes.models import Note
+
+
+@pytest.fixture
+def other_note(not_author):
+    return Note.objects.create(
+        title='Чужая', text='Не выгружается', author=not_author
+    )
+
+
+def get_export(client, export_format):
+    response = client.get(reverse('notes:export', args=(export_format,)))
+    assert response.streaming
+    return b''.join(response.streaming_content)
+
+
+def test_export_ndjson(author_client, note, other_note):
+    lines = get_export(author_client, 'ndjson').decode().splitlines()
+    assert [json.loads(line)['slug'] for line in lines] == [note.slug]
+
+
+def test_export_csv(author_client, note, other_note):
+    content = get_export(author_client, 'csv').decode()
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert [row['text'] for row in rows] == [note.text]
+
+
+def test_export_zip(author_client, note, other_note):
+    archive = zipfile.ZipFile(io.BytesIO(get_export(author_client, 'zip')))
+    assert archive.namelist() == [f'{note.slug}.md']
+    assert note.text in archive.read(f'{note.slug}.md').decode()
+
+
+def test_unknown_export_format(author_client):
+    response = author_client.get(reverse('notes:export', args=('xml',)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_export_command(tmp_path, author, note, other_note):
+    output = tmp_path / 'notes.ndjson'
+    call_command(
+        'export_notes', user=author.username, output=str(output),
+        chunk_size=1,
+    )
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row['id'] for row in rows] == [note.id]
+
+
+def asgi_request(client, method, path, body=b'', content_type=None):
+    """Запрос через ASGI-обработчик проекта; возвращает статус и тело."""
+    cookies = '; '.join(
+        f'{key}={morsel.value}' for key, morsel in client.cookies.items()
+    )
+    headers = [(b'cookie', cookies.encode())]
+    if content_type:
+        headers.append((b'content-type', content_type.encode()))
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+        'headers': headers, 'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(NotesASGIHandler()(scope, receive, send))
+    return messages[0]['status'], b''.join(
+        message.get('body', b'') for message in messages[1:]
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_streams_under_asgi(settings, author_client, note):
+    settings.NOTES_EXPORT_CHUNK_SIZE = 1
+    Note.objects.bulk_create(
+        Note(title=f'Ещё {index}', text='Текст', author=note.author)
+        for index in range(5)
+    )
+    status, content = asgi_request(
+        author_client, 'GET', reverse('notes:export', args=('ndjson',))
+    )
+    assert status == HTTPStatus.OK
+    assert len(content.decode().splitlines()) == 6
+
+
+@pytest.mark.django_db(transaction=True)
+def test_admin_export_streams_under_asgi(admin_client, note):
+    admin_client.get(reverse('admin:notes_note_changelist'))
+    body = urlencode({
+        'action': 'export_selected',
+        ACTION_CHECKBOX_NAME: note.pk,
+        'csrfmiddlewaretoken': admin_client.cookies['csrftoken'].value,
+    }).encode()
+    status, content = asgi_request(
+        admin_client, 'POST', reverse('admin:notes_note_changelist'), body,
+        'application/x-www-form-urlencoded',
+    )
+    assert status == HTTPStatus.OK
+    assert json.loads(content)['slug'] == note.slug
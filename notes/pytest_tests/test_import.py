@@ -0,0 +1,82 @@
+from io import StringIO
+import json
+
+from django.core.management import call_command
+import pytest
+
+from notes.models import Note
+from notes.search import search
+
+
+@pytest.fixture
+def ndjson_file(tmp_path, note):
+    path = tmp_path / 'notes.ndjson'
+    rows = [
+        {'title': note.title, 'text': 'Дубль заголовка'},
+        {'title': note.title, 'text': 'Ещё один дубль'},
+        {'title': 'Свой адрес', 'text': 'Занятый slug', 'slug': note.slug},
+        {'title': 'Без текста'},
+        {'title': 'Последняя', 'text': 'Конец файла'},
+    ]
+    path.write_text(
+        '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows),
+        encoding='utf-8',
+    )
+    return path
+
+
+def test_import_ndjson(author, ndjson_file):
+    call_command(
+        'import_notes', str(ndjson_file), user=author.username, batch_size=2
+    )
+    assert Note.objects.filter(author=author).count() == 5
+    assert Note.objects.values('slug').distinct().count() == 5
+    assert [found.text for found in search(author, 'конец')] == [
+        'Конец файла'
+    ]
+
+
+def test_import_resumes_from_checkpoint(tmp_path, author, ndjson_file):
+    checkpoint = tmp_path / 'checkpoint.json'
+    checkpoint.write_text(json.dumps({'rows': 4}))
+    call_command(
+        'import_notes', str(ndjson_file), user=author.username,
+        checkpoint=str(checkpoint),
+    )
+    assert list(
+        Note.objects.exclude(slug='note-slug').values_list('text', flat=True)
+    ) == ['Конец файла']
+    assert json.loads(checkpoint.read_text()) == {'rows': 5}
+
+
+def test_import_csv(tmp_path, author):
+    path = tmp_path / 'notes.csv'
+    path.write_text('title,text\nСписок покупок,Хлеб\n', encoding='utf-8')
+    call_command('import_notes', str(path), user=author.username)
+    assert Note.objects.get().text == 'Хлеб'
+
+
+def test_import_reports_invalid_rows(tmp_path, author):
+    path = tmp_path / 'notes.ndjson'
+    rows = [
+        {'title': 'Хорошая', 'text': 'Текст', 'slug': 'good'},
+        {'title': ['список'], 'text': 'Текст'},
+        {'title': 'Текст числом', 'text': 42},
+        {'title': 'Плохой slug', 'text': 'Текст', 'slug': 'плохой slug'},
+        {'title': 'Длинный slug', 'text': 'Текст', 'slug': 'a' * 101},
+        {'title': 'Slug словарём', 'text': 'Текст', 'slug': {'a': 1}},
+    ]
+    path.write_text(
+        '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows)
+        + '\n[1, 2]\n',
+        encoding='utf-8',
+    )
+    err = StringIO()
+    call_command(
+        'import_notes', str(path), user=author.username, batch_size=3,
+        stderr=err,
+    )
+    assert list(Note.objects.values_list('slug', flat=True)) == ['good']
+    assert [
+        line.split(':')[0] for line in err.getvalue().splitlines()
+    ] == [f'Строка {number}' for number in range(2, 8)]
@@ -0,0 +1,147 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+import json
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+import pytest
+
+from notes import jobs
+from notes.models import Job, Note
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.NOTES_JOB_RETRY_DELAY = 0
+
+
+@pytest.fixture
+def flaky_task(db, monkeypatch):
+    calls = []
+
+    def flaky(job):
+        calls.append(job.attempts)
+        if len(calls) < 2:
+            raise RuntimeError('временный сбой')
+        return {'calls': len(calls)}
+
+    monkeypatch.setitem(jobs.TASKS, 'flaky', flaky)
+    return calls
+
+
+def post_job(client, task, payload=None):
+    return client.post(
+        reverse('notes:api_jobs'),
+        data=json.dumps({'task': task, 'payload': payload or {}}),
+        content_type='application/json',
+    )
+
+
+def test_export_job(author_client, note):
+    response = post_job(author_client, 'export_notes', {'format': 'ndjson'})
+    assert response.status_code == HTTPStatus.ACCEPTED
+    status_url = response['Location']
+    assert author_client.get(status_url).json()['status'] == Job.QUEUED
+    assert jobs.run_pending() == 1
+    data = author_client.get(status_url).json()
+    assert data['status'] == Job.DONE
+    download = author_client.get(data['download'])
+    content = b''.join(download.streaming_content).decode()
+    assert json.loads(content)['slug'] == note.slug
+
+
+def test_unknown_task_rejected(author_client):
+    response = post_job(author_client, 'rebuild_search_index')
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert not Job.objects.exists()
+
+
+def test_job_visible_only_to_owner(author_client, not_author_client):
+    response = post_job(author_client, 'delete_notes', {'slugs': []})
+    status_url = response['Location']
+    assert not_author_client.get(status_url).status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+
+
+def test_delete_job_respects_ownership(author_client, not_author, note):
+    Note.objects.create(
+        title='Чужая', text='Текст', slug='other', author=not_author
+    )
+    post_job(author_client, 'delete_notes', {'slugs': [note.slug, 'other']})
+    jobs.run_pending()
+    assert Job.objects.get().result == {'deleted': 1}
+    assert list(Note.objects.values_list('slug', flat=True)) == ['other']
+
+
+def test_import_job(author_client, author):
+    body = '\n'.join(
+        json.dumps({'title': f'Загрузка {number}', 'text': 'Текст'})
+        for number in range(3)
+    )
+    response = author_client.post(
+        reverse('notes:api_job_import') + '?format=ndjson',
+        data=body,
+        content_type='application/x-ndjson',
+    )
+    assert response.status_code == HTTPStatus.ACCEPTED
+    jobs.run_pending()
+    assert Job.objects.get().status == Job.DONE
+    assert Note.objects.filter(author=author).count() == 3
+
+
+def test_failed_job_is_retried(flaky_task):
+    job = jobs.enqueue('flaky')
+    assert jobs.run_pending() == 2
+    job.refresh_from_db()
+    assert job.status == Job.DONE
+    assert job.attempts == 2
+    assert job.result == {'calls': 2}
+    assert 'временный сбой' in job.error
+
+
+def test_job_fails_after_max_attempts(flaky_task):
+    job = jobs.enqueue('flaky', max_attempts=1)
+    jobs.run_pending()
+    job.refresh_from_db()
+    assert job.status == Job.FAILED
+    assert job.finished is not None
+
+
+def test_visibility_timeout(flaky_task):
+    jobs.enqueue('flaky')
+    stale = jobs.claim('first')
+    assert jobs.claim('second') is None
+    Job.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+    job = jobs.claim('second')
+    assert job.worker == 'second'
+    assert job.attempts == 2
+    assert jobs.finish(stale, status=Job.DONE) == 0
+
+
+def test_finished_jobs_purged(settings, author, note):
+    export = jobs.enqueue('export_notes', user=author)
+    jobs.run_pending()
+    export.refresh_from_db()
+    assert default_storage.exists(export.result['file'])
+    queued = jobs.enqueue('export_notes', user=author, delay=60)
+    assert jobs.purge_finished() == 0
+    later = export.finished + timedelta(seconds=settings.NOTES_JOB_RETENTION)
+    assert jobs.purge_finished(later + timedelta(seconds=1)) == 1
+    assert list(Job.objects.all()) == [queued]
+    assert not default_storage.exists(export.result['file'])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_workers_burst(settings, flaky_task, note):
+    settings.NOTES_JOB_POLL_INTERVAL = 0.01
+    jobs.enqueue('flaky')
+    jobs.enqueue('export_notes', {'format': 'csv'}, user=note.author)
+    call_command(
+        'run_workers', burst=True, stdout=StringIO()
+    )
+    assert set(Job.objects.values_list('status', flat=True)) == {Job.DONE}
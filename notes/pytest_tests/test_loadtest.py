@@ -0,0 +1,47 @@
+import pytest
+
+from notes import loadtest
+from notes.models import Note
+
+
+def test_parse_mix():
+    assert loadtest.parse_mix('list=3, detail') == {'list': 3, 'detail': 1}
+    for value in ('unknown=1', 'list=0'):
+        with pytest.raises(ValueError):
+            loadtest.parse_mix(value)
+
+
+def test_summarize_merges_workers():
+    report = loadtest.summarize([
+        {'list': {'latencies': [1.5, 3, 30], 'errors': 1}},
+        {'list': {'latencies': [7000], 'errors': 0},
+         'add': {'latencies': [], 'errors': 0}},
+    ], elapsed=2)
+    total = report['total']
+    assert total['requests'] == 4
+    assert total['rps'] == 2
+    assert total['error_rate'] == 0.25
+    assert total['max_ms'] == 7000
+    assert total['p50_ms'] <= total['p90_ms'] <= total['max_ms']
+    assert total['histogram']['<=2'] == 1
+    assert total['histogram']['>5000'] == 1
+    assert report['routes']['add'] == {'requests': 0, 'errors': 0}
+
+
+def test_worker_stops_without_seed_notes(monkeypatch):
+    monkeypatch.setattr(loadtest, 'signup_and_login', lambda *args: None)
+    monkeypatch.setattr(loadtest.VirtualUser, 'add_note', lambda self: 500)
+    mix = loadtest.parse_mix('detail')
+    with pytest.raises(RuntimeError, match='ни одной заметки'):
+        loadtest.run_worker('http://testserver', 'lt-worker', mix, 0.5)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_signs_up_and_drives_routes(live_server):
+    mix = loadtest.parse_mix(','.join(loadtest.ROUTES))
+    results = loadtest.run_worker(live_server.url, 'lt-worker', mix, 0.5)
+    assert sum(len(data['latencies']) for data in results.values())
+    assert not any(data['errors'] for data in results.values())
+    assert Note.objects.filter(author__username='lt-worker').count() >= (
+        loadtest.SEED_NOTES
+    )
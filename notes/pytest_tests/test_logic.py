@@ -1,11 +1,13 @@
 from http import HTTPStatus
 
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 import pytest
 from pytest_django.asserts import assertFormError, assertRedirects
 from pytils.translit import slugify
 
-from notes.models import Note
+from notes.models import EXCERPT_LENGTH, Note, make_excerpt
 from notes.forms import WARNING
 
 
@@ -82,3 +84,45 @@ def test_other_user_cant_delete_note(not_author_client, slug_for_args):
     response = not_author_client.post(url)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Note.objects.count() == 1
+
+
+def test_excerpt_follows_text(note):
+    note.text = 'Очень длинный текст. ' * 50
+    note.save(update_fields=('text',))
+    note.refresh_from_db()
+    assert note.excerpt == make_excerpt(note.text)
+    assert len(note.excerpt) <= EXCERPT_LENGTH
+
+
+def test_same_title_gets_unique_slug(author_client, note, form_data):
+    url = reverse('notes:add')
+    form_data.pop('slug')
+    form_data['title'] = note.title
+    note.slug = slugify(note.title)
+    note.save()
+    response = author_client.post(url, data=form_data)
+    assertRedirects(response, reverse('notes:success'))
+    new_note = Note.objects.exclude(id=note.id).get()
+    assert new_note.slug != note.slug
+    assert new_note.slug.startswith(note.slug + '-')
+
+
+def test_form_does_not_query_for_slug(author_client, form_data):
+    with CaptureQueriesContext(connection) as captured:
+        author_client.post(reverse('notes:add'), data=form_data)
+    assert not any(
+        'SELECT (1) AS "a"' in query['sql']
+        for query in captured.captured_queries
+    )
+
+
+def test_other_integrity_errors_not_retried(author):
+    note = Note(title='Без автора', text='Текст')
+    with CaptureQueriesContext(connection) as captured:
+        with pytest.raises(IntegrityError):
+            note.save()
+    inserts = [
+        query for query in captured.captured_queries
+        if query['sql'].startswith('INSERT INTO "notes_note"')
+    ]
+    assert len(inserts) == 1
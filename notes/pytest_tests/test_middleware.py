@@ -0,0 +1,169 @@
+import asyncio
+import gzip
+import json
+import logging
+
+from django.template.base import Template
+from django.test.client import AsyncClient, Client
+from django.urls import reverse
+import pytest
+
+from notes.middleware import CompressionMiddleware, RequestTimingMiddleware
+from notes.models import Note
+
+
+@pytest.fixture
+def timed_client(settings, author):
+    settings.NOTES_REQUEST_TIMING = True
+    client = Client()
+    client.force_login(author)
+    return client
+
+
+def test_server_timing_header(timed_client, note):
+    response = timed_client.get(reverse('notes:detail', args=(note.slug,)))
+    parts = response['Server-Timing'].split(', ')
+    assert [part.split(';')[0] for part in parts] == ['db', 'tpl', 'total']
+
+
+def test_slow_request_logged_with_queries(settings, timed_client, caplog):
+    settings.NOTES_TIMING_SLOW_MS = 0
+    with caplog.at_level(logging.INFO, logger='notes.timing'):
+        timed_client.get(reverse('notes:list'))
+    record, = caplog.records
+    assert record.levelno == logging.WARNING
+    data = json.loads(record.getMessage())
+    assert len(data['slowest_queries']) == min(
+        data['queries'], settings.NOTES_TIMING_SLOWEST_QUERIES
+    )
+    assert data['response_bytes'] > 0
+
+
+def timing_parts(response):
+    return {
+        part.split(';')[0]: float(part.rsplit('dur=', 1)[1])
+        for part in response['Server-Timing'].split(', ')
+    }
+
+
+@pytest.mark.parametrize('name, args', (
+    ('notes:detail', True), ('notes:list', False),
+))
+def test_cached_pages_report_template_time(timed_client, note, name, args):
+    url = reverse(name, args=(note.slug,) if args else None)
+    # Первый запрос отрисовывает страницу в dispatch и кладёт её в кэш.
+    assert timing_parts(timed_client.get(url))['tpl'] > 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_timing_in_async_chain(settings, author):
+    settings.NOTES_REQUEST_TIMING = True
+    client = AsyncClient()
+    client.force_login(author)
+    response = asyncio.run(client.get(reverse('notes:async_list')))
+    assert response.status_code == 200
+    assert 'SQL x0' not in response['Server-Timing']
+    assert timing_parts(response)['tpl'] > 0
+
+
+def test_timing_leaves_template_class_alone(settings):
+    settings.NOTES_REQUEST_TIMING = True
+    render = Template.render
+    RequestTimingMiddleware(lambda request: None)
+    assert Template.render is render
+
+
+def test_timing_middleware_async_capable(settings):
+    settings.NOTES_REQUEST_TIMING = True
+
+    async def get_response(request):
+        pass
+
+    assert asyncio.iscoroutinefunction(RequestTimingMiddleware(get_response))
+
+
+def test_timing_disabled_by_default(author_client):
+    response = author_client.get(reverse('notes:list'))
+    assert not response.has_header('Server-Timing')
+
+
+@pytest.fixture
+def long_note(author):
+    return Note.objects.create(
+        title='Длинная', text='Повторяющийся текст заметки. ' * 500,
+        author=author,
+    )
+
+
+def test_response_compressed(author_client, long_note):
+    url = reverse('notes:detail', args=(long_note.slug,))
+    plain = author_client.get(url)
+    response = author_client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    assert response['Server-Timing'].startswith('compress;')
+    assert gzip.decompress(response.content) == plain.content
+    assert int(response['Content-Length']) < len(plain.content)
+
+
+def test_small_response_not_compressed(author_client, note):
+    response = author_client.get(
+        reverse('notes:api_detail', args=(note.slug,)),
+        HTTP_ACCEPT_ENCODING='gzip',
+    )
+    assert not response.has_header('Content-Encoding')
+
+
+def test_encoding_not_accepted(author_client, long_note):
+    response = author_client.get(
+        reverse('notes:detail', args=(long_note.slug,)),
+        HTTP_ACCEPT_ENCODING='identity, gzip;q=0',
+    )
+    assert not response.has_header('Content-Encoding')
+
+
+def test_streaming_response_compressed_incrementally(
+        settings, author_client, author
+):
+    settings.NOTES_COMPRESS_STREAM_FLUSH = 1024
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст ' * 50, author=author)
+        for index in range(50)
+    )
+    url = reverse('notes:export', args=('ndjson',))
+    plain = b''.join(author_client.get(url).streaming_content)
+    response = author_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+    assert response['Content-Encoding'] == 'gzip'
+    assert not response.has_header('Content-Length')
+    chunks = [chunk for chunk in response.streaming_content if chunk]
+    assert len(chunks) > 2
+    assert gzip.decompress(b''.join(chunks)) == plain
+
+
+@pytest.mark.django_db(transaction=True)
+def test_response_compressed_in_async_chain(author):
+    long_note = Note.objects.create(
+        title='Длинная', text='Повторяющийся текст заметки. ' * 500,
+        author=author,
+    )
+
+    async def get_response(request):
+        pass
+
+    assert asyncio.iscoroutinefunction(CompressionMiddleware(get_response))
+    client = AsyncClient()
+    client.force_login(author)
+    response = asyncio.run(client.get(
+        reverse('notes:async_detail', args=(long_note.slug,)),
+        # AsyncClient Django 3.2 передаёт extra как заголовки ASGI.
+        **{'Accept-Encoding': 'gzip'},
+    ))
+    assert response['Content-Encoding'] == 'gzip'
+    assert long_note.title in gzip.decompress(response.content).decode()
+
+
+def test_binary_response_not_compressed(author_client, note):
+    response = author_client.get(
+        reverse('notes:export', args=('zip',)), HTTP_ACCEPT_ENCODING='gzip'
+    )
+    assert not response.has_header('Content-Encoding')
@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+from pytest_django.asserts import assertRedirects
+
+from notes.models import NoteRevision
+from notes.revisions import apply_delta, get_revision, make_delta
+
+TEXTS = [
+    'первая строка\nвторая строка\n',
+    'первая строка\nновая вторая\nтретья\n',
+    'третья\n',
+    '',
+    'снова текст\nбез перевода строки',
+    'снова текст\nбез перевода строки\nи ещё',
+]
+
+
+@pytest.fixture
+def edited_note(settings, note):
+    settings.NOTES_REVISION_SNAPSHOT_EVERY = 3
+    for text in TEXTS:
+        note.text = text
+        note.save()
+    return note
+
+
+def test_delta_roundtrip():
+    for old, new in zip(TEXTS, TEXTS[1:]):
+        assert apply_delta(old, make_delta(old, new)) == new
+
+
+def test_every_revision_restores(edited_note):
+    texts = ['Текст заметки'] + TEXTS
+    for number, text in enumerate(texts, start=1):
+        assert get_revision(edited_note, number).text == text
+
+
+def test_snapshots_are_periodic(edited_note):
+    snapshots = NoteRevision.objects.filter(
+        note=edited_note, is_snapshot=True
+    ).values_list('number', flat=True)
+    assert sorted(snapshots) == [1, 4, 7]
+
+
+def test_revision_loads_at_most_k_rows(edited_note):
+    with CaptureQueriesContext(connection) as captured:
+        get_revision(edited_note, 6)
+    assert len(captured.captured_queries) == 1
+
+
+def test_unchanged_save_adds_no_revision(note):
+    note.save()
+    assert note.revisions.count() == 1
+
+
+def test_restore_revision(author_client, edited_note):
+    url = reverse('notes:revision', args=(edited_note.slug, 2))
+    response = author_client.post(url)
+    assertRedirects(
+        response, reverse('notes:detail', args=(edited_note.slug,))
+    )
+    edited_note.refresh_from_db()
+    assert edited_note.text == TEXTS[0]
+    assert edited_note.revisions.count() == len(TEXTS) + 2
+
+
+@pytest.mark.parametrize('name, args', (
+    ('notes:history', ()),
+    ('notes:revision', (1,)),
+))
+def test_history_hidden_from_other_users(not_author_client, note, name, args):
+    url = reverse(name, args=(note.slug, *args))
+    response = not_author_client.get(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_missing_revision(author_client, note):
+    url = reverse('notes:revision', args=(note.slug, 5))
+    assert author_client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_history_lists_revisions(author_client, edited_note):
+    response = author_client.get(
+        reverse('notes:history', args=(edited_note.slug,))
+    )
+    assert len(response.context['revisions']) == len(TEXTS) + 1
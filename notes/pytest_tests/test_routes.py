@@ -17,7 +17,7 @@ def test_pages_availability_for_anonymous_user(client, name):
 
 @pytest.mark.parametrize(
     'name',
-    ('notes:list', 'notes:add', 'notes:success')
+    ('notes:list', 'notes:add', 'notes:success', 'notes:search')
 )
 def test_pages_availability_for_auth_user(not_author_client, name):
     url = reverse(name)
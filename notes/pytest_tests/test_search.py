@@ -0,0 +1,61 @@
+from django.core.management import call_command
+from django.urls import reverse
+import pytest
+
+from notes.models import Note, SearchDocument
+from notes.search import search
+
+
+@pytest.fixture
+def notes(author, not_author):
+    return (
+        Note.objects.create(
+            title='Список покупок', text='Молоко, хлеб', author=author
+        ),
+        Note.objects.create(
+            title='Рецепт', text='Нужно молоко и мука', author=author
+        ),
+        Note.objects.create(
+            title='Молоко', text='Чужая заметка', author=not_author
+        ),
+    )
+
+
+def test_search_ranks_title_matches_first(author, notes):
+    assert search(author, 'молоко') == [notes[0], notes[1]]
+
+
+def test_search_requires_all_terms(author, notes):
+    assert search(author, 'молоко мука') == [notes[1]]
+
+
+def test_search_prefix(author, notes):
+    assert search(author, 'покуп') == []
+    assert search(author, 'покуп*') == [notes[0]]
+
+
+def test_search_follows_note_changes(author, notes):
+    note = notes[1]
+    note.text = 'Яйца'
+    note.save()
+    assert search(author, 'мука') == []
+    assert search(author, 'яйца') == [note]
+
+
+def test_search_follows_author_change(author, not_author, notes):
+    note = notes[0]
+    note.author = not_author
+    note.save()
+    assert search(author, 'молоко') == [notes[1]]
+    assert note in search(not_author, 'молоко')
+
+
+def test_search_view_scoped_to_author(not_author_client, notes):
+    response = not_author_client.get(reverse('notes:search'), {'q': 'молоко'})
+    assert list(response.context['object_list']) == [notes[2]]
+
+
+def test_rebuild_search_index(author, notes):
+    SearchDocument.objects.filter(note=notes[0]).delete()
+    call_command('rebuild_search_index')
+    assert search(author, 'хлеб') == [notes[0]]
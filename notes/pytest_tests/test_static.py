@@ -0,0 +1,120 @@
+import asyncio
+import gzip
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.urls import reverse
+import pytest
+
+from notes.static_server import IMMUTABLE, StaticFilesASGI, StaticFilesWSGI
+
+CSS = 'css/yanote.css'
+
+
+@pytest.fixture
+def static_root(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    settings.STATICFILES_STORAGE = (
+        'notes.staticfiles.CompressedManifestStaticFilesStorage'
+    )
+    call_command('collectstatic', interactive=False, verbosity=0)
+    return tmp_path
+
+
+@pytest.fixture
+def hashed_css(static_root):
+    return staticfiles_storage.stored_name(CSS)
+
+
+def not_found_app(environ, start_response):
+    start_response('404 Not Found', [])
+    return [b'django']
+
+
+def wsgi_get(path, **headers):
+    application = StaticFilesWSGI(not_found_app)
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': '/static/' + path}
+    environ.update(
+        ('HTTP_' + name.upper(), value) for name, value in headers.items()
+    )
+    response = {}
+
+    def start_response(status, headers):
+        response['status'] = status
+        response['headers'] = dict(headers)
+
+    response['body'] = b''.join(application(environ, start_response))
+    return response
+
+
+def test_collectstatic_writes_hashed_and_compressed(static_root, hashed_css):
+    assert hashed_css != CSS
+    original = (static_root / hashed_css).read_bytes()
+    compressed = (static_root / (hashed_css + '.gz')).read_bytes()
+    assert gzip.decompress(compressed) == original
+    assert len(compressed) < len(original)
+
+
+def test_page_links_hashed_css(client, hashed_css):
+    response = client.get(reverse('users:login'))
+    assert f'/static/{hashed_css}' in response.content.decode()
+
+
+def test_serves_precompressed_variant(static_root, hashed_css):
+    response = wsgi_get(hashed_css, accept_encoding='gzip, deflate')
+    assert response['headers']['Content-Encoding'] == 'gzip'
+    assert response['headers']['Cache-Control'] == IMMUTABLE
+    assert response['headers']['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(response['body']) == (
+        static_root / hashed_css
+    ).read_bytes()
+
+
+def test_serves_identity_without_accept_encoding(static_root, hashed_css):
+    response = wsgi_get(hashed_css, accept_encoding='gzip;q=0')
+    assert 'Content-Encoding' not in response['headers']
+    assert response['body'] == (static_root / hashed_css).read_bytes()
+
+
+def test_not_modified(static_root, hashed_css):
+    etag = wsgi_get(hashed_css)['headers']['ETag']
+    response = wsgi_get(hashed_css, if_none_match=etag)
+    assert response['status'].startswith('304')
+    assert response['body'] == b''
+
+
+@pytest.mark.parametrize('path', ('missing.css', '../settings.py', ''))
+def test_unknown_files_fall_through(static_root, path):
+    assert wsgi_get(path)['body'] == b'django'
+
+
+def test_brotli_variant(static_root, hashed_css):
+    brotli = pytest.importorskip('brotli')
+    response = wsgi_get(hashed_css, accept_encoding='gzip, br')
+    assert response['headers']['Content-Encoding'] == 'br'
+    assert brotli.decompress(response['body']) == (
+        static_root / hashed_css
+    ).read_bytes()
+
+
+def test_asgi_serves_precompressed_variant(static_root, hashed_css):
+    async def django_app(scope, receive, send):
+        raise AssertionError('Статика не должна доходить до Django.')
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': '/static/' + hashed_css,
+        'headers': [(b'accept-encoding', b'gzip')],
+    }
+    asyncio.run(StaticFilesASGI(django_app)(scope, None, send))
+    start, *body = messages
+    assert start['status'] == 200
+    assert (b'content-encoding', b'gzip') in start['headers']
+    content = b''.join(message['body'] for message in body)
+    assert gzip.decompress(content) == (static_root / hashed_css).read_bytes()
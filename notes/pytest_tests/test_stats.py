@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from notes.models import Note, NoteStats
+from notes.stats import get_note_stats, recompute_chunk
+
+
+def stats_of(user):
+    stats = get_note_stats(user)
+    return stats.note_count, stats.total_chars
+
+
+@pytest.mark.django_db
+def test_save_and_delete_update_stats(author, note):
+    assert stats_of(author) == (1, len('Текст заметки'))
+    assert get_note_stats(author).last_edited is not None
+    note.text = 'Короче'
+    note.save()
+    assert stats_of(author) == (1, len('Короче'))
+    # Прежние значения всегда берутся из базы: объект мог устареть.
+    stale = Note.objects.get(pk=note.pk)
+    note.text = 'Заметно длиннее прежнего'
+    note.save()
+    stale.text = 'Коротко'
+    stale.save()
+    assert stats_of(author) == (1, len('Коротко'))
+    # Заметка без загруженной длины.
+    summary = Note.objects.summary().get(pk=note.pk)
+    summary.text = 'Снова длиннее'
+    summary.save()
+    assert stats_of(author) == (1, len('Снова длиннее'))
+    Note.objects.get(pk=note.pk).delete()
+    assert stats_of(author) == (0, 0)
+
+
+@pytest.mark.django_db
+def test_author_change_moves_stats(author, not_author, note):
+    note.author = not_author
+    note.save()
+    assert stats_of(author) == (0, 0)
+    assert stats_of(not_author) == (1, len('Текст заметки'))
+
+
+@pytest.mark.django_db
+def test_bulk_paths_update_stats(author, not_author):
+    Note.objects.bulk_create([
+        Note(title='Раз', text='12345', author=author),
+        Note(title='Два', text='123', author=author),
+        Note(title='Три', text='1', author=not_author),
+    ])
+    assert stats_of(author) == (2, 8)
+    assert stats_of(not_author) == (1, 1)
+    Note.objects.filter(title__in=('Раз', 'Три')).delete()
+    assert stats_of(author) == (1, 3)
+    assert stats_of(not_author) == (0, 0)
+
+
+@pytest.mark.django_db
+def test_recompute_repairs_drift(author, not_author, note):
+    NoteStats.objects.filter(user=author).update(note_count=7)
+    NoteStats.objects.create(user=not_author, note_count=2, total_chars=5)
+    assert recompute_chunk(author.pk) == 2
+    assert stats_of(author) == (1, len('Текст заметки'))
+    assert stats_of(not_author) == (0, 0)
+    out = StringIO()
+    call_command('recompute_note_stats', chunk_size=1, stdout=out)
+    assert 'исправлено строк: 0' in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_home_shows_stats_without_aggregates(author_client, note):
+    with CaptureQueriesContext(connection) as queries:
+        response = author_client.get(reverse('notes:home'))
+    assert response.context['note_stats'].note_count == 1
+    assert 'id="note-stats"' in response.content.decode()
+    assert not any(
+        '"notes_note"' in query['sql'] for query in queries.captured_queries
+    )
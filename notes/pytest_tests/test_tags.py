@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from notes.models import Note, NoteTag, Tag, TagCount
+from notes.tags import get_tag_counts, parse_tags, set_note_tags
+
+
+def counts(author):
+    return {
+        tag_count.tag.name: tag_count.count
+        for tag_count in get_tag_counts(author)
+    }
+
+
+@pytest.fixture
+def tagged_notes(author, not_author):
+    notes = [
+        Note.objects.create(title=f'Заметка {index}', text='Текст',
+                            author=author)
+        for index in range(3)
+    ]
+    set_note_tags(notes[0], ['работа', 'идеи'])
+    set_note_tags(notes[1], ['работа'])
+    other = Note.objects.create(title='Чужая', text='Текст',
+                                author=not_author)
+    set_note_tags(other, ['работа'])
+    return notes
+
+
+def test_parse_tags():
+    assert parse_tags(' Работа ,идеи,  работа,, Мои   Идеи ') == [
+        'работа', 'идеи', 'мои идеи'
+    ]
+
+
+def test_counts_follow_tag_changes(author, not_author, tagged_notes):
+    assert counts(author) == {'работа': 2, 'идеи': 1}
+    assert counts(not_author) == {'работа': 1}
+    set_note_tags(tagged_notes[0], ['идеи', 'планы'])
+    assert counts(author) == {'работа': 1, 'идеи': 1, 'планы': 1}
+    assert Tag.objects.filter(name='работа').count() == 1
+
+
+def test_counts_follow_deletes(author, not_author, tagged_notes):
+    tagged_notes[0].delete()
+    assert counts(author) == {'работа': 1}
+    Note.objects.filter(author=author).delete()
+    assert counts(author) == {}
+    assert counts(not_author) == {'работа': 1}
+    assert not NoteTag.objects.filter(author=author).exists()
+
+
+def check_tag_filter(client, url, tagged_notes):
+    response = client.get(url, {'tag': 'работа'})
+    assert set(response.context['object_list']) == set(tagged_notes[:2])
+    assert response.context['tag_filter'] == ['работа']
+    response = client.get(url + '?tag=работа&tag=Идеи')
+    assert list(response.context['object_list']) == [tagged_notes[0]]
+
+
+def test_author_change_moves_tags(author, not_author, not_author_client,
+                                  tagged_notes):
+    note = tagged_notes[0]
+    note.author = not_author
+    note.save()
+    assert counts(author) == {'работа': 1}
+    assert counts(not_author) == {'работа': 2, 'идеи': 1}
+    assert set(
+        NoteTag.objects.filter(note=note).values_list('author', flat=True)
+    ) == {not_author.id}
+    response = not_author_client.get(reverse('notes:list'), {'tag': 'идеи'})
+    assert list(response.context['object_list']) == [note]
+
+
+def test_list_filtered_by_tag(author_client, tagged_notes):
+    check_tag_filter(author_client, reverse('notes:list'), tagged_notes)
+
+
+# Асинхронный список читает базу в потоках пула: данные закоммичены.
+@pytest.mark.django_db(transaction=True)
+def test_async_list_filtered_by_tag(author_client, tagged_notes):
+    check_tag_filter(
+        author_client, reverse('notes:async_list'), tagged_notes
+    )
+
+
+def test_tag_sidebar_has_no_group_by(author, tagged_notes):
+    with CaptureQueriesContext(connection) as captured:
+        counts(author)
+    sql, = [query['sql'] for query in captured.captured_queries]
+    assert 'GROUP BY' not in sql
+
+
+def test_form_sets_and_keeps_tags(author_client, author, form_data):
+    form_data['tags'] = 'Работа, идеи'
+    author_client.post(reverse('notes:add'), data=form_data)
+    note = Note.objects.get()
+    assert set(note.tags.values_list('name', flat=True)) == {
+        'работа', 'идеи'
+    }
+    response = author_client.get(reverse('notes:edit', args=(note.slug,)))
+    assert response.context['form'].initial['tags'] == 'идеи, работа'
+    assert TagCount.objects.get(author=author, tag__name='идеи').count == 1
@@ -0,0 +1,133 @@
+"""
+История изменений заметок с хранением дельт.
+
+Дельта — JSON-список операций над строками предыдущей версии: пара
+[начало, конец] копирует диапазон строк, строка вставляет новый текст.
+Раз в NOTES_REVISION_SNAPSHOT_EVERY версий текст сохраняется целиком,
+поэтому восстановление любой версии требует не больше K применений
+дельт, независимо от длины истории.
+"""
+import json
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+
+from .models import NoteRevision
+
+
+def make_delta(old, new):
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    delta = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            delta.append(''.join(new_lines[j1:j2]))
+    return json.dumps(delta, ensure_ascii=False, separators=(',', ':'))
+
+
+def apply_delta(old, delta):
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    for operation in json.loads(delta):
+        if isinstance(operation, str):
+            parts.append(operation)
+        else:
+            start, end = operation
+            parts.extend(old_lines[start:end])
+    return ''.join(parts)
+
+
+def is_snapshot_number(number):
+    return (number - 1) % settings.NOTES_REVISION_SNAPSHOT_EVERY == 0
+
+
+def rebuild_text(revisions):
+    """Текст последней версии из снимка и следующих за ним дельт."""
+    text = None
+    for revision in revisions:
+        if revision.is_snapshot:
+            text = revision.data
+        else:
+            text = apply_delta(text, revision.data)
+    return text
+
+
+def get_revision(note, number):
+    """Возвращает версию с восстановленным текстом в атрибуте text."""
+    chain = list(
+        NoteRevision.objects.filter(
+            note=note,
+            number__lte=number,
+            number__gte=NoteRevision.objects.filter(
+                note=note, number__lte=number, is_snapshot=True
+            ).order_by('-number').values('number')[:1],
+        ).order_by('number')
+    )
+    if not chain or chain[-1].number != number:
+        raise Http404('Версия не найдена.')
+    revision = chain[-1]
+    revision.text = rebuild_text(chain)
+    return revision
+
+
+def last_revision_number(note):
+    """Номер последней версии заметки; 0, если версий нет."""
+    return note.revisions.order_by('-number').values_list(
+        'number', flat=True
+    ).first() or 0
+
+
+def record_revision(note):
+    """
+    Сохраняет текущее состояние заметки новой версией, если оно новое.
+
+    Строка заметки блокируется до конца транзакции сохранения, поэтому
+    параллельные сохранения получают номера версий по очереди, а не
+    одинаковый номер и IntegrityError.
+    """
+    with transaction.atomic():
+        type(note).objects.select_for_update().filter(
+            pk=note.pk
+        ).values_list('pk', flat=True).first()
+        last = note.revisions.order_by('-number').first()
+        if last is None:
+            return NoteRevision.objects.create(
+                note=note,
+                number=1,
+                title=note.title,
+                is_snapshot=True,
+                data=note.text,
+            )
+        previous = get_revision(note, last.number)
+        if previous.text == note.text and previous.title == note.title:
+            return None
+        number = last.number + 1
+        snapshot = is_snapshot_number(number)
+        return NoteRevision.objects.create(
+            note=note,
+            number=number,
+            title=note.title,
+            is_snapshot=snapshot,
+            data=(
+                note.text if snapshot
+                else make_delta(previous.text, note.text)
+            ),
+        )
+
+
+def record_initial_revisions(notes):
+    NoteRevision.objects.bulk_create(
+        NoteRevision(
+            note_id=note.pk,
+            number=1,
+            title=note.title,
+            is_snapshot=True,
+            data=note.text,
+        )
+        for note in notes
+    )
@@ -0,0 +1,120 @@
+"""
+Маршрутизация чтения заметок на реплики.
+
+Чтение моделей приложения notes уходит на одну из реплик из
+NOTES_DATABASE_REPLICAS, запись и всё остальное — на default. После
+записи пользователь на NOTES_REPLICA_PIN_SECONDS закрепляется за
+основной базой, чтобы сразу видеть свои изменения, пока реплика
+догоняет.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .middleware import AsyncCapableMiddleware
+
+PIN_PREFIX = 'notes:primary-pin'
+
+
+class PinState:
+    """
+    Закрепление за основной базой в рамках одного запроса.
+
+    Создаётся только в ReplicaPinningMiddleware: вне запроса (воркеры
+    очереди, команды) состояния нет, и запись ничего не закрепляет.
+    """
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+request_pin = ContextVar('request_pin', default=None)
+
+
+class PrimaryReplicaRouter:
+    app_label = 'notes'
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.NOTES_DATABASE_REPLICAS
+        if model._meta.app_label != self.app_label or not replicas:
+            return None
+        state = request_pin.get()
+        if state is not None and (state.pinned or state.wrote):
+            return DEFAULT_DB_ALIAS
+        # Внутри транзакции читаем то же, что в неё пишем.
+        if transaction.get_connection(DEFAULT_DB_ALIAS).in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = request_pin.get()
+        if state is not None and model._meta.app_label == self.app_label:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.NOTES_DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def pin_key(session_key):
+    return f'{PIN_PREFIX}:{session_key}'
+
+
+class ReplicaPinningMiddleware(AsyncCapableMiddleware):
+    """
+    Закрепляет за основной базой клиента, который недавно писал.
+
+    Клиент определяется по cookie сессии, поэтому проверка не требует
+    обращения к базе.
+    """
+
+    def handle(self, request):
+        state = PinState(self.is_pinned(request))
+        token = request_pin.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_pin.reset(token)
+        if state.wrote:
+            self.pin(request)
+        return response
+
+    async def ahandle(self, request):
+        # Кэш Django 3.2 синхронный: memcached не должен блокировать цикл.
+        state = PinState(await sync_to_async(self.is_pinned)(request))
+        token = request_pin.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_pin.reset(token)
+        if state.wrote:
+            await sync_to_async(self.pin)(request)
+        return response
+
+    def is_pinned(self, request):
+        session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        return bool(session_key) and bool(
+            caches[settings.NOTES_CACHE_ALIAS].get(pin_key(session_key))
+        )
+
+    def pin(self, request):
+        # После входа ключ сессии меняется, поэтому берём актуальный.
+        session = getattr(request, 'session', None)
+        session_key = (
+            session.session_key if session is not None
+            else request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        )
+        if session_key:
+            caches[settings.NOTES_CACHE_ALIAS].set(
+                pin_key(session_key),
+                True,
+                timeout=settings.NOTES_REPLICA_PIN_SECONDS,
+            )
@@ -0,0 +1,171 @@
+"""Полнотекстовый поиск по заметкам на инвертированном индексе."""
+import re
+from collections import Counter
+from functools import reduce
+from hashlib import sha1
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Q, Sum, When
+
+from .models import Note, SearchDocument, SearchTerm
+
+TITLE_WEIGHT = 3
+TEXT_WEIGHT = 1
+MAX_TERM_LENGTH = SearchTerm._meta.get_field('term').max_length
+PREFIX_MARK = '*'
+BULK_BATCH_SIZE = 1000
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Разбивает текст на нормализованные слова."""
+    return [word[:MAX_TERM_LENGTH] for word in WORD_RE.findall(text.lower())]
+
+
+def get_checksum(note):
+    # Автор входит в сумму: от него зависит SearchTerm.author.
+    return sha1(
+        f'{note.author_id}\0{note.title}\0{note.text}'.encode()
+    ).hexdigest()
+
+
+def get_weights(note):
+    """Вес слова: число вхождений с учётом важности поля."""
+    weights = Counter()
+    for term in tokenize(note.title):
+        weights[term] += TITLE_WEIGHT
+    for term in tokenize(note.text):
+        weights[term] += TEXT_WEIGHT
+    return weights
+
+
+def index_note(note, checksum=None, document=None):
+    """
+    Переиндексирует заметку, если её содержимое изменилось.
+
+    Возвращает True, если индекс пришлось обновить.
+    """
+    checksum = checksum or get_checksum(note)
+    if document is None:
+        document = SearchDocument.objects.filter(note_id=note.pk).first()
+    if document is not None and document.checksum == checksum:
+        return False
+    with transaction.atomic():
+        if document is None:
+            document = SearchDocument.objects.create(
+                note_id=note.pk, checksum=checksum
+            )
+        else:
+            document.terms.all().delete()
+            document.checksum = checksum
+            document.save(update_fields=('checksum',))
+        SearchTerm.objects.bulk_create(
+            SearchTerm(
+                document=document,
+                author_id=note.author_id,
+                term=term,
+                weight=weight,
+            )
+            for term, weight in get_weights(note).items()
+        )
+    return True
+
+
+def index_new_notes(notes):
+    """Индексирует только что созданные заметки пачкой запросов."""
+    with transaction.atomic():
+        documents = SearchDocument.objects.bulk_create(
+            SearchDocument(note_id=note.pk, checksum=get_checksum(note))
+            for note in notes
+        )
+        SearchTerm.objects.bulk_create(
+            (
+                SearchTerm(
+                    document_id=note.pk,
+                    author_id=note.author_id,
+                    term=term,
+                    weight=weight,
+                )
+                for note in notes
+                for term, weight in get_weights(note).items()
+            ),
+            batch_size=BULK_BATCH_SIZE,
+        )
+    return documents
+
+
+def parse_query(query):
+    """
+    Возвращает список условий на слово индекса.
+
+    Слово со звёздочкой на конце (``заме*``) ищется по префиксу.
+    """
+    conditions = []
+    for raw in query.split():
+        terms = tokenize(raw)
+        if not terms:
+            continue
+        for term in terms[:-1]:
+            conditions.append(term_condition(term))
+        conditions.append(
+            term_condition(terms[-1], raw.endswith(PREFIX_MARK))
+        )
+    return conditions
+
+
+def term_condition(term, is_prefix=False):
+    if not is_prefix:
+        return Q(term=term)
+    # Диапазон вместо LIKE, чтобы работали индексы по слову.
+    upper = term[:-1] + chr(ord(term[-1]) + 1)
+    return Q(term__gte=term, term__lt=upper)
+
+
+def rank_documents(query, author=None, limit=50):
+    """
+    Id заметок, содержащих все слова запроса, с их релевантностью.
+
+    Без автора поиск идёт по заметкам всех пользователей, по индексу на
+    слово; это нужно админке.
+    """
+    conditions = parse_query(query)
+    if not conditions:
+        return {}
+    matched = {
+        f'match_{index}': Max(Case(
+            When(condition, then=1),
+            default=0,
+            output_field=IntegerField(),
+        ))
+        for index, condition in enumerate(conditions)
+    }
+    terms = SearchTerm.objects.all()
+    if author is not None:
+        terms = terms.filter(author=author)
+    ranked = (
+        terms
+        .filter(reduce(or_, conditions))
+        .values('document_id')
+        .annotate(score=Sum('weight'), **matched)
+        .filter(**{name: 1 for name in matched})
+        .order_by('-score', 'document_id')[:limit]
+    )
+    return {row['document_id']: row['score'] for row in ranked}
+
+
+def search(author, query, limit=50):
+    """
+    Ищет заметки автора, содержащие все слова запроса.
+
+    Возвращает список заметок по убыванию релевантности; у каждой
+    заметки выставлен атрибут ``score``.
+    """
+    scores = rank_documents(query, author, limit)
+    if not scores:
+        return []
+    notes = Note.objects.summary().filter(author=author, id__in=scores)
+    for note in notes:
+        note.score = scores[note.id]
+    return sorted(notes, key=lambda note: (-note.score, note.id))
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache
+from .auth import invalidate_user
+from .db import configure_connection
+from .models import Note, post_bulk_create
+from .revisions import record_initial_revisions, record_revision
+from .search import index_new_notes, index_note
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    configure_connection(connection)
+
+
+@receiver(post_save, sender=Note)
+def update_search_index(sender, instance, **kwargs):
+    """Поддерживает поисковый индекс в актуальном состоянии."""
+    index_note(instance)
+
+
+@receiver(post_save, sender=Note)
+def save_revision(sender, instance, update_fields=None, **kwargs):
+    """Каждое изменение заголовка или текста попадает в историю."""
+    if update_fields is None or {'title', 'text'} & set(update_fields):
+        record_revision(instance)
+
+
+@receiver(post_save, sender=Note)
+def invalidate_pages_on_save(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш страниц списка и заметки, в том числе по старому slug
+    и у прежнего автора.
+    """
+    loaded_slug = getattr(instance, '_loaded_slug', None)
+    cache.invalidate(instance.author_id, instance.slug, loaded_slug)
+    loaded_author_id = getattr(instance, '_loaded_author_id', None)
+    if loaded_author_id not in (None, instance.author_id):
+        cache.invalidate(loaded_author_id, instance.slug, loaded_slug)
+    instance._loaded_slug = instance.slug
+    instance._loaded_author_id = instance.author_id
+
+
+@receiver(post_delete, sender=Note)
+def invalidate_pages_on_delete(sender, instance, **kwargs):
+    cache.invalidate(instance.author_id, instance.slug)
+
+
+@receiver(post_bulk_create, sender=Note)
+def update_after_bulk_create(sender, instances, **kwargs):
+    index_new_notes(instances)
+    record_initial_revisions(instances)
+    for author_id in {note.author_id for note in instances}:
+        cache.invalidate(author_id)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Смена пароля и других данных сразу видна при следующем запросе."""
+    invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_user_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
@@ -0,0 +1,48 @@
+"""Выбор уникального slug без предварительных запросов к базе."""
+from secrets import token_hex
+
+from pytils.translit import slugify
+
+DEFAULT_SLUG = 'note'
+SUFFIX_BYTES = 3
+MAX_ATTEMPTS = 5
+
+
+def base_slug(title, max_length):
+    """Slug из заголовка, как его формировал проект изначально."""
+    return slugify(title)[:max_length] or DEFAULT_SLUG
+
+
+def suffixed_slug(base, max_length):
+    """Slug с коротким случайным хвостом для разрешения коллизий."""
+    suffix = token_hex(SUFFIX_BYTES)
+    return f'{base[:max_length - len(suffix) - 1]}-{suffix}'
+
+
+def candidate_slugs(title, max_length, attempts=MAX_ATTEMPTS):
+    """
+    Кандидаты в порядке предпочтения.
+
+    Первым идёт чистый slug из заголовка, затем варианты со случайным
+    суффиксом. Уникальность гарантирует ограничение в базе: вызывающий
+    код пробует сохранить кандидата и берёт следующий при IntegrityError.
+    """
+    base = base_slug(title, max_length)
+    yield base
+    for _ in range(attempts):
+        yield suffixed_slug(base, max_length)
+
+
+def assign_slugs(notes, taken, max_length):
+    """
+    Подбирает slug заметкам без slug, сверяясь с множеством занятых.
+
+    Множество ``taken`` пополняется выданными значениями, поэтому его
+    можно переиспользовать между пачками при массовой загрузке.
+    """
+    for note in notes:
+        slug = base_slug(note.title, max_length)
+        while slug in taken:
+            slug = suffixed_slug(slug, max_length)
+        taken.add(slug)
+        note.slug = slug
@@ -0,0 +1,213 @@
+"""
+Раздача статики прямо из WSGI/ASGI-приложения.
+
+Файлы берутся из STATIC_ROOT, а если collectstatic ещё не запускали, —
+через finders из исходных каталогов. Клиент, который принимает br или
+gzip, получает заранее сжатую копию файла, если она есть. Файлы с хешем
+в имени из манифеста кэшируются браузером на год.
+"""
+import asyncio
+import json
+import mimetypes
+import os
+from urllib.parse import unquote
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+from django.utils.http import http_date
+
+BLOCK_SIZE = 64 * 1024
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def parse_accept_encoding(value):
+    accepted = set()
+    for part in value.split(','):
+        encoding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class StaticResponse:
+
+    def __init__(self, status, headers, path=None):
+        self.status = status
+        self.headers = headers
+        self.path = path
+
+
+class StaticFiles:
+    """Находит файл по адресу запроса и готовит заголовки ответа."""
+
+    def __init__(self, root=None, prefix=None):
+        self.root = str(root or settings.STATIC_ROOT or '')
+        self.prefix = prefix or settings.STATIC_URL
+        self.immutable = self.load_manifest()
+
+    def load_manifest(self):
+        if not self.root:
+            return set()
+        try:
+            with open(os.path.join(self.root, 'staticfiles.json')) as file:
+                return set(json.load(file)['paths'].values())
+        except (OSError, ValueError, KeyError):
+            return set()
+
+    def matches(self, path):
+        return path.startswith(self.prefix)
+
+    def find(self, name):
+        try:
+            if self.root:
+                path = safe_join(self.root, name)
+                if os.path.isfile(path):
+                    return path
+            return finders.find(name)
+        except SuspiciousFileOperation:
+            return None
+
+    def choose_variant(self, source, accepted):
+        """Сжатая копия, которую принимает клиент, или сам файл."""
+        variants = [
+            (encoding, source + extension)
+            for encoding, extension in ENCODINGS
+            if os.path.isfile(source + extension)
+        ]
+        if not variants:
+            return source, []
+        headers = [('Vary', 'Accept-Encoding')]
+        for encoding, path in variants:
+            if encoding in accepted:
+                return path, [('Content-Encoding', encoding), *headers]
+        return source, headers
+
+    def serve(self, method, path, get_header):
+        """
+        Ответ на запрос статики или None, если такого файла нет.
+
+        get_header(name) возвращает значение заголовка запроса или ''.
+        """
+        name = unquote(path[len(self.prefix):])
+        if not name or name.endswith(('.gz', '.br')):
+            return None
+        source = self.find(name)
+        if source is None:
+            return None
+        if method not in ('GET', 'HEAD'):
+            return StaticResponse(405, [('Allow', 'GET, HEAD')])
+        content_type, _ = mimetypes.guess_type(name)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/'):
+            content_type += '; charset=utf-8'
+        headers = [('Content-Type', content_type)]
+        chosen, encoding_headers = self.choose_variant(
+            source, parse_accept_encoding(get_header('accept-encoding'))
+        )
+        headers += encoding_headers
+        stat = os.stat(chosen)
+        etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        headers += [
+            ('ETag', etag),
+            ('Last-Modified', http_date(stat.st_mtime)),
+            ('Cache-Control', (
+                IMMUTABLE if name in self.immutable
+                else f'public, max-age={settings.NOTES_STATIC_MAX_AGE}'
+            )),
+        ]
+        if etag in get_header('if-none-match'):
+            return StaticResponse(304, headers)
+        headers.append(('Content-Length', str(stat.st_size)))
+        if method == 'HEAD':
+            return StaticResponse(200, headers)
+        return StaticResponse(200, headers, chosen)
+
+
+STATUS_LINES = {
+    200: '200 OK',
+    304: '304 Not Modified',
+    405: '405 Method Not Allowed',
+}
+
+
+class StaticFilesWSGI:
+    """Обёртка WSGI-приложения, отдающая статику в обход Django."""
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.files = StaticFiles(root, prefix)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        response = None
+        if self.files.matches(path):
+            response = self.files.serve(
+                environ['REQUEST_METHOD'],
+                path,
+                lambda name: environ.get(
+                    'HTTP_' + name.upper().replace('-', '_'), ''
+                ),
+            )
+        if response is None:
+            return self.application(environ, start_response)
+        start_response(STATUS_LINES[response.status], response.headers)
+        if response.path is None:
+            return []
+        wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return wrapper(open(response.path, 'rb'), BLOCK_SIZE)
+
+
+class StaticFilesASGI:
+    """Обёртка ASGI-приложения, отдающая статику в обход Django."""
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.files = StaticFiles(root, prefix)
+
+    async def __call__(self, scope, receive, send):
+        response = None
+        if scope['type'] == 'http' and self.files.matches(scope['path']):
+            headers = {
+                key.decode('latin-1').lower(): value.decode('latin-1')
+                for key, value in scope.get('headers', ())
+            }
+            response = await asyncio.to_thread(
+                self.files.serve,
+                scope['method'],
+                scope['path'],
+                lambda name: headers.get(name, ''),
+            )
+        if response is None:
+            return await self.application(scope, receive, send)
+        await send({
+            'type': 'http.response.start',
+            'status': response.status,
+            'headers': [
+                (key.lower().encode('latin-1'), value.encode('latin-1'))
+                for key, value in response.headers
+            ],
+        })
+        if response.path is None:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        with open(response.path, 'rb') as file:
+            while True:
+                chunk = await asyncio.to_thread(file.read, BLOCK_SIZE)
+                more_body = len(chunk) == BLOCK_SIZE
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': more_body,
+                })
+                if not more_body:
+                    break
@@ -0,0 +1,69 @@
+"""
+Хранилище статики с хешами в именах и заранее сжатыми копиями.
+
+collectstatic пишет рядом с каждым текстовым файлом его .gz, а если
+установлен пакет brotli, ещё и .br. Сжатая копия сохраняется, только если
+она заметно меньше оригинала.
+"""
+import gzip
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def gzip_compress(data):
+    # mtime=0 делает архив воспроизводимым между сборками.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=11)
+
+
+def get_compressors():
+    compressors = [('.gz', gzip_compress)]
+    if brotli is not None:
+        compressors.append(('.br', brotli_compress))
+    return compressors
+
+
+def should_compress(name):
+    return name.rsplit('.', 1)[-1].lower() in (
+        settings.NOTES_STATIC_COMPRESS_EXTENSIONS
+    )
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = [
+            name for name in (*paths, *self.hashed_files.values())
+            if should_compress(name)
+        ]
+        for name in dict.fromkeys(names):
+            for compressed_name in self.compress(name):
+                yield name, compressed_name, True
+
+    def compress(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < settings.NOTES_STATIC_COMPRESS_MIN_SIZE:
+            return
+        for extension, compressor in get_compressors():
+            compressed = compressor(data)
+            if len(compressed) >= len(data) * 0.95:
+                continue
+            compressed_name = name + extension
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            yield compressed_name
@@ -0,0 +1,90 @@
+"""
+Статистика заметок пользователей.
+
+Счётчики NoteStats поддерживаются при каждом изменении заметок. Если они
+всё же разошлись с таблицей Note (правка базы в обход модели, массовая
+вставка с ignore_conflicts), recompute_chunk пересчитывает их для
+диапазона пользователей.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+
+from .models import Note, NoteRevision, NoteStats
+
+
+def get_note_stats(user):
+    """Статистика пользователя; пустая, если заметок у него не было."""
+    stats = NoteStats.objects.filter(user=user).first()
+    return stats or NoteStats(user=user)
+
+
+def user_id_ranges(chunk_size):
+    """Полуинтервалы [начало, конец) id пользователей по chunk_size штук."""
+    ids = get_user_model().objects.order_by('id').values_list('id', flat=True)
+    start = None
+    for number, user_id in enumerate(ids.iterator(chunk_size)):
+        if number % chunk_size == 0:
+            if start is not None:
+                yield start, user_id
+            start = user_id
+    if start is not None:
+        yield start, None
+
+
+def fill_last_edited(stats_list):
+    """Время последнего изменения по истории версий заметок."""
+    stats_list = {stats.user_id: stats for stats in stats_list}
+    rows = NoteRevision.objects.filter(
+        note__author_id__in=stats_list
+    ).values('note__author_id').annotate(last=Max('created')).order_by()
+    for row in rows:
+        stats_list[row['note__author_id']].last_edited = row['last']
+
+
+def recompute_chunk(start, end=None):
+    """
+    Пересчитывает статистику пользователей с id в [start, end).
+
+    Строки статистики блокируются на время пересчёта, чтобы параллельные
+    изменения заметок не потерялись. Возвращает число исправленных строк.
+    """
+    users = {'user_id__gte': start}
+    authors = {'author_id__gte': start}
+    if end is not None:
+        users['user_id__lt'] = end
+        authors['author_id__lt'] = end
+    with transaction.atomic():
+        # Пустое обновление блокирует строки до чтения; SQLite при этом
+        # сразу берёт блокировку записи, и параллельные пачки ждут друг
+        # друга, а не падают на повышении блокировки чтения.
+        NoteStats.objects.filter(**users).update(note_count=F('note_count'))
+        current = {
+            stats.user_id: stats
+            for stats in NoteStats.objects.filter(**users)
+        }
+        rows = Note.objects.filter(**authors).values('author_id').annotate(
+            note_count=Count('id'),
+            total_chars=Sum('length'),
+        ).order_by()
+        changed = []
+        for row in rows:
+            stats = current.pop(row['author_id'], None)
+            if stats is None:
+                stats = NoteStats(user_id=row['author_id'])
+            expected = (row['note_count'], row['total_chars'] or 0)
+            if (stats.note_count, stats.total_chars) == expected:
+                continue
+            stats.note_count, stats.total_chars = expected
+            changed.append(stats)
+        # У оставшихся пользователей заметок больше нет.
+        for stats in current.values():
+            if stats.note_count or stats.total_chars:
+                stats.note_count = stats.total_chars = 0
+                changed.append(stats)
+        fill_last_edited(
+            stats for stats in changed if stats.last_edited is None
+        )
+        for stats in changed:
+            stats.save()
+    return len(changed)
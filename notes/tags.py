@@ -0,0 +1,78 @@
+"""
+Теги заметок.
+
+Счётчики TagCount меняются на каждое добавление и удаление связи
+NoteTag, поэтому список тегов пользователя с числом заметок читается
+одним запросом по индексу, без GROUP BY по всем заметкам.
+"""
+from django.db import transaction
+
+from . import cache
+from .models import (NoteTag, Tag, TagCount, decrement_tag_counts,
+                     increment_tag_counts)
+
+TAG_MAX_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def normalize_tag(name):
+    return ' '.join(name.split()).lower()[:TAG_MAX_LENGTH].strip()
+
+
+def parse_tags(value):
+    """Список уникальных нормализованных тегов из строки через запятую."""
+    tags = (normalize_tag(name) for name in value.split(','))
+    return list(dict.fromkeys(tag for tag in tags if tag))
+
+
+def get_tags(names):
+    """Теги по именам; недостающие создаются."""
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in names], ignore_conflicts=True
+    )
+    return Tag.objects.in_bulk(names, field_name='name')
+
+
+def set_note_tags(note, names):
+    """Заменяет теги заметки на names, меняя только разницу."""
+    with transaction.atomic():
+        current = dict(
+            NoteTag.objects.filter(note=note).values_list(
+                'tag__name', 'tag_id'
+            )
+        )
+        added = [name for name in names if name not in current]
+        removed = [
+            tag_id for name, tag_id in current.items() if name not in names
+        ]
+        if removed:
+            note_tags = NoteTag.objects.filter(note=note, tag_id__in=removed)
+            decrement_tag_counts(note_tags)
+            note_tags.delete()
+        if added:
+            tags = get_tags(added)
+            NoteTag.objects.bulk_create(
+                NoteTag(note=note, tag=tags[name], author_id=note.author_id)
+                for name in added
+            )
+            increment_tag_counts(
+                note.author_id, [tag.id for tag in tags.values()]
+            )
+    if added or removed:
+        cache.invalidate(note.author_id, note.slug)
+
+
+def get_tag_counts(author):
+    return TagCount.objects.filter(author=author, count__gt=0).select_related(
+        'tag'
+    ).order_by('tag__name')
+
+
+def filter_by_tags(queryset, author, names):
+    """Заметки со всеми тегами из names."""
+    for name in names:
+        queryset = queryset.filter(
+            id__in=NoteTag.objects.filter(
+                author=author, tag__name=name
+            ).values('note_id')
+        )
+    return queryset
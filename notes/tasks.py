@@ -0,0 +1,84 @@
+"""Тяжёлые операции с заметками, которые выполняются воркерами очереди."""
+import os
+from io import StringIO
+from tempfile import TemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+
+from .export import EXPORT_FORMATS, export_stream
+from .jobs import task
+from .models import Note
+
+# Задачи, которые пользователь может поставить в очередь через API.
+USER_TASKS = ('export_notes', 'delete_notes')
+
+
+def export_name(job):
+    _, _, extension = EXPORT_FORMATS[job.payload.get('format', 'ndjson')]
+    return f'exports/{job.id}.{extension}'
+
+
+@task('export_notes')
+def export_notes(job):
+    """Выгрузка заметок пользователя в файл хранилища."""
+    export_format = job.payload.get('format', 'ndjson')
+    name = export_name(job)
+    default_storage.delete(name)
+    with TemporaryFile() as file:
+        for chunk in export_stream(
+            Note.objects.filter(author=job.user), export_format
+        ):
+            file.write(chunk)
+        size = file.tell()
+        name = default_storage.save(name, File(file))
+    return {'file': name, 'size': size}
+
+
+@task('import_notes')
+def import_notes(job):
+    """
+    Загрузка заметок из файла хранилища командой import_notes.
+
+    Контрольная точка лежит рядом с файлом, так что повтор после сбоя
+    продолжает загрузку, а не начинает её сначала.
+    """
+    path = default_storage.path(job.payload['file'])
+    checkpoint = f'{path}.checkpoint'
+    out = StringIO()
+    call_command(
+        'import_notes',
+        path,
+        user=job.user.username,
+        import_format=job.payload.get('format'),
+        checkpoint=checkpoint,
+        stdout=out,
+    )
+    default_storage.delete(job.payload['file'])
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return {'report': out.getvalue().strip().splitlines()[-1]}
+
+
+@task('delete_notes')
+def delete_notes(job):
+    """Удаление заметок пользователя по списку slug пачками."""
+    slugs = [slug for slug in job.payload.get('slugs', []) if slug]
+    batch_size = settings.NOTES_API_MAX_BATCH
+    deleted = 0
+    for start in range(0, len(slugs), batch_size):
+        deleted += Note.objects.filter(
+            author=job.user, slug__in=slugs[start:start + batch_size]
+        ).delete()[1].get(Note._meta.label, 0)
+    return {'deleted': deleted}
+
+
+@task('rebuild_search_index')
+def rebuild_search_index(job):
+    out = StringIO()
+    call_command(
+        'rebuild_search_index', full=job.payload.get('full', False), stdout=out
+    )
+    return {'report': out.getvalue().strip()}
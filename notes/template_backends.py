@@ -0,0 +1,44 @@
+"""
+Бэкенд шаблонов Django, который учитывает время отрисовки в метриках
+запроса RequestTimingMiddleware.
+
+Время считается только у шаблонов, отрисованных во время запроса с
+включённым замером; вне запроса бэкенд ведёт себя как DjangoTemplates.
+"""
+from time import perf_counter
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from .middleware import current_stats
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        stats = current_stats.get()
+        # Вложенная отрисовка, например render_to_string из тега, уже
+        # входит во время внешнего шаблона.
+        if stats is None or stats.rendering:
+            return super().render(context, request)
+        stats.rendering = True
+        started = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.rendering = False
+            stats.template_ms += (perf_counter() - started) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -33,3 +34,6 @@ class TestCommon(TestCase):
         cls.edit_note_url = reverse('notes:edit', args=(cls.note.slug,))
         cls.delete_url = reverse('notes:delete', args=(cls.note.slug,))
         cls.success_note_url = reverse('notes:success')
+
+    def setUp(self):
+        cache.clear()
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from notes import views
+from notes import api, async_views, views
 
 app_name = 'notes'
 
@@ -8,8 +8,72 @@ urlpatterns = [
     path('', views.Home.as_view(), name='home'),
     path('add/', views.NoteCreate.as_view(), name='add'),
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
+    path(
+        'edit/<slug:slug>/draft/',
+        views.NoteDraftSave.as_view(),
+        name='draft',
+    ),
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
+    path(
+        'note/<slug:slug>/history/',
+        views.NoteHistory.as_view(),
+        name='history',
+    ),
+    path(
+        'note/<slug:slug>/history/<int:number>/',
+        views.NoteRevisionDetail.as_view(),
+        name='revision',
+    ),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path(
+        'export/<str:export_format>/',
+        views.NoteExport.as_view(),
+        name='export',
+    ),
+    path(
+        'async/notes/',
+        async_views.AsyncNotesList.as_view(),
+        name='async_list',
+    ),
+    path(
+        'async/note/<slug:slug>/',
+        async_views.AsyncNoteDetail.as_view(),
+        name='async_detail',
+    ),
+    path('api/notes/', api.NotesApi.as_view(), name='api_list'),
+    path(
+        'api/async/notes/',
+        async_views.AsyncNotesApi.as_view(),
+        name='api_async_list',
+    ),
+    path(
+        'api/notes/update/',
+        api.NotesBulkUpdate.as_view(),
+        name='api_update',
+    ),
+    path(
+        'api/notes/delete/',
+        api.NotesBulkDelete.as_view(),
+        name='api_delete',
+    ),
+    path(
+        'api/notes/<slug:slug>/',
+        api.NoteApiDetail.as_view(),
+        name='api_detail',
+    ),
+    path('api/jobs/', api.JobsApi.as_view(), name='api_jobs'),
+    path(
+        'api/jobs/import/',
+        api.JobImportApi.as_view(),
+        name='api_job_import',
+    ),
+    path('api/jobs/<int:pk>/', api.JobApiDetail.as_view(), name='api_job'),
+    path(
+        'api/jobs/<int:pk>/download/',
+        api.JobDownload.as_view(),
+        name='api_job_download',
+    ),
 ]
@@ -1,15 +1,35 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
+from django.db import IntegrityError, transaction
+from django.http import (Http404, HttpResponse, JsonResponse,
+                         StreamingHttpResponse)
+from django.shortcuts import redirect
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.views import generic
 
-from .forms import NoteForm
+from . import cache
+from .drafts import discard_draft, get_draft, save_draft
+from .export import EXPORT_FORMATS, export_stream
+from .forms import WARNING, NoteForm
 from .models import Note
+from .pagination import CursorPaginator
+from .revisions import get_revision, last_revision_number
+from .search import search
+from .stats import get_note_stats
+from .tags import filter_by_tags, get_tag_counts, parse_tags
 
 
 class Home(generic.TemplateView):
     """Домашняя страница."""
     template_name = 'notes/home.html'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.request.user.is_authenticated:
+            context['note_stats'] = get_note_stats(self.request.user)
+        return context
+
 
 class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
     """Страница успешного выполнения операции."""
@@ -26,22 +46,132 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class CachedPageMixin:
+    """
+    Отдаёт страницу из кэша, пока заметки автора не изменились.
+
+    Страница кэшируется отдельно для каждого пользователя и адреса, а
+    повторный запрос с совпадающим ETag получает ответ 304.
+    """
+    cache_slug_kwarg = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        user_id = request.user.pk
+        path = request.get_full_path()
+        version, modified = cache.get_version(
+            user_id, kwargs.get(self.cache_slug_kwarg)
+        )
+        etag = cache.make_etag(user_id, path, version)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=modified
+        )
+        if response is None:
+            response = self.get_cached_response(
+                request, cache.page_key(user_id, path, version),
+                *args, **kwargs
+            )
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(modified)
+            patch_cache_control(response, private=True, max_age=0)
+        return response
+
+    def get_cached_response(self, request, key, *args, **kwargs):
+        page = cache.get_page(key)
+        if page is not None:
+            return HttpResponse(
+                page['content'], content_type=page['content_type']
+            )
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            if hasattr(response, 'render'):
+                response.render()
+            cache.set_page(key, response)
+        return response
+
+
+class NoteFormMixin(NoteBase):
+    """Общая логика создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """Занятый slug возвращает пользователя к форме с ошибкой."""
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            if not form.instance.slug_is_taken():
+                raise
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
-    """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
+class NoteUpdate(NoteFormMixin, generic.UpdateView):
+    """Редактирование заметки с восстановлением автосохранённого черновика."""
+
+    def get_initial(self):
+        initial = super().get_initial()
+        self.draft = get_draft(self.object)
+        if self.draft is not None:
+            initial.update(
+                title=self.draft['title'], text=self.draft['text']
+            )
+        return initial
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['draft'] = getattr(self, 'draft', None)
+        context['draft_url'] = reverse(
+            'notes:draft', args=(self.object.slug,)
+        )
+        # Версия, с которой начата правка в форме: её помнят черновики.
+        context['draft_revision'] = (
+            context['draft']['revision'] if context['draft']
+            else last_revision_number(self.object)
+        )
+        return context
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if not form.errors:
+            discard_draft(self.object)
+        return response
+
+
+class NoteDraftSave(NoteBase, generic.detail.SingleObjectMixin, generic.View):
+    """
+    Автосохранение формы редактирования.
+
+    Принимает title, text и revision — номер версии заметки, с которой
+    начата правка; flush=1 просит сразу записать черновик в базу,
+    например перед уходом со страницы.
+    """
+
+    def post(self, request, *args, **kwargs):
+        note = self.get_object()
+        title = request.POST.get('title', note.title)
+        max_length = note._meta.get_field('title').max_length
+        revision = request.POST.get('revision', '')
+        flushed = save_draft(
+            note,
+            title[:max_length],
+            request.POST.get('text', note.text),
+            int(revision) if revision.isdigit()
+            else last_revision_number(note),
+            flush=request.POST.get('flush') == '1',
+        )
+        return JsonResponse({'status': 'flushed' if flushed else 'buffered'})
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -49,11 +179,89 @@ class NoteDelete(NoteBase, generic.DeleteView):
     template_name = 'notes/delete.html'
 
 
-class NotesList(NoteBase, generic.ListView):
+class NotesList(NoteBase, CachedPageMixin, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
+    paginate_by = 50
+
+    def get_queryset(self):
+        self.tag_filter = parse_tags(','.join(self.request.GET.getlist('tag')))
+        return filter_by_tags(
+            super().get_queryset().summary(),
+            self.request.user,
+            self.tag_filter,
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tag_filter'] = self.tag_filter
+        context['tag_counts'] = get_tag_counts(self.request.user)
+        return context
 
+    def paginate_queryset(self, queryset, page_size):
+        """Курсорная пагинация вместо постраничной с OFFSET."""
+        paginator = CursorPaginator(queryset, page_size)
+        page = paginator.page(self.request.GET.get('cursor'))
+        return paginator, page, page.object_list, page.has_other_pages()
 
-class NoteDetail(NoteBase, generic.DetailView):
+
+class NoteDetail(NoteBase, CachedPageMixin, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+    cache_slug_kwarg = 'slug'
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        return search(self.request.user, self.request.GET.get('q', ''))
+
+
+class NoteExport(NoteBase, generic.View):
+    """Выгрузка всех заметок пользователя в NDJSON, CSV или ZIP."""
+
+    def get(self, request, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        _, content_type, extension = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            export_stream(self.get_queryset(), export_format),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{extension}"'
+        )
+        return response
+
+
+class NoteHistory(NoteBase, generic.DetailView):
+    """Список версий заметки."""
+    template_name = 'notes/history.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['revisions'] = self.object.revisions.only(
+            'number', 'title', 'created'
+        )
+        return context
+
+
+class NoteRevisionDetail(NoteBase, generic.DetailView):
+    """Версия заметки с возможностью её восстановить."""
+    template_name = 'notes/revision.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['revision'] = get_revision(self.object, self.kwargs['number'])
+        return context
+
+    def post(self, request, *args, **kwargs):
+        """Восстановление сохраняет заметку и создаёт новую версию."""
+        note = self.get_object()
+        revision = get_revision(note, self.kwargs['number'])
+        note.title = revision.title
+        note.text = revision.text
+        note.save()
+        return redirect('notes:detail', slug=note.slug)
@@ -9,8 +9,9 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from notes.handlers import get_asgi_application
+from notes.static_server import StaticFilesASGI
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
 
-application = get_asgi_application()
+application = StaticFilesASGI(get_asgi_application())
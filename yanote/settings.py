@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -23,6 +24,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'notes.middleware.CompressionMiddleware',
+    'notes.middleware.RequestTimingMiddleware',
+    'notes.routers.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -35,7 +39,9 @@ ROOT_URLCONF = 'yanote.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, который отдаёт время отрисовки в метрики
+        # RequestTimingMiddleware.
+        'BACKEND': 'notes.template_backends.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -44,11 +50,27 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'notes.context_processors.fragment_cache',
             ],
         },
     },
 ]
 
+# Профиль шаблонов: default или cached. В cached скомпилированные шаблоны
+# хранятся в памяти процесса независимо от DEBUG.
+TEMPLATE_PROFILE = os.getenv('YANOTE_TEMPLATE_PROFILE', 'default')
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+if TEMPLATE_PROFILE == 'cached':
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
@@ -59,6 +81,162 @@ DATABASES = {
     }
 }
 
+# Профиль базы: default или sqlite-tuned (WAL, постоянные соединения и
+# прагмы для конкурентной записи).
+DATABASE_PROFILE = os.getenv('YANOTE_DB_PROFILE', 'default')
+
+NOTES_SQLITE_TUNED_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 20000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+NOTES_SQLITE_PRAGMAS = {}
+
+if DATABASE_PROFILE == 'sqlite-tuned':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'timeout': 20},
+    })
+    NOTES_SQLITE_PRAGMAS = NOTES_SQLITE_TUNED_PRAGMAS
+
+# Реплики для чтения заметок. Локально это может быть копия файла базы:
+# YANOTE_DB_REPLICA=/path/to/replica.sqlite3.
+NOTES_DATABASE_REPLICAS = []
+
+NOTES_REPLICA_PIN_SECONDS = 5
+
+if os.getenv('YANOTE_DB_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('YANOTE_DB_REPLICA'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    NOTES_DATABASE_REPLICAS = ['replica']
+
+DATABASE_ROUTERS = ['notes.routers.PrimaryReplicaRouter']
+
+
+# Профиль кэша: locmem, file или memcached. Версии и копии страниц должны
+# быть общими для всех процессов приложения, а locmem у каждого процесса
+# свой, поэтому он годится только для одного процесса: разработки и
+# тестов. YANOTE_CACHE_LOCATION — каталог для file, host:port для
+# memcached (нужен пакет pymemcache).
+CACHE_PROFILE = os.getenv('YANOTE_CACHE_PROFILE', 'locmem')
+
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'file': (
+        'django.core.cache.backends.filebased.FileBasedCache',
+        str(BASE_DIR / 'cache'),
+    ),
+    'memcached': (
+        'django.core.cache.backends.memcached.PyMemcacheCache',
+        '127.0.0.1:11211',
+    ),
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_PROFILE][0],
+        'LOCATION': os.getenv(
+            'YANOTE_CACHE_LOCATION', CACHE_BACKENDS[CACHE_PROFILE][1]
+        ),
+    }
+}
+
+# Число процессов, которые обслуживают запросы (например, gunicorn
+# --workers). Больше одного процесса с locmem не пропустит проверка
+# notes.E001.
+NOTES_WEB_PROCESSES = int(os.getenv('YANOTE_WEB_PROCESSES', '1'))
+
+NOTES_CACHE_ALIAS = 'default'
+
+# Сессии и пользователи кэшируются только в общем кэше: в locmem выход и
+# смена пароля были бы видны одному процессу, а в остальных отозванная
+# сессия жила бы до истечения записи.
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+
+if CACHE_PROFILE != 'locmem':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = ['notes.auth.CachedModelBackend']
+
+NOTES_USER_CACHE_TIMEOUT = 60
+
+NOTES_PAGE_CACHE_TIMEOUT = 60 * 60
+
+NOTES_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+NOTES_API_PAGE_SIZE = 100
+
+NOTES_API_MAX_BATCH = 1000
+
+NOTES_EXPORT_CHUNK_SIZE = 2000
+
+NOTES_ASYNC_DB_THREADS = 8
+
+NOTES_REVISION_SNAPSHOT_EVERY = 20
+
+NOTES_DRAFT_FLUSH_INTERVAL = 30
+
+NOTES_DRAFT_CACHE_TIMEOUT = 24 * 60 * 60
+
+NOTES_STATS_CHUNK_SIZE = 1000
+
+# Дальше этого числа строк админка не считает отфильтрованный список.
+NOTES_ADMIN_COUNT_LIMIT = 10000
+
+NOTES_ADMIN_DELETE_CHUNK_SIZE = 500
+
+NOTES_ADMIN_SEARCH_LIMIT = 1000
+
+NOTES_TEXT_COMPRESS_THRESHOLD = 4096
+
+NOTES_TEXT_COMPRESS_LEVEL = 6
+
+NOTES_JOB_MAX_ATTEMPTS = 3
+
+NOTES_JOB_VISIBILITY_TIMEOUT = 5 * 60
+
+NOTES_JOB_RETRY_DELAY = 10
+
+NOTES_JOB_POLL_INTERVAL = 1
+
+# Завершённые задачи и их файлы удаляются через неделю; воркер проверяет
+# это раз в NOTES_JOB_PURGE_INTERVAL секунд.
+NOTES_JOB_RETENTION = 7 * 24 * 60 * 60
+
+NOTES_JOB_PURGE_INTERVAL = 60 * 60
+
+NOTES_COMPRESS_MIN_SIZE = 1024
+
+NOTES_COMPRESS_GZIP_LEVEL = 6
+
+NOTES_COMPRESS_BROTLI_QUALITY = 4
+
+NOTES_COMPRESS_STREAM_FLUSH = 16 * 1024
+
+NOTES_COMPRESS_CONTENT_TYPES = (
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/csv',
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+)
+
+NOTES_REQUEST_TIMING = False
+
+NOTES_TIMING_SLOW_MS = 500
+
+NOTES_TIMING_SLOWEST_QUERIES = 5
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -83,7 +261,47 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# Профиль статики: default или manifest. В manifest collectstatic
+# добавляет хеш к именам файлов и кладёт рядом сжатые копии; для
+# шаблонов нужен собранный манифест.
+STATIC_PROFILE = os.getenv('YANOTE_STATIC_PROFILE', 'default')
+
+if STATIC_PROFILE == 'manifest':
+    STATICFILES_STORAGE = (
+        'notes.staticfiles.CompressedManifestStaticFilesStorage'
+    )
+
+NOTES_STATIC_COMPRESS_EXTENSIONS = (
+    'css', 'js', 'map', 'svg', 'txt', 'html', 'json', 'xml', 'ico',
+)
+
+NOTES_STATIC_COMPRESS_MIN_SIZE = 256
+
+NOTES_STATIC_MAX_AGE = 60
+
+MEDIA_ROOT = BASE_DIR / 'media'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'notes.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')